@@ -0,0 +1,116 @@
+"""Rule-set analysis: which rules fire on a feed and which can never fire at all.
+
+Rules are first-match-wins in list order, so a rule whose keyword contains
+an earlier rule's keyword (as whole tokens in token mode) is shadowed: the
+earlier rule takes every title it could match. Exact duplicates are the
+simplest case. Shadowed rules can be dropped from the file without changing
+any result on any feed (in the same matching mode). Hit counts from one batch pass over a feed show
+which of the remaining rules actually win there.
+"""
+import numpy as np
+
+from core import match_titles
+
+
+def rule_hits(titles, rule_set, cache=None):
+    """Number of rows of raw titles each rule wins, from one batch match_titles pass."""
+    _, winners = match_titles(titles, rule_set, cache=cache)
+    return np.bincount(winners[winners >= 0], minlength=len(rule_set.rules))
+
+
+def analyze_rules(rule_set, hits=None):
+    """Classify every rule of rule_set; hits (from rule_hits) adds per-feed counts.
+
+    Returns a dict with:
+      'shadowed_by' - RuleSet.shadowed_by() for all rules
+      'duplicates'  - (rule, earlier rule) pairs with the same keyword and category
+      'conflicts'   - the same keyword as an earlier rule but another category
+      'shadowed'    - (rule, earlier rule) pairs where the earlier keyword is a
+                      shorter part of this one
+      'empty'       - rules that can match nothing (an empty keyword in token mode)
+      'unused'      - rules that can win but won no row of the feed (with hits)
+      'hits'        - hits as given
+    """
+    rules = rule_set.rules
+    shadow = rule_set.shadowed_by()
+    report = {'shadowed_by': shadow, 'duplicates': [], 'conflicts': [], 'shadowed': [], 'empty': [],
+              'unused': [], 'hits': hits}
+    for j, i in enumerate(shadow.tolist()):
+        if i < 0:
+            report['empty'].append(j)
+        elif i == j:
+            if hits is not None and not hits[j]:
+                report['unused'].append(j)
+        elif rules[i][0] != rules[j][0]:
+            report['shadowed'].append((j, i))
+        elif rules[i][1] == rules[j][1]:
+            report['duplicates'].append((j, i))
+        else:
+            report['conflicts'].append((j, i))
+    return report
+
+
+def prune_rules(rules, report, reorder=False):
+    """rules without the shadowed and duplicated ones; no result changes.
+
+    The report must come from a rule set in the same mode the pruned rules
+    will be used in: substring mode prunes more ("mysz" shadows "myszka"
+    there, but not in token mode). Empty keywords are kept, since in
+    substring mode they match every title. With reorder and hits in the
+    report, the kept rules also go through reorder_rules().
+    """
+    shadow = report['shadowed_by']
+    keep = [j for j in range(len(rules)) if not 0 <= shadow[j] < j]
+    kept = [rules[j] for j in keep]
+    if reorder and report['hits'] is not None:
+        kept = reorder_rules(kept, report['hits'][keep])
+    return kept
+
+
+def reorder_rules(rules, hits):
+    """Within each run of consecutive rules with the same category, put the rules with most hits first.
+
+    Whichever rule of such a run wins, the category is the same, so no
+    result changes. Moving a rule past one with another category could change
+    the result of a title containing both keywords, so that is never done.
+    """
+    order = []
+    start = 0
+    for end in range(1, len(rules) + 1):
+        if end == len(rules) or rules[end][1] != rules[start][1]:
+            order.extend(sorted(range(start, end), key=lambda j: -hits[j]))
+            start = end
+    return [rules[j] for j in order]
+
+
+def report_lines(report, rules, limit=20):
+    """Human-readable summary of analyze_rules(), listing at most limit rules per group."""
+    def rule(j):
+        return f"#{j} '{rules[j][0]}' -> '{rules[j][1]}'"
+
+    lines = []
+    hits = report['hits']
+    if hits is not None:
+        fired = int(np.count_nonzero(hits))
+        lines.append(f"-> Reguły: {len(rules)}, wygrały w tym pliku: {fired}, ani razu: {len(rules) - fired}")
+        top = np.argsort(-hits, kind='stable')[:limit]
+        lines.append("-> Najczęściej wygrywające reguły (wiersze):")
+        lines.extend(f"   {int(hits[j]):>10}  {rule(j)}" for j in top if hits[j])
+    groups = [
+        ('duplicates', "Duplikaty (ten sam klucz i kategoria co wcześniejsza reguła)"),
+        ('conflicts', "Ten sam klucz co wcześniejsza reguła, inna kategoria (nigdy nie wygrywa)"),
+        ('shadowed', "Przesłonięte przez wcześniejszy krótszy klucz (nigdy nie wygrywają)"),
+    ]
+    for key, title in groups:
+        pairs = report[key]
+        if pairs:
+            lines.append(f"-> {title}: {len(pairs)}")
+            lines.extend(f"   {rule(j)}  <- {rule(i)}" for j, i in pairs[:limit])
+    if report['empty']:
+        lines.append(f"-> Puste słowa klucz (nie pasują do niczego): {len(report['empty'])}")
+    if report['unused']:
+        lines.append(f"-> Nie wygrały w tym pliku (mogą w innych): {len(report['unused'])}")
+        lines.extend(f"   {rule(j)}" for j in report['unused'][:limit])
+    dead = len(report['duplicates']) + len(report['conflicts']) + len(report['shadowed'])
+    lines.append(f"-> Do usunięcia bez zmiany wyników: {dead} z {len(rules)} reguł")
+    return lines
@@ -0,0 +1,210 @@
+"""Categorize many feed files in one run, with the rules compiled once.
+
+Usage: python -m batch INPUT [INPUT ...] --out-dir DIR [--rules rules.json] [--categories categories.json]
+                       [--jobs N] [--format csv|xlsx|parquet|feather] [--final] [--chunksize N]
+                       [--tokens] [--provenance] [--summary summary.csv]
+
+An INPUT is a file, a directory (every feed file directly inside it) or a glob
+pattern such as 'inbox/*.csv'. The rules are compiled and the categories read
+once. With --jobs N > 1, N worker processes get both once at start-up and take
+files one by one, the biggest first. Every file gets its own output in
+--out-dir. A file that fails is reported and the others carry on. The combined
+summary (rows, matched, unmatched, seconds or the error per file) is printed
+and written as csv.
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import core
+
+# Rozszerzenia plików brane z katalogu wejściowego
+INPUT_EXTENSIONS = ('.csv', '.xlsx', '.xls', '.parquet', '.feather')
+SUMMARY_COLUMNS = ['file', 'output', 'rows', 'matched', 'unmatched', 'seconds', 'error']
+
+_worker_rule_set = None
+_worker_kategorie = None
+_worker_cache = None
+
+
+def expand_inputs(patterns):
+    """Input files named by patterns (files, directories or globs), sorted and without repeats."""
+    found = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            found.extend(os.path.join(pattern, name) for name in os.listdir(pattern)
+                         if name.lower().endswith(INPUT_EXTENSIONS) and not name.startswith(('.', '~$')))
+        elif os.path.isfile(pattern):
+            found.append(pattern)
+        else:
+            found.extend(p for p in glob.glob(pattern) if os.path.isfile(p))
+    return sorted(set(os.path.abspath(p) for p in found))
+
+
+def output_paths(inputs, out_dir, fmt=None, taken=()):
+    """Output path in out_dir for every input: the same name (with fmt as extension, .xls -> .xlsx).
+
+    A name that would collide gets a _2, _3... suffix. It collides when it or
+    its *_final file is another output, an input, or in taken (absolute paths).
+    """
+    taken = set(inputs) | set(taken)
+    outputs = []
+    for path in inputs:
+        stem, ext = os.path.splitext(os.path.basename(path))
+        ext = f".{fmt}" if fmt else ('.xlsx' if ext.lower() == '.xls' else ext.lower())
+        out = os.path.abspath(os.path.join(out_dir, stem + ext))
+        n = 2
+        while out in taken or core.final_path_for(out) in taken:
+            out = os.path.abspath(os.path.join(out_dir, f"{stem}_{n}{ext}"))
+            n += 1
+        taken.update((out, core.final_path_for(out)))
+        outputs.append(out)
+    return outputs
+
+
+def process_one(path, output, rule_set, kategorie, final=False, chunksize=None, provenance=False, cache=None):
+    """Categorize one file into output; returns its summary row, with the error instead of raising."""
+    start = time.perf_counter()
+    row = {'file': path, 'output': output}
+    final_path = core.final_path_for(output) if final else None
+    try:
+        if chunksize and path.lower().endswith('.csv') and output.endswith('.csv'):
+            _, summary = core.process_csv_chunked(path, output, rule_set, kategorie, chunksize=chunksize,
+                                                  keep_unmatched=False, cache=cache, final_path=final_path,
+                                                  provenance=provenance)
+        else:
+            _, summary = core.process_file(path, output, rule_set, kategorie, cache=cache,
+                                           final_path=final_path, provenance=provenance)
+        row.update(rows=summary['rows'], matched=summary['matched'], unmatched=summary['unmatched'], error='')
+    except Exception as e:
+        row.update(rows=None, matched=None, unmatched=None, error=f"{type(e).__name__}: {e}")
+    row['seconds'] = round(time.perf_counter() - start, 3)
+    return row
+
+
+def _init_worker(rule_set, kategorie):
+    global _worker_rule_set, _worker_kategorie, _worker_cache
+    _worker_rule_set = rule_set
+    _worker_kategorie = kategorie
+    _worker_cache = core.TitleCache()
+
+
+def _process_in_worker(path, output, final, chunksize, provenance):
+    return process_one(path, output, _worker_rule_set, _worker_kategorie, final, chunksize, provenance,
+                       _worker_cache)
+
+
+def process_batch(inputs, outputs, rule_set=None, kategorie=None, jobs=1, final=False, chunksize=None,
+                  provenance=False, on_done=None):
+    """Categorize inputs[i] into outputs[i] for every i; returns the summary rows in input order.
+
+    The rules are compiled once, into a frozen snapshot that every file (and
+    every worker process, with jobs > 1) matches against, so all files see the
+    same rules even if rules.json changes mid-run. Titles already matched in
+    an earlier file of the same process come from an in-memory TitleCache.
+    on_done, if given, is called with each summary row as soon as its file is
+    finished.
+    """
+    snapshot = (rule_set or core.RULE_SET).snapshot()
+    _ = snapshot.matcher
+    kategorie = core.load_categories() if kategorie is None else kategorie
+    rows = [None] * len(inputs)
+    if jobs <= 1 or len(inputs) <= 1:
+        cache = core.TitleCache()
+        for i, (path, output) in enumerate(zip(inputs, outputs)):
+            rows[i] = process_one(path, output, snapshot, kategorie, final, chunksize, provenance, cache)
+            if on_done is not None:
+                on_done(rows[i])
+        return rows
+    # biggest files first, so a large one does not start last and keep the run waiting
+    order = sorted(range(len(inputs)), key=lambda i: -_size(inputs[i]))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(snapshot, kategorie)) as pool:
+        futures = {pool.submit(_process_in_worker, inputs[i], outputs[i], final, chunksize, provenance): i
+                   for i in order}
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                rows[i] = future.result()
+            except Exception as e:
+                # the worker itself died (e.g. out of memory); process_one catches everything else
+                rows[i] = {'file': inputs[i], 'output': outputs[i], 'rows': None, 'matched': None,
+                           'unmatched': None, 'seconds': None, 'error': f"{type(e).__name__}: {e}"}
+            if on_done is not None:
+                on_done(rows[i])
+    return rows
+
+
+def _size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def summary_frame(rows):
+    """Summary rows as a DataFrame in SUMMARY_COLUMNS order; counts stay integers next to failed files."""
+    frame = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+    return frame.astype({'rows': 'Int64', 'matched': 'Int64', 'unmatched': 'Int64'})
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m batch', description="Przypisz kategorie ofertom z wielu plików naraz.")
+    parser.add_argument('inputs', nargs='+', help="pliki, katalogi albo wzorce (np. 'dostawcy/*.csv')")
+    parser.add_argument('--out-dir', required=True, help="katalog na pliki wynikowe")
+    parser.add_argument('--rules', default=core.RULES_FILE, help="plik reguł (domyślnie rules.json obok programu)")
+    parser.add_argument('--categories', default=core.CATEGORIES_FILE, help="plik kategorii (domyślnie categories.json)")
+    parser.add_argument('--jobs', type=int, default=min(4, os.cpu_count() or 1),
+                        help="ile plików przetwarzać naraz (domyślnie min(4, liczba rdzeni))")
+    parser.add_argument('--format', choices=['csv', 'xlsx', 'parquet', 'feather'], default=None,
+                        help="format plików wynikowych (domyślnie jak plik wejściowy)")
+    parser.add_argument('--final', action='store_true', help="zapisz też plik finalny (id, category_id) obok wyniku")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="pliki CSV (z wynikiem CSV) przetwarzaj strumieniowo porcjami po N wierszy")
+    parser.add_argument('--tokens', action='store_true', help="dopasowuj słowa klucz tylko jako całe słowa")
+    parser.add_argument('--provenance', action='store_true',
+                        help="dodaj kolumny Rule Index i Rule Keyword: która reguła nadała kategorię")
+    parser.add_argument('--summary', default=None, metavar='PATH',
+                        help="plik csv z podsumowaniem (domyślnie OUT_DIR/summary.csv)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    inputs = expand_inputs(args.inputs)
+    if not inputs:
+        print("-> BŁĄD: nie znaleziono plików wejściowych", file=sys.stderr)
+        return 2
+    os.makedirs(args.out_dir, exist_ok=True)
+    summary_path = args.summary or os.path.join(args.out_dir, 'summary.csv')
+    outputs = output_paths(inputs, args.out_dir, args.format)
+    start = time.perf_counter()
+    rule_set = core.RuleSet(args.rules, token=args.tokens)
+    kategorie = core.load_categories(args.categories)
+    print(f"-> Plików: {len(inputs)}, reguł: {len(rule_set.rules)}, kategorii: {len(kategorie)}, naraz: {args.jobs}")
+
+    def done(row):
+        name = os.path.basename(row['file'])
+        if row['error']:
+            print(f"-> BŁĄD {name}: {row['error']}", file=sys.stderr)
+        else:
+            print(f"-> {name}: dopasowano {row['matched']} z {row['rows']} w {row['seconds']:.2f} s")
+
+    rows = process_batch(inputs, outputs, rule_set, kategorie, jobs=args.jobs, final=args.final,
+                         chunksize=args.chunksize, provenance=args.provenance, on_done=done)
+    summary = summary_frame(rows)
+    summary.to_csv(summary_path, index=False)
+    ok = summary[summary['error'] == '']
+    failed = len(summary) - len(ok)
+    print(f"-> Razem: {int(ok['matched'].sum())} z {int(ok['rows'].sum())} ofert dopasowanych, "
+          f"plików: {len(ok)} ok, {failed} z błędem, {time.perf_counter() - start:.2f} s")
+    print(f"-> Podsumowanie: {summary_path}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
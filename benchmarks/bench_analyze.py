@@ -0,0 +1,78 @@
+"""Rule analysis: finding shadowed rules, and matching with the full versus the pruned rule list.
+
+match_series already skips shadowed rules among the ones it scans one by
+one; "no skip" times the earlier behaviour, where only repeated keywords were skipped.
+
+Rules are generated the way they pile up in practice: new, longer keywords
+inserted at the top over shorter ones already in the file.
+
+Usage: python -m benchmarks.bench_analyze [titles]   (default 200_000)
+"""
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from analyze import analyze_rules, prune_rules, rule_hits
+from core import BULK_RULES, RuleSet, match_series, normalize_series
+
+WORDS = ["laptop", "mysz", "myszka", "klawiatura", "monitor", "kabel", "ladowarka", "sluchawki", "etui",
+         "lampa", "biurko", "krzeslo", "glosnik", "pendrive", "router", "drukarka", "tusz", "usb"]
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    random.seed(0)
+    # most titles match nothing, so every scanned rule searches nearly the whole text
+    vocabulary = WORDS + [f"slowo{i}" for i in range(200)]
+    titles = pd.Series([" ".join(random.choices(vocabulary, k=4)) + f" {random.randint(0, 999)}" for _ in range(rows)])
+    norm = normalize_series(titles)
+    print(f"titles: {rows}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rules in (200, 2000, 20000):
+            rules = []
+            for i in range(n_rules):
+                kw = " ".join(random.sample(WORDS, random.randint(1, 3)))
+                rules.insert(0, [kw + (f" {i % 1000}" if i % 4 == 0 else ""), f"Kategoria {i % 40}"])
+            path = os.path.join(tmp, f'rules{n_rules}.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(rules, f)
+            full = RuleSet(path)
+
+            hits, t_hits = timed(rule_hits, titles, full)
+            report, t_analyze = timed(analyze_rules, full, hits)
+            pruned_path = os.path.join(tmp, f'pruned{n_rules}.json')
+            with open(pruned_path, 'w', encoding='utf-8') as f:
+                json.dump([list(r) for r in prune_rules(full.rules, report, reorder=True)], f)
+            pruned = RuleSet(pruned_path)
+
+            winners, t_full = timed(match_series, norm, full)
+            no_skip = full.snapshot()
+            first = {}
+            for i, (k, _) in enumerate(full.rules[:BULK_RULES]):
+                first.setdefault(k, i)
+            no_skip._bulk = sorted(first.values())
+            winners_ns, t_no_skip = timed(match_series, norm, no_skip)
+            assert np.array_equal(winners, winners_ns)
+            winners_p, t_pruned = timed(match_series, norm, pruned)
+            cats = np.array([c for _, c in full.rules] + [""], dtype=object)
+            cats_p = np.array([c for _, c in pruned.rules] + [""], dtype=object)
+            assert np.array_equal(cats[winners], cats_p[winners_p]), "pruning changed a category"
+            print(f"{n_rules:>6} rules -> {len(pruned.rules):>5} after pruning "
+                  f"(hits {t_hits:5.2f} s, analysis {t_analyze:5.2f} s): "
+                  f"match_series {t_no_skip:6.2f} s no skip, {t_full:6.2f} s full, {t_pruned:6.2f} s pruned")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Per-row znajdz_kategorie loop vs categorize_series on a synthetic frame.
+
+Usage: python -m benchmarks.bench_categorize [rows]   (default 1_000_000)
+"""
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from core import RuleSet, categorize_series, normalize_text
+
+WORDS = ["laptop", "mysz", "klawiatura", "monitor", "kabel", "ładowarka", "słuchawki", "etui",
+         "lampa", "biurko", "krzesło", "głośnik", "pendrive", "router", "drukarka", "tusz",
+         "Żółć", "gęś", "MOUSEPAD", "usb-c", "4K", "ÉCRAN"]
+
+
+def per_row(titles, rule_set, kategorie):
+    cats, ids = [], []
+    for tytul in titles:
+        if not isinstance(tytul, str):
+            cats.append(None)
+            ids.append(None)
+            continue
+        cat = rule_set.match(normalize_text(tytul))
+        cats.append(cat)
+        ids.append(kategorie.get(cat, "") if cat else "")
+    return cats, ids
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    random.seed(0)
+    rules = [[f"{random.choice(WORDS)} {random.choice(WORDS)}", f"Kategoria {i % 40}"] for i in range(300)]
+    kategorie = {f"Kategoria {i}": 1000 + i for i in range(30)}
+    titles = pd.Series([" ".join(random.choices(WORDS, k=6)) for _ in range(rows)], dtype=object)
+    titles[::97] = None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rules.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rules, f, ensure_ascii=False)
+        rule_set = RuleSet(path)
+        _ = rule_set.matcher
+
+        t0 = time.perf_counter()
+        cats_loop, ids_loop = per_row(titles, rule_set, kategorie)
+        t_loop = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        cats, ids = categorize_series(titles, rule_set, kategorie)
+        t_vec = time.perf_counter() - t0
+
+    assert cats.tolist() == cats_loop, "Category differs from the per-row loop"
+    assert ids.tolist() == ids_loop, "Category Id differs from the per-row loop"
+    print(f"rows: {rows}, rules: {len(rules)}")
+    print(f"per-row loop:       {t_loop:8.2f} s  ({rows / t_loop:,.0f} rows/s)")
+    print(f"categorize_series:  {t_vec:8.2f} s  ({rows / t_vec:,.0f} rows/s)")
+    print(f"speedup: {t_loop / t_vec:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
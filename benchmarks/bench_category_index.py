@@ -0,0 +1,53 @@
+"""Category combobox filtering: per-keystroke scan versus CategoryIndex.
+
+Usage: python -m benchmarks.bench_category_index [categories]   (default 15_000)
+"""
+import sys
+import random
+import time
+
+from core import CategoryIndex, normalize_text
+
+WORDS = ["Elektronika", "Dom", "Ogród", "Akcesoria", "Części", "Samochodowe", "Meble", "Oświetlenie",
+         "Komputery", "Peryferia", "Zabawki", "Odzież", "Damska", "Męska", "Sport", "Narzędzia"]
+
+
+def make_categories(n):
+    return {" > ".join(random.sample(WORDS, 3)) + f" {i}": 1000 + i for i in range(n)}
+
+
+def scan(kategorie, typed):
+    # the filtering main.py did on every key before CategoryIndex
+    typed_norm = normalize_text(typed)
+    return sorted(k for k in kategorie.keys() if typed_norm in normalize_text(k))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 15_000
+    random.seed(0)
+    kategorie = make_categories(n)
+    typed = "oswietlenie > meb"
+    prefixes = [typed[:i] for i in range(1, len(typed) + 1)]
+
+    t0 = time.perf_counter()
+    expected = [scan(kategorie, p) for p in prefixes]
+    t_scan = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    index = CategoryIndex(kategorie)
+    t_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    got = [index.search(p) for p in prefixes]
+    t_index = time.perf_counter() - t0
+
+    assert got == expected, "CategoryIndex differs from the scan"
+    # a fresh query (no narrowing) goes through the trigram index
+    assert CategoryIndex(kategorie).search("ogrod") == scan(kategorie, "ogrod")
+    k = len(prefixes)
+    print(f"categories: {n}, keystrokes: {k}")
+    print(f"scan:  {t_scan / k * 1000:8.2f} ms/key")
+    print(f"index: {t_index / k * 1000:8.2f} ms/key  (built once in {t_build * 1000:.0f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Duplicate-heavy feed: matching every row vs once per distinct title, with and without a TitleCache.
+
+Usage: python -m benchmarks.bench_dedup [rows] [distinct]   (default 1_000_000 rows, 50_000 distinct titles)
+"""
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import RuleSet, TitleCache, match_series, match_unique, normalize_series
+
+WORDS = ["laptop", "mysz", "klawiatura", "monitor", "kabel", "ładowarka", "słuchawki", "etui",
+         "lampa", "biurko", "krzesło", "głośnik", "pendrive", "router", "drukarka", "tusz"]
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def every_row(titles, rule_set):
+    # what match_titles did before deduplication
+    norm = normalize_series(titles)
+    return norm, match_series(norm, rule_set)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    random.seed(0)
+    rules = [[f"{random.choice(WORDS)} {random.choice(WORDS)}", f"Kategoria {i % 40}"] for i in range(300)]
+    pool = [" ".join(random.choices(WORDS, k=5)) + f" {i}" for i in range(distinct)]
+    # re-listings: a few titles repeated very often, a long tail of rarer ones, some only differing in case
+    weights = 1.0 / np.arange(1, distinct + 1)
+    titles = pd.Series(random.choices(pool, weights=weights, k=rows), dtype=object)
+    titles[::7] = titles[::7].str.upper()
+    titles[::101] = None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rules.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rules, f, ensure_ascii=False)
+        rule_set = RuleSet(path)
+        _ = rule_set.matcher
+
+        (norm_all, expected), t_all = timed(every_row, titles, rule_set)
+        stats = {}
+        (norm_u, winners), t_unique = timed(match_unique, titles, rule_set, stats=stats)
+        cache = TitleCache(os.path.join(tmp, 'titles.pkl'))
+        _, t_cold = timed(match_unique, titles, rule_set, cache)
+        cache.save()
+        # a later run: cache loaded from disk, the same feed again
+        cache = TitleCache(os.path.join(tmp, 'titles.pkl'))
+        warm_stats = {}
+        (_, cached), t_warm = timed(match_unique, titles, rule_set, cache, warm_stats)
+
+    assert np.array_equal(winners, expected) and np.array_equal(cached, expected)
+    assert norm_u.equals(norm_all)
+    print(f"rows: {rows}, distinct normalized titles: {stats['unique']} "
+          f"(dedup ratio {rows / stats['unique']:.1f}x)")
+    print(f"every row:           {t_all:6.2f} s")
+    print(f"once per title:      {t_unique:6.2f} s  ({t_all / t_unique:.1f}x)")
+    print(f"  + cold TitleCache: {t_cold:6.2f} s")
+    print(f"  + warm TitleCache: {t_warm:6.2f} s  (hit rate {warm_stats['cache_hits'] / warm_stats['unique']:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Final (id, category_id) export: the old copy + astype(str) filter versus final_frame.
+
+Usage: python -m benchmarks.bench_export [rows]   (default 1_000_000)
+"""
+import sys
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import final_frame
+
+
+def legacy(df):
+    # what export_final did before final_frame
+    df = df.copy()
+    out_df = pd.DataFrame()
+    out_df['id'] = df['id']
+    out_df['category_id'] = df['Category Id']
+    mask = out_df['category_id'].notnull() & (out_df['category_id'].astype(str).str.strip() != '')
+    return out_df[mask]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    random.seed(0)
+    ids = np.array([random.choice([1001, 1002, 1003, ""]) for _ in range(rows)], dtype=object)
+    ids[::97] = None
+    df = pd.DataFrame({
+        'id': np.arange(rows),
+        'Title': [f"tytul {i}" for i in range(rows)],
+        'Description': ["opis " * 10] * rows,
+        'Category': np.where(ids == "", "", "Kategoria"),
+        'Category Id': ids,
+    })
+
+    t0 = time.perf_counter()
+    expected = legacy(df)
+    t_legacy = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    final, skipped = final_frame(df)
+    t_final = time.perf_counter() - t0
+
+    assert final['id'].tolist() == expected['id'].tolist()
+    assert final['category_id'].tolist() == expected['category_id'].tolist()
+    assert skipped == rows - len(expected)
+    print(f"rows: {rows}, exported: {len(final)}")
+    print(f"copy + astype(str): {t_legacy:6.2f} s")
+    print(f"final_frame:        {t_final:6.2f} s  ({t_legacy / t_final:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
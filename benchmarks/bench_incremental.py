@@ -0,0 +1,59 @@
+"""Full re-match vs rematch_incremental after adding or removing one rule.
+
+Usage: python -m benchmarks.bench_incremental [rows]   (default 500_000)
+"""
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from core import RuleSet, match_titles, rematch_incremental, save_rules
+
+WORDS = ["laptop", "mysz", "klawiatura", "monitor", "kabel", "ładowarka", "słuchawki", "etui",
+         "lampa", "biurko", "krzesło", "głośnik", "pendrive", "router", "drukarka", "tusz"]
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    random.seed(0)
+    titles = pd.Series([" ".join(random.choices(WORDS, k=5)) + f" {random.randint(0, 999)}" for _ in range(rows)])
+    rules = [[f"{random.choice(WORDS)} {random.choice(WORDS)}", f"K{i % 20}"] for i in range(500)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rules.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rules, f, ensure_ascii=False)
+        rule_set = RuleSet(path)
+        norm, winners = match_titles(titles, rule_set)
+
+        print(f"rows: {rows}, rules: {len(rules)}")
+        for step in range(10):
+            old_rules = rule_set.rules
+            edited = list(old_rules)
+            if step % 2 == 0:
+                edited.insert(0, (f"{random.choice(WORDS)} {random.randint(0, 999)}", "Nowa"))
+                label = "add"
+            else:
+                edited.pop(random.randrange(len(edited)))
+                label = "delete"
+            save_rules(edited, path)
+
+            incremental, t_inc = timed(rematch_incremental, norm, winners, old_rules, rule_set)
+            (_, full), t_full = timed(match_titles, titles, rule_set)
+            assert incremental is not None and (incremental == full).all(), f"{label}: incremental differs"
+            print(f"{label:>7}: full {t_full:6.2f} s   incremental {t_inc:6.3f} s")
+            winners = incremental
+
+
+if __name__ == '__main__':
+    main()
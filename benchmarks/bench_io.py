@@ -0,0 +1,83 @@
+"""Write and read time of every supported output/input format on a synthetic feed.
+
+Usage: python -m benchmarks.bench_io [rows]   (default 500_000)
+
+xlsx is written with core.EXCEL_WRITER and read with every engine that is
+installed (openpyxl, calamine); missing engines are reported as skipped.
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+import core
+
+WORDS = ["laptop", "mysz", "klawiatura", "monitor", "kabel", "ładowarka", "słuchawki", "etui",
+         "lampa", "biurko", "krzesło", "głośnik", "pendrive", "router", "drukarka", "tusz"]
+
+
+def make_frame(rows):
+    return pd.DataFrame({
+        'id': range(rows),
+        'Title': [" ".join(random.choices(WORDS, k=6)) for _ in range(rows)],
+        'Price': [round(random.uniform(1, 5000), 2) for _ in range(rows)],
+        'Seller': [f"sprzedawca {random.randint(0, 5000)}" for _ in range(rows)],
+        'Description': [" ".join(random.choices(WORDS, k=20)) for _ in range(rows)],
+    })
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def row(name, t_write, t_read, t_part, path):
+    write = f"{t_write:>10.2f}" if t_write is not None else f"{'-':>10}"
+    print(f"{name:<22}{write}{t_read:>10.2f}{t_part:>18.2f}{os.path.getsize(path) / 2**20:>10.1f}")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    random.seed(0)
+    df = make_frame(rows)
+    print(f"rows: {rows}, columns: {len(df.columns)}")
+    print(f"{'format':<22}{'write s':>10}{'read s':>10}{'read Title,id s':>18}{'size MiB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for ext in ('csv', 'parquet', 'feather'):
+            path = os.path.join(tmp, f"feed.{ext}")
+            try:
+                _, t_write = timed(core.write_output, df, path)
+                back, t_read = timed(core.read_input, path)
+                part, t_part = timed(core.read_input, path, ['Title', 'id'])
+            except ImportError as e:
+                print(f"{ext:<22}skipped ({e})")
+                continue
+            assert len(back) == rows and list(part.columns) == ['id', 'Title']
+            row(ext, t_write, t_read, t_part, path)
+
+        # xlsx is written once; each reader engine is timed on the same file
+        path = os.path.join(tmp, "feed.xlsx")
+        try:
+            _, t_write = timed(core.write_output, df, path)
+        except ImportError as e:
+            print(f"{'xlsx':<22}skipped ({e})")
+            return
+        for engine in ('openpyxl', 'calamine'):
+            try:
+                # pd.read_excel directly: read_input would hide a missing engine behind its csv fallback
+                back, t_read = timed(pd.read_excel, path, engine=engine)
+                part, t_part = timed(pd.read_excel, path, engine=engine, usecols=['Title', 'id'])
+            except ImportError as e:
+                print(f"{'xlsx ' + engine:<22}skipped ({e})")
+                continue
+            assert len(back) == rows and list(part.columns) == ['id', 'Title']
+            row(f"xlsx {engine}", t_write, t_read, t_part, path)
+            t_write = None
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Aho-Corasick matcher vs the linear first-rule-wins scan.
+
+Checks that both return the same winner, then times matching as the rule set
+grows from 100 to 100k keywords.
+
+Usage: python -m benchmarks.bench_matcher
+"""
+import random
+import string
+import time
+
+from matcher import AhoCorasick
+
+
+def linear_first_match(keywords, text):
+    for idx, kw in enumerate(keywords):
+        if kw in text:
+            return idx
+    return -1
+
+
+def random_word(alphabet, lo=2, hi=8):
+    return ''.join(random.choices(alphabet, k=random.randint(lo, hi)))
+
+
+def check_equivalence(rounds=300):
+    # small alphabet so keywords overlap, nest and repeat a lot
+    alphabet = 'abc '
+    for _ in range(rounds):
+        keywords = [random_word(alphabet, 0, 5) for _ in range(random.randint(0, 30))]
+        ac = AhoCorasick(keywords)
+        for _ in range(30):
+            text = random_word(alphabet, 0, 20)
+            expected = linear_first_match(keywords, text)
+            got = ac.first_match(text)
+            assert got == expected, (keywords, text, expected, got)
+
+
+def bench(n_rules, titles):
+    vocab = [random_word(string.ascii_lowercase, 3, 8) for _ in range(5000)]
+    keywords = [' '.join(random.choices(vocab, k=2)) for _ in range(n_rules)]
+
+    t0 = time.perf_counter()
+    ac = AhoCorasick(keywords)
+    t_build = time.perf_counter() - t0
+
+    sample = titles[:200] if n_rules >= 10000 else titles
+    t0 = time.perf_counter()
+    expected = [linear_first_match(keywords, t) for t in sample]
+    t_linear = (time.perf_counter() - t0) / len(sample)
+
+    t0 = time.perf_counter()
+    got = [ac.first_match(t) for t in titles]
+    t_ac = (time.perf_counter() - t0) / len(titles)
+    assert got[:len(sample)] == expected
+    return t_build, t_linear, t_ac
+
+
+def main():
+    random.seed(0)
+    check_equivalence()
+    print("equivalence vs linear scan: OK")
+    titles = [' '.join(random_word(string.ascii_lowercase, 3, 8) for _ in range(8)) for _ in range(2000)]
+    print(f"{'rules':>8} {'build s':>9} {'linear us/title':>16} {'aho us/title':>13}")
+    for n in (100, 1000, 10000, 100000):
+        t_build, t_linear, t_ac = bench(n, titles)
+        print(f"{n:>8} {t_build:>9.2f} {t_linear * 1e6:>16.1f} {t_ac * 1e6:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""normalize_text (translation table + LRU cache) vs the reference NFKD implementation.
+
+First checks byte-for-byte equivalence: every BMP character on its own and
+in context, plus random strings mixing Latin, combining marks, other
+scripts and astral characters. Then times both on typical titles.
+
+Usage: python -m benchmarks.bench_normalize
+"""
+import random
+import sys
+import time
+
+from core import _normalize_str, _normalize_text_slow, normalize_text
+
+ALPHABET = ([chr(cp) for cp in range(0x250)]
+            + [chr(cp) for cp in range(0x300, 0x370)]
+            + list("ΣσςİıĲǅǈǋﬁﬀ½²³™№ℌⅫ①ｶﾞ日本語한국어ßẞ​ \t\n")
+            + ['\U0001d400', '\U0001f600'])
+WORDS = ["Laptop", "mysz", "Klawiatura", "ładowarka", "Żółć", "gęś", "MOUSEPAD", "usb-c", "4K", "Écran"]
+
+
+def check_equivalence(rounds=200_000):
+    for cp in range(sys.maxunicode + 1):
+        if 0xd800 <= cp < 0xe000:
+            continue
+        ch = chr(cp)
+        for s in (ch, f"A{ch}b", f"{ch}́{ch}"):
+            assert normalize_text(s) == _normalize_text_slow(s), (hex(cp), s)
+    for _ in range(rounds):
+        s = ''.join(random.choices(ALPHABET, k=random.randint(0, 24)))
+        assert normalize_text(s) == _normalize_text_slow(s), repr(s)
+    for value in (None, 1, 2.5, b"bytes", ["a"]):
+        assert normalize_text(value) == ""
+
+
+def bench(label, fn, titles):
+    t0 = time.perf_counter()
+    for t in titles:
+        fn(t)
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<28} {elapsed / len(titles) * 1e6:8.2f} us/call")
+
+
+def main():
+    random.seed(0)
+    check_equivalence()
+    print("equivalence vs reference implementation: OK")
+    titles = [" ".join(random.choices(WORDS, k=6)) + f" {i}" for i in range(200_000)]
+    repeated = titles[:1000] * 200
+    bench("reference (NFKD + regex)", _normalize_text_slow, titles)
+    _normalize_str.cache_clear()
+    bench("normalize_text, unique", normalize_text, titles)
+    _normalize_str.cache_clear()
+    bench("normalize_text, repeated", normalize_text, repeated)
+
+
+if __name__ == '__main__':
+    main()
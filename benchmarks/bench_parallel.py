@@ -0,0 +1,50 @@
+"""Throughput of categorize_parallel at 1/2/4/8/16 worker processes.
+
+Every run is checked against the serial categorize_series output.
+
+Usage: python -m benchmarks.bench_parallel [rows]   (default 1_000_000)
+"""
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from core import RuleSet, categorize_parallel, categorize_series
+
+WORDS = ["laptop", "mysz", "klawiatura", "monitor", "kabel", "ładowarka", "słuchawki", "etui",
+         "lampa", "biurko", "krzesło", "głośnik", "pendrive", "router", "drukarka", "tusz"]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    random.seed(0)
+    titles = pd.Series([" ".join(random.choices(WORDS, k=6)) + f" {random.randint(0, 999)}" for _ in range(rows)])
+    rules = [[f"{random.choice(WORDS)} {random.randint(0, 999)}", f"K{i % 20}"] for i in range(2000)]
+    kategorie = {f"K{i}": i for i in range(20)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rules.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rules, f, ensure_ascii=False)
+        rule_set = RuleSet(path)
+
+        t0 = time.perf_counter()
+        serial = categorize_series(titles, rule_set, kategorie)
+        t_serial = time.perf_counter() - t0
+        print(f"rows: {rows}, rules: {len(rules)}, cpus: {os.cpu_count()}")
+        print(f"{'serial':>10}: {t_serial:7.2f} s  {rows / t_serial:>12,.0f} rows/s")
+
+        for workers in (1, 2, 4, 8, 16):
+            t0 = time.perf_counter()
+            cats, ids = categorize_parallel(titles, rule_set, kategorie, workers=workers, shard_size=25_000)
+            elapsed = time.perf_counter() - t0
+            assert cats.equals(serial[0]) and ids.equals(serial[1]), f"{workers} workers: output differs"
+            print(f"{workers:>2} workers: {elapsed:7.2f} s  {rows / elapsed:>12,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
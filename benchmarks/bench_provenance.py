@@ -0,0 +1,56 @@
+"""Provenance columns: memory of int32 rule ids + categorical keywords versus a plain string column,
+and the cost of counting every matching rule.
+
+Usage: python -m benchmarks.bench_provenance [rows]   (default 1_000_000)
+"""
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import RuleSet, match_titles, provenance_columns
+
+WORDS = ["laptop", "mysz", "myszka", "klawiatura", "monitor", "kabel", "ladowarka", "sluchawki", "etui",
+         "lampa", "biurko", "krzeslo", "glosnik", "pendrive", "router", "drukarka", "tusz", "usb"]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    random.seed(0)
+    titles = pd.Series([" ".join(random.choices(WORDS, k=4)) + f" {random.randint(0, 9999)}" for _ in range(rows)])
+    rules = [[" ".join(random.sample(WORDS, random.randint(1, 2))), f"Kategoria {i % 40}"] for i in range(1000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rules.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rules, f)
+        rule_set = RuleSet(path).snapshot()
+
+        t0 = time.perf_counter()
+        _, winners = match_titles(titles, rule_set)
+        t_match = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        columns = provenance_columns(winners, rule_set.rules)
+        t_columns = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        _, winners_c, counts = match_titles(titles, rule_set, return_counts=True)
+        t_counts = time.perf_counter() - t0
+        assert np.array_equal(winners, winners_c), "counting pass picked other winners"
+
+    keywords = np.array([k for k, _ in rule_set.rules] + [None], dtype=object)
+    as_strings = pd.Series(keywords[np.where(winners >= 0, winners, len(rule_set.rules))], dtype=object)
+    compact = sum(columns[c].memory_usage(deep=True) for c in ('Rule Index', 'Rule Keyword'))
+    print(f"rows: {rows}, rules: {len(rule_set.rules)}, distinct titles: {titles.nunique()}")
+    print(f"match_titles:                 {t_match:6.2f} s")
+    print(f"provenance columns:           {t_columns:6.2f} s")
+    print(f"match_titles + counts:        {t_counts:6.2f} s  (mean {counts.mean():.1f} matching rules per row)")
+    print(f"keyword as object strings:    {as_strings.memory_usage(deep=True) / 2**20:8.1f} MB")
+    print(f"int32 index + categorical:    {compact / 2**20:8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Cold start of a RuleSet: parsing rules.json and compiling the automaton versus loading the compiled cache.
+
+Usage: python -m benchmarks.bench_rules_cache [rules]   (default 50_000)
+"""
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+
+import core
+from core import RuleSet
+
+WORDS = ["laptop", "mysz", "klawiatura", "monitor", "kabel", "ładowarka", "słuchawki", "etui",
+         "lampa", "biurko", "krzesło", "głośnik", "pendrive", "router", "drukarka", "tusz"]
+
+
+def cold_start(path):
+    # a fresh process has an empty normalize cache, so clear it to time the real work
+    core._normalize_str.cache_clear()
+    t0 = time.perf_counter()
+    rule_set = RuleSet(path)
+    _ = rule_set.matcher
+    return time.perf_counter() - t0, rule_set
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    random.seed(0)
+    rules = [[f"{random.choice(WORDS)} {random.choice(WORDS)} {i}", f"Kategoria {i % 50}"] for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rules.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(rules, f, ensure_ascii=False)
+
+        t_json, compiled = cold_start(path)
+        t_cache, cached = cold_start(path)
+        assert compiled.cache_hits == 0 and cached.cache_hits == 1
+        assert cached.rules == compiled.rules
+        titles = [f"{random.choice(WORDS)} {random.choice(WORDS)} {random.randint(0, n)}" for _ in range(2000)]
+        titles = [core.normalize_text(t) for t in titles]
+        assert [cached.match_index(t) for t in titles] == [compiled.match_index(t) for t in titles]
+
+        size = os.path.getsize(compiled.compiled_path)
+        print(f"rules: {n}, compiled cache: {size / 2**20:.1f} MiB")
+        print(f"JSON + normalize + compile: {t_json * 1000:8.0f} ms")
+        print(f"compiled cache hit:         {t_cache * 1000:8.0f} ms  ({t_json / t_cache:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Per-title matching cost: re-reading rules.json for every title vs a shared RuleSet.
+
+Usage: python -m benchmarks.bench_ruleset
+"""
+import os
+import json
+import random
+import tempfile
+import time
+
+from core import RuleSet, load_rules, normalize_text
+
+WORDS = ["laptop", "mysz", "klawiatura", "monitor", "kabel", "ładowarka", "słuchawki", "etui",
+         "lampa", "biurko", "krzesło", "głośnik", "pendrive", "router", "drukarka", "tusz"]
+
+
+def make_rules(n):
+    return [[f"{random.choice(WORDS)} {i}", f"Kategoria {i % 50}"] for i in range(n)]
+
+
+def make_titles(n):
+    return [" ".join(random.choices(WORDS, k=5)) + f" {random.randint(0, 10000)}" for _ in range(n)]
+
+
+def legacy_match(tytul, path):
+    tytul_norm = normalize_text(tytul)
+    for slowo_klucz, kat in load_rules(path):
+        if slowo_klucz in tytul_norm:
+            return kat
+    return ""
+
+
+def bench(n_rules, titles):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rules.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(make_rules(n_rules), f, ensure_ascii=False)
+
+        t0 = time.perf_counter()
+        legacy = [legacy_match(t, path) for t in titles]
+        t_legacy = time.perf_counter() - t0
+
+        rule_set = RuleSet(path)
+        t0 = time.perf_counter()
+        shared = [rule_set.match(normalize_text(t)) for t in titles]
+        t_shared = time.perf_counter() - t0
+
+    assert legacy == shared, "RuleSet results differ from per-title load_rules()"
+    return t_legacy / len(titles), t_shared / len(titles), rule_set.loads
+
+
+def main():
+    random.seed(0)
+    titles = make_titles(2000)
+    print(f"{'rules':>8} {'legacy us/title':>16} {'RuleSet us/title':>17} {'file loads':>11}")
+    for n in (10, 100, 1000, 5000):
+        legacy, shared, loads = bench(n, titles)
+        print(f"{n:>8} {legacy * 1e6:>16.1f} {shared * 1e6:>17.1f} {loads:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Saving one new rule: appending to the change log versus rewriting the whole rules.json.
+
+Usage: python -m benchmarks.bench_rulestore [rules]   (default 50_000)
+"""
+import os
+import sys
+import tempfile
+import time
+
+import core
+from core import add_rule, load_rules, save_rules
+
+EDITS = 50
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    rules = [(f"slowo {i}", f"Kategoria {i % 50}") for i in range(n)]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rules.json')
+
+        save_rules(rules, path)
+        current = list(rules)
+        t0 = time.perf_counter()
+        for i in range(EDITS):
+            current.insert(0, (f"nowe {i}", "Nowa"))
+            save_rules(current, path)
+        t_rewrite = (time.perf_counter() - t0) / EDITS
+        expected = load_rules(path)
+
+        save_rules(rules, path)
+        t0 = time.perf_counter()
+        for i in range(EDITS):
+            add_rule(f"nowe {i}", "Nowa", path)
+        t_append = (time.perf_counter() - t0) / EDITS
+        assert load_rules(path) == expected, "change log replay differs from full rewrite"
+
+        t0 = time.perf_counter()
+        core.compact_rules(path)
+        t_compact = time.perf_counter() - t0
+        assert load_rules(path) == expected
+
+    print(f"{n} rules, {EDITS} added one by one")
+    print(f"  full rewrite per rule  {t_rewrite * 1000:8.2f} ms")
+    print(f"  log append per rule    {t_append * 1000:8.2f} ms   ({t_rewrite / t_append:.0f}x)")
+    print(f"  compaction (once)      {t_compact * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
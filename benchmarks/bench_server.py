@@ -0,0 +1,115 @@
+"""Load test of the HTTP service (server.py): latency percentiles and requests per second.
+
+Usage: python -m benchmarks.bench_server [requests] [concurrency] [titles per request]
+                                         (default 20_000, 32, 1)
+       SERVER_URL=http://127.0.0.1:8765 python -m benchmarks.bench_server ...
+
+Without SERVER_URL a server is started on a free port with 1000 synthetic
+rules, once with micro-batching and once with batches of a single request,
+so the two can be compared. Each client keeps one connection open and sends
+its requests back to back.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import tempfile
+import subprocess
+
+import numpy as np
+
+WORDS = ["laptop", "mysz", "myszka", "klawiatura", "monitor", "kabel", "ladowarka", "sluchawki", "etui",
+         "lampa", "biurko", "krzeslo", "glosnik", "pendrive", "router", "drukarka", "tusz", "usb"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _client(host, port, bodies, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            request = (f"POST /categorize HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1') + body
+            t0 = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = await reader.readline()
+            length = 0
+            while True:
+                header = await reader.readline()
+                if header in (b'\r\n', b''):
+                    break
+                if header.lower().startswith(b'content-length:'):
+                    length = int(header.split(b':', 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+            if b' 200 ' not in status:
+                raise RuntimeError(f"odpowiedź serwera: {status.decode('latin-1').strip()}")
+    finally:
+        writer.close()
+
+
+async def load(host, port, requests, concurrency, batch):
+    random.seed(0)
+    bodies = []
+    for _ in range(requests):
+        titles = [" ".join(random.choices(WORDS, k=4)) + f" {random.randint(0, 99999)}" for _ in range(batch)]
+        payload = {'title': titles[0]} if batch == 1 else {'titles': titles}
+        bodies.append(json.dumps(payload).encode('utf-8'))
+    latencies = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_client(host, port, bodies[c::concurrency], latencies) for c in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    lat_ms = np.array(latencies) * 1000
+    return elapsed, np.percentile(lat_ms, 50), np.percentile(lat_ms, 99)
+
+
+def start_server(rules_path, categories_path, max_batch):
+    proc = subprocess.Popen([sys.executable, '-m', 'server', '--port', '0', '--rules', rules_path,
+                             '--categories', categories_path, '--max-batch', str(max_batch)],
+                            cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    for line in proc.stdout:
+        if 'http://' in line:
+            host, port = line.rsplit('http://', 1)[1].strip().rsplit(':', 1)
+            return proc, host, int(port)
+    proc.kill()
+    raise RuntimeError("serwer nie wystartował")
+
+
+def report(label, requests, batch, result):
+    elapsed, p50, p99 = result
+    print(f"{label:<22} {requests / elapsed:>10,.0f} req/s  {requests * batch / elapsed:>12,.0f} tytułów/s"
+          f"  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    batch = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    print(f"{requests:,} żądań po {batch} tytuł(ów), {concurrency} równoległych klientów")
+    url = os.environ.get('SERVER_URL')
+    if url:
+        host, port = url.split('://', 1)[-1].rstrip('/').rsplit(':', 1)
+        report(url, requests, batch, asyncio.run(load(host, int(port), requests, concurrency, batch)))
+        return
+    random.seed(0)
+    rules = [[" ".join(random.sample(WORDS, random.randint(1, 2))), f"Kategoria {i % 40}"] for i in range(1000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        rules_path = os.path.join(tmp, 'rules.json')
+        categories_path = os.path.join(tmp, 'categories.json')
+        with open(rules_path, 'w', encoding='utf-8') as f:
+            json.dump(rules, f)
+        with open(categories_path, 'w', encoding='utf-8') as f:
+            json.dump({f"Kategoria {i}": 1000 + i for i in range(40)}, f)
+        for label, max_batch in (("mikro-partie", 2000), ("bez partii (1 żądanie)", 1)):
+            proc, host, port = start_server(rules_path, categories_path, max_batch)
+            try:
+                report(label, requests, batch, asyncio.run(load(host, port, requests, concurrency, batch)))
+            finally:
+                proc.terminate()
+                proc.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Keyword suggestions over a large set of unmatched titles.
+
+Usage: python -m benchmarks.bench_suggest [rows]   (default 1_000_000)
+"""
+import sys
+import random
+import resource
+import time
+
+import pandas as pd
+
+from suggest import suggest_keywords
+
+BRANDS = ["logitech", "razer", "dell", "hp", "lenovo", "xiaomi", "samsung", "philips"]
+NOUNS = ["mysz", "klawiatura", "monitor", "kabel", "ladowarka", "sluchawki", "etui", "lampa", "glosnik"]
+ADJS = ["bezprzewodowa", "gamingowa", "czarna", "biala", "nowa", "usb", "led", "mini"]
+
+
+def make_titles(rows):
+    titles = []
+    for _ in range(rows):
+        words = [random.choice(ADJS), random.choice(NOUNS), random.choice(BRANDS), f"model{random.randint(0, 5000)}"]
+        random.shuffle(words)
+        titles.append(" ".join(words))
+    return titles
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    random.seed(0)
+    titles = pd.Series(make_titles(rows))
+    t0 = time.perf_counter()
+    result = suggest_keywords(titles, top=10)
+    elapsed = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"rows: {rows}, time: {elapsed:.2f} s, peak RSS: {peak:.0f} MiB")
+    for keyword, new_rows, total in result:
+        print(f"{new_rows:>9} new / {total:>9} total  {keyword!r}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Whole-token matching: TokenMatcher and token-mode match_series versus a padded-substring loop.
+
+Usage: python -m benchmarks.bench_tokens [titles]   (default 200_000)
+"""
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import RuleSet, match_series, normalize_series
+
+WORDS = ["laptop", "mysz", "myszka", "klawiatura", "monitor", "kabel", "ladowarka", "sluchawki", "etui",
+         "lampa", "biurko", "krzeslo", "glosnik", "pendrive", "router", "drukarka", "tusz", "usb", "usb-c"]
+
+
+def naive(values, keywords):
+    # the definition of a whole-token match on normalized text
+    padded_keywords = [f" {kw} " for kw in keywords]
+    return [next((i for i, kw in enumerate(padded_keywords) if kw in f" {t} "), -1) for t in values]
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    random.seed(0)
+    titles = pd.Series([" ".join(random.choices(WORDS, k=6)) + f" {random.randint(0, 999)}" for _ in range(rows)])
+    norm = normalize_series(titles)
+    values = norm.tolist()
+    print(f"titles: {rows}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rules in (100, 1000, 10000):
+            rules = [[" ".join(random.choices(WORDS, k=random.randint(1, 2))) + (f" {i % 1000}" if i % 3 else ""),
+                      f"Kategoria {i % 40}"] for i in range(n_rules)]
+            path = os.path.join(tmp, f'rules{n_rules}.json')
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(rules, f)
+            substring = RuleSet(path)
+            token = RuleSet(path, token=True)
+            keywords = [k for k, _ in token.rules]
+
+            sample = values[:2000]
+            expected = naive(sample, keywords)
+            assert [token.match_index(t) for t in sample] == expected, "TokenMatcher differs from padded substrings"
+
+            t0 = time.perf_counter()
+            per_title = [token.match_index(t) for t in values]
+            t_index = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            bulk = match_series(norm, token)
+            t_bulk = time.perf_counter() - t0
+            assert np.array_equal(bulk, np.array(per_title, dtype=np.int32)), "token match_series differs"
+            t0 = time.perf_counter()
+            match_series(norm, substring)
+            t_sub = time.perf_counter() - t0
+            print(f"{n_rules:>6} rules: TokenMatcher {t_index:6.2f} s, token match_series {t_bulk:6.2f} s, "
+                  f"substring match_series {t_sub:6.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Headless batch categorization.
+
+Usage: python -m cli INPUT OUTPUT [--rules rules.json] [--categories categories.json]
+                     [--chunksize N] [--unmatched unmatched.txt] [--workers N] [--shard-size N]
+                     [--suggest N] [--title-cache titles.pkl] [--tokens]
+                     [--columns id,Title] [--excel-engine calamine|openpyxl] [--final final.csv]
+                     [--analyze] [--prune-rules pruned.json] [--provenance] [--match-count]
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+import core
+from analyze import analyze_rules, prune_rules, report_lines, rule_hits
+from rulestore import atomic_write_json
+from suggest import suggest_keywords
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m cli', description="Przypisz kategorie do ofert bez GUI.")
+    parser.add_argument('input', help="plik wejściowy (xlsx/xls/csv/parquet/feather) z kolumną 'Title'")
+    parser.add_argument('output', help="plik wyjściowy (xlsx/csv/parquet/feather - według rozszerzenia)")
+    parser.add_argument('--rules', default=core.RULES_FILE, help="plik reguł (domyślnie rules.json obok programu)")
+    parser.add_argument('--categories', default=core.CATEGORIES_FILE, help="plik kategorii (domyślnie categories.json)")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="przetwarzaj CSV strumieniowo porcjami po N wierszy (wejście i wyjście muszą być .csv)")
+    parser.add_argument('--unmatched', default=None, help="zapisz niedopasowane tytuły do pliku tekstowego")
+    parser.add_argument('--workers', type=int, default=1, help="liczba procesów dopasowujących (domyślnie 1)")
+    parser.add_argument('--shard-size', type=int, default=core.SHARD_SIZE,
+                        help=f"wierszy na zadanie procesu roboczego (domyślnie {core.SHARD_SIZE})")
+    parser.add_argument('--suggest', type=int, default=0, metavar='N',
+                        help="wypisz N podpowiedzi słów kluczowych z niedopasowanych tytułów")
+    parser.add_argument('--title-cache', default=None, metavar='PATH',
+                        help="plik z zapamiętanymi dopasowaniami tytułów między uruchomieniami "
+                             "(unieważniany przy zmianie reguł)")
+    parser.add_argument('--tokens', action='store_true',
+                        help="dopasowuj słowa klucz tylko jako całe słowa (\"mysz\" nie pasuje do \"myszka\")")
+    parser.add_argument('--columns', default=None,
+                        help="wczytaj tylko te kolumny wejścia, oddzielone przecinkami (Title zawsze)")
+    parser.add_argument('--excel-engine', default=None, choices=['calamine', 'openpyxl'],
+                        help="silnik odczytu Excela (domyślnie calamine, jeśli jest zainstalowany)")
+    parser.add_argument('--final', default=None, metavar='PATH',
+                        help="zapisz też plik finalny (id, category_id) w tym samym przebiegu")
+    parser.add_argument('--provenance', action='store_true',
+                        help="dodaj kolumny Rule Index i Rule Keyword: która reguła nadała kategorię")
+    parser.add_argument('--match-count', action='store_true',
+                        help="dodaj kolumnę Rule Matches: ile reguł pasuje do tytułu (wolniejsze dopasowanie)")
+    parser.add_argument('--analyze', action='store_true',
+                        help="przeanalizuj reguły: trafienia w tym pliku, duplikaty i reguły przesłonięte "
+                             "przez wcześniejsze krótsze klucze")
+    parser.add_argument('--prune-rules', default=None, metavar='PATH',
+                        help="zapisz do PATH reguły bez duplikatów i przesłoniętych, najczęściej trafiające "
+                             "pierwsze w obrębie tej samej kategorii (wyniki się nie zmieniają)")
+    return parser
+
+
+def feed_hits(args, rule_set, cache, df=None):
+    """Rule hit counts over the input's titles; CSV input in chunked mode is read again in chunks."""
+    if df is not None:
+        return rule_hits(df['Title'], rule_set, cache)
+    hits = np.zeros(len(rule_set.rules), dtype=np.int64)
+    for chunk in pd.read_csv(args.input, usecols=['Title'], chunksize=args.chunksize):
+        hits += rule_hits(chunk['Title'], rule_set, cache)
+    return hits
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    rule_set = core.RuleSet(args.rules, token=args.tokens)
+    kategorie = core.load_categories(args.categories)
+    cache = core.TitleCache(args.title_cache) if args.title_cache else None
+    columns = [c.strip() for c in args.columns.split(',') if c.strip()] if args.columns else None
+    print(f"-> Pobieram: {args.input}")
+    df = None
+    try:
+        if args.chunksize:
+            if not (args.input.endswith('.csv') and args.output.endswith('.csv')
+                    and (not args.final or args.final.endswith('.csv'))):
+                print("-> BŁĄD: tryb --chunksize obsługuje tylko pliki .csv", file=sys.stderr)
+                return 2
+            unmatched, summary = core.process_csv_chunked(args.input, args.output, rule_set, kategorie,
+                                                          chunksize=args.chunksize,
+                                                          keep_unmatched=bool(args.unmatched or args.suggest),
+                                                          workers=args.workers, shard_size=args.shard_size,
+                                                          cache=cache, columns=columns, final_path=args.final,
+                                                          provenance=args.provenance, match_counts=args.match_count)
+        else:
+            df, summary = core.process_file(args.input, args.output, rule_set, kategorie,
+                                            workers=args.workers, shard_size=args.shard_size, cache=cache,
+                                            columns=columns, engine=args.excel_engine, final_path=args.final,
+                                            provenance=args.provenance, match_counts=args.match_count)
+            unmatched = df.loc[~df['Category'].astype(bool), 'Title'].tolist() if args.unmatched or args.suggest else []
+        if args.unmatched:
+            with open(args.unmatched, 'w', encoding='utf-8') as f:
+                f.writelines(f"{t}\n" for t in unmatched)
+        if cache is not None:
+            cache.save()
+        suggestions = suggest_keywords(core.normalize_series(pd.Series(unmatched, dtype=object)), rule_set,
+                                       top=args.suggest) if args.suggest else []
+        analysis = None
+        if args.analyze or args.prune_rules:
+            # hits and the shadowing check must see the same rule list
+            snapshot = rule_set.snapshot()
+            analysis = analyze_rules(snapshot, feed_hits(args, snapshot, cache, df))
+            if args.prune_rules:
+                pruned = prune_rules(snapshot.rules, analysis, reorder=True)
+                atomic_write_json(args.prune_rules, [list(r) for r in pruned])
+    except Exception as e:
+        print(f"-> BŁĄD KRYTYCZNY: {e}", file=sys.stderr)
+        return 1
+    print(f"-> Reguł: {len(rule_set.rules)}, kategorii: {len(kategorie)}")
+    print(f"-> Dopasowano {summary['matched']} z {summary['rows']} ofert "
+          f"(niedopasowane: {summary['unmatched']}) w {summary['seconds']:.2f} s")
+    if summary.get('unique'):
+        print(f"-> Unikalnych tytułów: {summary['unique']} "
+              f"(deduplikacja {summary['rows'] / summary['unique']:.1f}x), "
+              f"z cache: {summary['cache_hits']} ({summary['cache_hits'] / summary['unique']:.0%})")
+    if 'chunks' in summary:
+        print(f"-> Przetworzono strumieniowo w {summary['chunks']} porcjach")
+    print(f"-> Zapisano: {args.output}")
+    if 'final_rows' in summary:
+        print(f"-> Plik finalny: {args.final} ({summary['final_rows']} wierszy z category_id)")
+    elif args.final:
+        print("-> Plik finalny pominięty: brak kolumny z identyfikatorami (id)")
+    if args.suggest:
+        print("-> Podpowiedzi słów kluczowych (nowo pokryte / wszystkie wiersze):")
+        for keyword, new_rows, total in suggestions:
+            print(f"   {new_rows:>8} / {total:<8} {keyword}")
+    if args.analyze:
+        print("\n".join(report_lines(analysis, snapshot.rules)))
+    if args.prune_rules:
+        print(f"-> Reguły po odchudzeniu: {len(pruned)} z {len(snapshot.rules)}, zapisano: {args.prune_rules}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
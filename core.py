@@ -0,0 +1,1311 @@
+"""Matching and I/O core shared by the GUI (main.py) and the command line (cli.py)."""
+import os
+import re
+import sys
+import copy
+import bisect
+import functools
+import glob
+import contextlib
+import json
+import time
+import pickle
+import hashlib
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from matcher import MATCHER_VERSION, AhoCorasick, TokenMatcher
+from rulestore import RuleStore
+
+try:
+    import pyarrow  # noqa: F401 - optional, enables the Feather sidecar of InputCache (pickle otherwise)
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    import python_calamine  # noqa: F401 - optional, a much faster Excel reader than openpyxl
+    HAS_CALAMINE = True
+except ImportError:
+    HAS_CALAMINE = False
+
+try:
+    import xlsxwriter  # noqa: F401 - optional, a faster xlsx writer than openpyxl
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+
+
+# Pliki konfiguracyjne obok skryptu
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RULES_FILE = os.path.join(BASE_DIR, 'rules.json')
+CATEGORIES_FILE = os.path.join(BASE_DIR, 'categories.json')
+# Kopie sparsowanych plików wejściowych (Feather albo pickle), żeby nie parsować Excela ponownie
+INPUT_CACHE_DIR = os.path.join(BASE_DIR, '.cache', 'inputs')
+# Najwięcej plików i bajtów w INPUT_CACHE_DIR; najdawniej używane pliki są usuwane
+INPUT_CACHE_FILES = 8
+INPUT_CACHE_BYTES = 2 * 1024 ** 3
+# Zapamiętane wyniki dopasowania tytułów między uruchomieniami GUI
+TITLE_CACHE_FILE = os.path.join(BASE_DIR, '.cache', 'titles.pkl')
+# Raporty wydajności (JSON, jeden na uruchomienie) i opcjonalne zrzuty cProfile
+REPORTS_DIR = os.path.join(BASE_DIR, 'reports')
+# Najwięcej plików w REPORTS_DIR; najstarsze są usuwane
+REPORTS_MAX_FILES = 200
+# Silniki Excela: szybsze, jeśli są zainstalowane, inaczej domyślne pandas (openpyxl)
+EXCEL_ENGINE = 'calamine' if HAS_CALAMINE else None
+EXCEL_WRITER = 'xlsxwriter' if HAS_XLSXWRITER else None
+# Wersja normalizacji zapisana w skompilowanym cache reguł - podbić przy każdej zmianie normalize_text
+NORMALIZER_VERSION = 1
+
+
+def rule_store(path=None):
+    """RuleStore for a rules file (rules.json plus its change log), normalizing keywords on read."""
+    return RuleStore(path or RULES_FILE, normalize_text)
+
+
+def load_rules(path=None):
+    """Rules as (normalized keyword, category) pairs; [] when there is no rules file yet.
+
+    A rules file that exists but cannot be read raises OSError rather than
+    passing for an empty rule list.
+    """
+    return rule_store(path).read()
+
+
+def _rules_changed(action):
+    """Run a write to the rule store; True on success. Compiled rule sets go stale either way."""
+    global _rules_generation
+    try:
+        action()
+        return True
+    except Exception:
+        return False
+    finally:
+        # any write (even a partial one) makes compiled rule sets stale
+        _rules_generation += 1
+
+
+def save_rules(rules, path=None):
+    """Replace the whole rule list (written atomically; the change log is dropped)."""
+    return _rules_changed(lambda: rule_store(path).replace_all(rules))
+
+
+def add_rule(keyword, category, path=None):
+    """Put a rule first; only one line is appended to the change log."""
+    return _rules_changed(lambda: rule_store(path).add(keyword, category))
+
+
+def delete_rule(keyword, category, path=None):
+    """Remove the first rule with this keyword and category; appended to the change log."""
+    return _rules_changed(lambda: rule_store(path).delete(keyword, category))
+
+
+def compact_rules(path=None):
+    """Fold the change log into rules.json."""
+    return _rules_changed(lambda: rule_store(path).compact())
+
+
+def export_rules(dest, path=None):
+    """Write the current rules to dest as a [keyword, category] JSON list; returns the number of rules."""
+    return rule_store(path).export(dest)
+
+
+def load_categories(path=None):
+    path = path or CATEGORIES_FILE
+    try:
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _normalize_text_slow(s):
+    """Reference normalization (full NFKD); used for characters outside the translation table."""
+    # lower
+    s = s.lower()
+    # normalize unicode (remove accents)
+    s = unicodedata.normalize('NFKD', s)
+    s = ''.join(ch for ch in s if not unicodedata.combining(ch))
+    # replace any non-alphanumeric character with space
+    s = re.sub(r'[^0-9a-z]+', ' ', s)
+    # collapse whitespace
+    s = re.sub(r'\s+', ' ', s).strip()
+    return s
+
+
+# Znaki poniżej tej granicy (ASCII, Latin-1, Latin Extended-A/B) normalizujemy tablicą translacji
+_FAST_LIMIT = '\u0250'
+
+
+def _char_translation(ch):
+    """What normalize_text turns a single character into, before spaces are collapsed."""
+    s = unicodedata.normalize('NFKD', ch.lower())
+    s = ''.join(c for c in s if not unicodedata.combining(c))
+    return ''.join(c if ('0' <= c <= '9' or 'a' <= c <= 'z') else ' ' for c in s)
+
+
+_FAST_TABLE = {cp: _char_translation(chr(cp)) for cp in range(ord(_FAST_LIMIT))}
+
+
+@functools.lru_cache(maxsize=65536)
+def _normalize_str(s):
+    # lower/NFKD/combining removal act per character in this range, so a lookup table is exact
+    if s.isascii() or max(s) < _FAST_LIMIT:
+        return ' '.join(s.translate(_FAST_TABLE).split())
+    return _normalize_text_slow(s)
+
+
+def normalize_text(s: str) -> str:
+    """Normalize text for matching: lower, remove diacritics, replace non-alnum with spaces, collapse spaces."""
+    if not isinstance(s, str):
+        return ""
+    return _normalize_str(s)
+
+
+_combining_table = None
+
+
+def _combining_translation():
+    """str.translate table deleting every combining code point (what normalize_text drops after NFKD)."""
+    global _combining_table
+    if _combining_table is None:
+        _combining_table = {cp: None for cp in range(sys.maxunicode + 1) if unicodedata.combining(chr(cp))}
+    return _combining_table
+
+
+def normalize_series(titles):
+    """Vectorized normalize_text over a Series using pandas string methods.
+
+    Non-string entries come back as NaN (normalize_text returns "" for them,
+    but znajdz_kategorie treats them as "no title" rather than "no match").
+    """
+    try:
+        # object dtype keeps Python's str/re semantics (Arrow-backed strings use RE2 and ICU case rules)
+        s = titles.astype(object)
+        slow = s.str.contains(r'[^\x00-\u024f]', regex=True).fillna(False).astype(bool)
+    except AttributeError:
+        # numeric/datetime column - nothing to match
+        return pd.Series(np.nan, index=titles.index, dtype=object)
+    out = s.str.translate(_FAST_TABLE).str.replace(r' {2,}', ' ', regex=True)
+    if slow.any():
+        # characters beyond the table need the full lower/NFKD/combining pipeline
+        rest = s[slow].str.lower().str.normalize('NFKD').str.translate(_combining_translation())
+        out[slow] = rest.str.replace(r'[^0-9a-z]+', ' ', regex=True)
+    return out.str.strip()
+
+
+# Specjalne wartości indeksu zwycięskiej reguły
+NO_MATCH = -1  # tytuł bez pasującej reguły
+NO_TITLE = -2  # brak tytułu (pusta komórka, liczba...)
+
+# Ile pierwszych reguł dopasowywać hurtowo; resztę wierszy kończy automat Aho-Corasick
+BULK_RULES = 256
+
+
+def _join_rows(values, pad=''):
+    """Join rows into one newline-separated text plus the start offset of every row (and a sentinel).
+
+    pad is put around every row; with pad=' ' searching for ' keyword ' finds whole-token matches.
+    """
+    text = pad + f'{pad}\n{pad}'.join(values) + pad + '\n' if len(values) else ''
+    lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values)) + 1 + 2 * len(pad)
+    starts = np.concatenate(([0], np.cumsum(lengths))).tolist()
+    return text, starts
+
+
+def _rows_containing(text, starts, slowo_klucz):
+    """Row numbers whose text contains the keyword, found by C-level str.find over the joined text."""
+    if not slowo_klucz:
+        return np.arange(len(starts) - 1)
+    found = []
+    i = text.find(slowo_klucz)
+    while i >= 0:
+        row = bisect.bisect_right(starts, i) - 1
+        found.append(row)
+        # one hit per row is enough - continue from the next row
+        i = text.find(slowo_klucz, starts[row + 1])
+    return np.array(found, dtype=np.int64)
+
+
+def match_series(norm, rule_set):
+    """Winning rule index per row (NO_MATCH / NO_TITLE otherwise) using priority-masked bulk assignment.
+
+    Rules are applied in list order, each one only to the rows no earlier rule
+    has claimed, so the first rule in the list wins just like in RuleSet.match.
+    Rules shadowed by an earlier one (see RuleSet.shadowed_by) are skipped.
+    Past BULK_RULES rules a pass per rule costs more than one automaton pass
+    per row, so the still unclaimed rows are finished by rule_set.matcher.
+    In token mode rows and keywords are padded with spaces so only whole
+    tokens match, the same as TokenMatcher.
+    """
+    rules = rule_set.rules
+    pad = ' ' if rule_set.token else ''
+    values = norm.to_numpy(dtype=object)
+    valid = norm.notna().to_numpy()
+    winners = np.where(valid, NO_MATCH, NO_TITLE).astype(np.int32)
+    pos = np.flatnonzero(valid)
+    text, starts = _join_rows(values[pos], pad)
+    claimed = np.zeros(len(pos), dtype=bool)
+    for idx in rule_set.bulk_rules:
+        if not len(pos):
+            break
+        slowo_klucz = rules[idx][0]
+        hits = _rows_containing(text, starts, pad + slowo_klucz + pad)
+        hits = hits[~claimed[hits]]
+        if not len(hits):
+            continue
+        winners[pos[hits]] = idx
+        claimed[hits] = True
+        # drop claimed rows from the search text once they are the majority
+        if claimed.sum() * 2 > len(pos):
+            pos = pos[~claimed]
+            text, starts = _join_rows(values[pos], pad)
+            claimed = np.zeros(len(pos), dtype=bool)
+    rest = pos[~claimed]
+    if len(rules) > BULK_RULES and len(rest):
+        # none of the bulk rules matched these rows, so the automaton's winner is the overall winner
+        first_match = rule_set.matcher.first_match
+        winners[rest] = [first_match(t) for t in values[rest]]
+    return winners
+
+
+def match_series_counts(norm, rule_set):
+    """(winners, number of rules matching) per row, both from one matcher pass over each title.
+
+    Slower than match_series, which stops looking once a rule has won, so it
+    is only used when the counts are wanted. Rows without a title get
+    NO_TITLE and 0.
+    """
+    values = norm.to_numpy(dtype=object)
+    winners = np.full(len(values), NO_TITLE, dtype=np.int32)
+    counts = np.zeros(len(values), dtype=np.int32)
+    pos = np.flatnonzero(norm.notna().to_numpy())
+    if len(pos):
+        match_count = rule_set.matcher.match_count
+        found = np.array([match_count(t) for t in values[pos]], dtype=np.int32).reshape(-1, 2)
+        winners[pos] = found[:, 0]
+        counts[pos] = found[:, 1]
+    return winners, counts
+
+
+def match_unique(titles, rule_set, cache=None, stats=None, return_counts=False):
+    """normalize_series + match_series done once per distinct title and broadcast back to the rows.
+
+    Raw titles are deduplicated before normalization and normalized ones
+    before matching. With a TitleCache, normalized titles it already knows
+    for these rules are not matched at all. stats, if given, is a dict whose
+    'rows', 'unique' and 'cache_hits' counters are increased, and whose
+    'normalize_s' / 'match_s' add up the seconds spent in each half; a set
+    under stats['seen'] collects the distinct normalized titles. With
+    return_counts a third array holds the number of rules matching each row
+    (match_series_counts; the cache, which only knows winners, is not used).
+    """
+    t0 = time.perf_counter()
+    codes, uniques = pd.factorize(titles.astype(object))
+    norm_u = normalize_series(pd.Series(uniques, dtype=object))
+    norm_codes, norm_uniques = pd.factorize(norm_u)
+    t1 = time.perf_counter()
+    norm_uniques = pd.Series(norm_uniques, dtype=object)
+    hits = 0
+    if return_counts:
+        winners_uu, counts_uu = match_series_counts(norm_uniques, rule_set)
+    elif cache is not None:
+        winners_uu = cache.lookup(rule_set.rules, norm_uniques.to_numpy(), rule_set.token)
+        missing = np.flatnonzero(winners_uu == TitleCache.MISS)
+        hits = len(winners_uu) - len(missing)
+        if len(missing):
+            found = match_series(norm_uniques.iloc[missing], rule_set)
+            winners_uu[missing] = found
+            cache.store(norm_uniques.to_numpy()[missing], found)
+    else:
+        winners_uu = match_series(norm_uniques, rule_set)
+    # code -1 (missing title, or a title that normalizes to NaN) picks the appended NaN / NO_TITLE
+    winners_u = np.append(winners_uu, NO_TITLE).astype(np.int32)[norm_codes]
+    norm_values = np.append(norm_u.to_numpy(dtype=object), np.nan)[codes]
+    winners = np.append(winners_u, NO_TITLE).astype(np.int32)[codes]
+    if stats is not None:
+        stats['rows'] = stats.get('rows', 0) + len(titles)
+        stats['unique'] = stats.get('unique', 0) + len(norm_uniques)
+        stats['cache_hits'] = stats.get('cache_hits', 0) + hits
+        stats['normalize_s'] = stats.get('normalize_s', 0.0) + (t1 - t0)
+        stats['match_s'] = stats.get('match_s', 0.0) + (time.perf_counter() - t1)
+        if 'seen' in stats:
+            stats['seen'].update(norm_uniques.tolist())
+    norm = pd.Series(norm_values, index=titles.index, dtype=object)
+    if return_counts:
+        counts = np.append(np.append(counts_uu, 0).astype(np.int32)[norm_codes], 0).astype(np.int32)[codes]
+        return norm, winners, counts
+    return norm, winners
+
+
+def _count_distinct(stats, unique):
+    """Turn 'unique' and 'cache_hits' summed over several match_unique calls into counts over all their titles.
+
+    unique is the number of distinct normalized titles over all the calls. A
+    title repeated across calls counts once, and as a cache hit only if no
+    call had to match it, i.e. the cache knew it before the first call.
+    """
+    matched = stats['unique'] - stats['cache_hits']
+    stats['unique'] = unique
+    stats['cache_hits'] = max(unique - matched, 0)
+    return stats
+
+
+# Co ile wierszy raportować postęp i sprawdzać anulowanie
+PROGRESS_STEP = 50_000
+
+
+class Cancelled(Exception):
+    """Raised inside a long-running job when its cancel event is set."""
+
+
+def match_titles(titles, rule_set=None, progress=None, cancel=None, step=PROGRESS_STEP, cache=None, stats=None,
+                 return_counts=False):
+    """Normalize and match a column; returns (normalized titles, winning rule index per row).
+
+    With progress (called as progress(done, total)) or cancel (a
+    threading.Event) the column is processed in slices of step rows and a set
+    cancel raises Cancelled between slices. cache, stats and return_counts
+    are passed on to match_unique; with return_counts the per-row number of
+    matching rules is returned as a third item. In slices, stats still counts
+    'unique' and 'cache_hits' over the whole column, not once per slice.
+    """
+    rule_set = rule_set or RULE_SET
+    if (progress is None and cancel is None) or len(titles) <= step:
+        if cancel is not None and cancel.is_set():
+            raise Cancelled()
+        result = match_unique(titles, rule_set, cache, stats, return_counts)
+        if progress is not None:
+            progress(len(titles), len(titles))
+        return result
+    # every slice must see the same rules even if rules.json changes meanwhile
+    rule_set = rule_set.snapshot()
+    total = len(titles)
+    parts = []
+    part_stats = None
+    if stats is not None:
+        part_stats = {'seen': stats['seen']} if 'seen' in stats else {}
+    for start in range(0, total, step):
+        if cancel is not None and cancel.is_set():
+            raise Cancelled()
+        if progress is not None:
+            progress(start, total)
+        parts.append(match_unique(titles.iloc[start:start + step], rule_set, cache, part_stats, return_counts))
+    if progress is not None:
+        progress(total, total)
+    norm = pd.concat([p[0] for p in parts])
+    if stats is not None:
+        _count_distinct(part_stats, int(norm.nunique()))
+        for key, value in part_stats.items():
+            if key != 'seen':
+                stats[key] = stats.get(key, 0) + value
+    arrays = (np.concatenate([p[k] for p in parts]) for k in range(1, len(parts[0])))
+    return (norm, *arrays)
+
+
+def categories_from_winners(winners, rules, kategorie=None, index=None):
+    """Turn per-row winning rule indices into (Category, Category Id) Series."""
+    kategorie = KATEGORIE_BAZA if kategorie is None else kategorie
+    # per-rule lookup tables; NO_TITLE (-2) picks the trailing None, NO_MATCH (-1) the trailing ""
+    cat_table = np.array([c for _, c in rules] + [None, ""], dtype=object)
+    # map ids once per rule, not per row (a Series.map over rows would upcast int ids to float)
+    id_table = np.array([kategorie.get(c, "") if c else "" for c in cat_table[:-2]] + [None, ""], dtype=object)
+    cats = pd.Series(cat_table[winners], index=index, dtype=object)
+    ids = pd.Series(id_table[winners], index=index, dtype=object)
+    return cats, ids
+
+
+def provenance_columns(winners, rules, counts=None, index=None):
+    """Which rule categorized each row, as {'Rule Index': ..., 'Rule Keyword': ...} Series.
+
+    Rule Index is the winner's position in rules (int32; NO_MATCH or
+    NO_TITLE otherwise). Rule Keyword is categorical: each row holds an
+    integer code into the table of distinct keywords instead of its own
+    string. counts (from return_counts=True) adds Rule Matches, the number
+    of rules whose keyword the title contains.
+    """
+    winners = np.asarray(winners, dtype=np.int32)
+    kw_codes, keywords = pd.factorize(pd.Series([k for k, _ in rules], dtype=object))
+    # NO_MATCH / NO_TITLE pick the trailing -1, i.e. no keyword
+    codes = np.append(kw_codes, -1)[np.where(winners >= 0, winners, len(rules))]
+    columns = {
+        'Rule Index': pd.Series(winners, index=index),
+        'Rule Keyword': pd.Series(pd.Categorical.from_codes(codes, categories=keywords), index=index),
+    }
+    if counts is not None:
+        columns['Rule Matches'] = pd.Series(np.asarray(counts, dtype=np.int32), index=index)
+    return columns
+
+
+def categorize_series(titles, rule_set=None, kategorie=None, cache=None, stats=None):
+    """Categorize a whole column at once.
+
+    Returns (Category, Category Id) Series aligned with titles, with the same
+    values znajdz_kategorie would give row by row.
+    """
+    rule_set = rule_set or RULE_SET
+    _, winners = match_titles(titles, rule_set, cache=cache, stats=stats)
+    return categories_from_winners(winners, rule_set.rules, kategorie, index=titles.index)
+
+
+def rematch_incremental(norm, winners, old_rules, rule_set=None):
+    """Update per-row winners after a single rule change instead of re-matching every row.
+
+    Handles the two edits the GUI makes: a rule inserted at index 0 (only rows
+    containing its keyword can change, the rest shift by one) and a single
+    rule removed (only rows it had won are matched again). Returns the new
+    winners array, or None when rule_set differs from old_rules in any other
+    way and a full re-match is needed. The returned winners index
+    rule_set.rules, so pass a snapshot() and keep its rules with them; a live
+    RuleSet may reload between two reads when someone else edits the rules.
+    """
+    # a no-op for a snapshot; otherwise rules and matcher below still come from one load
+    rule_set = (rule_set or RULE_SET).snapshot()
+    new_rules = rule_set.rules
+    if new_rules == old_rules:
+        return winners
+    if len(new_rules) == len(old_rules) + 1 and new_rules[1:] == old_rules:
+        updated = np.where(winners >= 0, winners + 1, winners).astype(np.int32)
+        pos = np.flatnonzero(norm.notna().to_numpy())
+        pad = ' ' if rule_set.token else ''
+        slowo_klucz = new_rules[0][0]
+        if pad and not slowo_klucz:
+            return updated
+        text, starts = _join_rows(norm.to_numpy(dtype=object)[pos], pad)
+        updated[pos[_rows_containing(text, starts, pad + slowo_klucz + pad)]] = 0
+        return updated
+    if len(new_rules) == len(old_rules) - 1:
+        k = next((i for i, (a, b) in enumerate(zip(new_rules, old_rules)) if a != b), len(new_rules))
+        if new_rules[k:] != old_rules[k + 1:]:
+            return None
+        affected = np.flatnonzero(winners == k)
+        updated = np.where(winners > k, winners - 1, winners).astype(np.int32)
+        if len(affected):
+            first_match = rule_set.matcher.first_match
+            updated[affected] = [first_match(t) for t in norm.to_numpy(dtype=object)[affected]]
+        return updated
+    return None
+
+
+# Licznik zapisów reguł - RuleSet przeładowuje się, gdy się zmieni
+_rules_generation = 0
+
+
+class RuleSet:
+    """Rules loaded and normalized once, shared by all matching calls.
+
+    The compiled list is reloaded only when save_rules()/add_rule()/
+    delete_rule() write or when the mtime/size of the file or its change log
+    changes on disk (another editor, or a hand edit). Normalized rules
+    and the automaton are also pickled next to the rules file (see
+    compiled_path), keyed by a hash of the file content, NORMALIZER_VERSION
+    and MATCHER_VERSION, so a cold start with unchanged rules is one read.
+
+    With token=True keywords match only whole normalized tokens (see
+    TokenMatcher) instead of any substring; rule priority is unchanged.
+
+    A rules file that exists but cannot be read raises OSError on the first
+    load; after that the rules loaded before stay in use until a read works.
+    """
+
+    def __init__(self, path=None, token=False):
+        self.path = path or RULES_FILE
+        self.token = token
+        self._rules = None
+        self._matcher = None
+        self._bulk = None
+        self._stamp = None
+        self._generation = None
+        self._key = None
+        self.loads = 0
+        self.cache_hits = 0
+        self.frozen = False
+
+    @property
+    def compiled_path(self):
+        """Compiled cache file: rules.json -> rules.compiled.pkl (rules.tokens.compiled.pkl) in the same directory."""
+        return os.path.splitext(self.path)[0] + ('.tokens' if self.token else '') + '.compiled.pkl'
+
+    def _file_stamp(self):
+        stamp = []
+        for path in (self.path, self.path + '.log'):
+            try:
+                st = os.stat(path)
+                stamp.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def invalidate(self):
+        self._rules = None
+        self._matcher = None
+        self._bulk = None
+
+    def set_token(self, token):
+        """Switch between substring and whole-token matching; the next use recompiles."""
+        if token != self.token:
+            self.token = token
+            self.invalidate()
+
+    def _load(self):
+        """Read the rules file and its change log once: take rules and automaton from the compiled cache when its key matches."""
+        store = rule_store(self.path)
+        # OSError propagates: an unreadable rules file is not an empty one
+        base, log = store.read_bytes()
+        if not base and not log:
+            self._key = None
+            return ()
+        self._key = hashlib.sha1(base + b'\0' + log + b'\0' + f"{NORMALIZER_VERSION}:{MATCHER_VERSION}:{self.token}".encode()).hexdigest()
+        try:
+            with open(self.compiled_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached['key'] == self._key:
+                self._matcher = cached['matcher']
+                self.cache_hits += 1
+                return cached['rules']
+        except Exception:
+            # missing, stale format or unreadable: compile from JSON
+            pass
+        return tuple(store.parse(base, log))
+
+    def _write_compiled(self):
+        if self._key is None:
+            return
+        tmp = self.compiled_path + '.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                pickle.dump({'key': self._key, 'rules': self._rules, 'matcher': self._matcher}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.compiled_path)
+        except OSError:
+            # the cache is only a speed-up; a read-only directory just means compiling every start
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    @property
+    def rules(self):
+        """Tuple of (normalized keyword, category) pairs in priority order."""
+        if self.frozen:
+            return self._rules
+        stamp = self._file_stamp()
+        if self._rules is None or stamp != self._stamp or self._generation != _rules_generation:
+            matcher, bulk = self._matcher, self._bulk
+            self._matcher = None
+            self._bulk = None
+            try:
+                self._rules = self._load()
+            except OSError:
+                if self._rules is None:
+                    raise
+                # keep matching with the rules loaded before; the next use tries to read again
+                self._matcher, self._bulk = matcher, bulk
+                return self._rules
+            self._stamp = stamp
+            self._generation = _rules_generation
+            self.loads += 1
+        return self._rules
+
+    @property
+    def matcher(self):
+        """Aho-Corasick automaton (TokenMatcher in token mode) over all keywords, built once per loaded rule list."""
+        rules = self.rules
+        if self._matcher is None:
+            self._matcher = (TokenMatcher if self.token else AhoCorasick)([k for k, _ in rules])
+            self._write_compiled()
+        return self._matcher
+
+    def shadowed_by(self, limit=None):
+        """Per rule, the earliest rule whose keyword occurs in its keyword (as whole tokens in token mode).
+
+        A rule whose entry is lower than its own index can never win: every
+        title containing its keyword also contains the earlier one (a
+        repeated keyword is the simplest case). -1 marks a keyword that can
+        match nothing (an empty one in token mode). With limit only the
+        first limit rules are checked.
+        """
+        first_match = self.matcher.first_match
+        return np.array([first_match(k) for k, _ in self.rules[:limit]], dtype=np.int32)
+
+    @property
+    def bulk_rules(self):
+        """Indices among the first BULK_RULES rules that can win, i.e. the ones match_series scans one by one."""
+        _ = self.rules
+        if self._bulk is None:
+            shadow = self.shadowed_by(BULK_RULES)
+            self._bulk = np.flatnonzero(shadow == np.arange(len(shadow))).tolist()
+        return self._bulk
+
+    def snapshot(self):
+        """Frozen copy of the current rules and automaton that never reloads; cheap to hand to worker processes."""
+        _ = self.bulk_rules
+        frozen = copy.copy(self)
+        frozen.frozen = True
+        return frozen
+
+    def match_index(self, tytul_norm):
+        """Index of the winning rule for a normalized title, or -1 if nothing matches."""
+        return self.matcher.first_match(tytul_norm)
+
+    def match(self, tytul_norm):
+        """Return the category of the first rule whose keyword occurs in the normalized title (as whole tokens in token mode), or ""."""
+        idx = self.match_index(tytul_norm)
+        return self._rules[idx][1] if idx >= 0 else ""
+
+
+class CategoryIndex:
+    """Category names prepared once for type-ahead filtering.
+
+    Names are kept sorted with their normalized form and a trigram index
+    (trigram -> ascending positions), so a query only checks names that
+    contain its rarest trigram. The full hit list of the last query is kept:
+    when the user types more characters the new query contains the old one,
+    and only those hits need checking again.
+    """
+
+    def __init__(self, names):
+        self.names = sorted(names)
+        self.norm = [normalize_text(n) for n in self.names]
+        trigrams = {}
+        for i, s in enumerate(self.norm):
+            for g in {s[j:j + 3] for j in range(len(s) - 2)}:
+                trigrams.setdefault(g, []).append(i)
+        self._trigrams = trigrams
+        self._last_query = ""
+        self._last_hits = range(len(self.names))
+
+    def _hits(self, query):
+        if not query:
+            return range(len(self.names))
+        if self._last_query in query:
+            candidates = self._last_hits
+        elif len(query) >= 3:
+            candidates = min((self._trigrams.get(query[j:j + 3], ()) for j in range(len(query) - 2)), key=len)
+        else:
+            candidates = range(len(self.names))
+        norm = self.norm
+        return [i for i in candidates if query in norm[i]]
+
+    def search(self, typed, limit=None):
+        """Sorted names whose normalized form contains normalize_text(typed), at most limit of them."""
+        query = normalize_text(typed)
+        hits = self._hits(query)
+        self._last_query, self._last_hits = query, hits
+        if limit is not None:
+            hits = hits[:limit]
+        return [self.names[i] for i in hits]
+
+
+# Załaduj mapę kategorii
+KATEGORIE_BAZA = load_categories()
+# Wspólny, skompilowany zestaw reguł dla całej aplikacji
+RULE_SET = RuleSet()
+
+
+def read_input(path, columns=None, engine=None):
+    """Read an input feed into a DataFrame, choosing the format by extension.
+
+    .csv, .parquet and .feather are read directly; anything else is Excel
+    (engine defaults to EXCEL_ENGINE) with a csv fallback. With columns only
+    those of them present in the file are parsed.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    wanted = set(columns) if columns is not None else None
+    usecols = (lambda c: c in wanted) if wanted is not None else None
+    if ext == '.csv':
+        return pd.read_csv(path, usecols=usecols)
+    if ext in ('.parquet', '.feather'):
+        return _read_columnar(path, ext, columns)
+    try:
+        return pd.read_excel(path, engine=engine or EXCEL_ENGINE, usecols=usecols)
+    except Exception:
+        return pd.read_csv(path, usecols=usecols)
+
+
+def _read_columnar(path, ext, columns):
+    if columns is not None:
+        # Arrow refuses unknown column names, so keep only the ones in the file's schema
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if ext == '.parquet':
+            names = pq.read_schema(path).names
+        else:
+            with pa.memory_map(path) as source:
+                names = pa.ipc.open_file(source).schema.names
+        wanted = set(columns)
+        columns = [c for c in names if c in wanted]
+    if ext == '.parquet':
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_feather(path, columns=columns)
+
+
+def find_id_column(columns):
+    """Name of the offer id column ('id', 'ID', 'item_id'...), or None."""
+    for c in ('id', 'ID', 'Id', 'item_id', 'ItemId', 'itemId'):
+        if c in columns:
+            return c
+    for c in columns:
+        if str(c).strip().lower() == 'id':
+            return c
+    return None
+
+
+def find_category_id_column(columns):
+    """Name of the category id column ('Category Id', 'category_id'...), or None."""
+    for c in ('Category Id', 'CategoryId', 'category_id', 'category id', 'Category_ID', 'categoryId'):
+        if c in columns:
+            return c
+    for c in columns:
+        name = str(c).strip().lower()
+        if name.replace(' ', '_') == 'category_id' or name.replace(' ', '') == 'categoryid':
+            return c
+    return None
+
+
+def _as_ids(col):
+    """col as nullable numbers (blanks become NA) if every non-blank value is numeric, otherwise None."""
+    if pd.api.types.is_numeric_dtype(col):
+        return col
+    # an id column holds few distinct values: convert those and broadcast them back
+    codes, uniques = pd.factorize(col)
+    num = pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce')
+    # only values that failed conversion need a look: blank strings are fine, anything else is not an id
+    failed = uniques[num.isna().to_numpy()]
+    if len(failed) and pd.Series(failed, dtype=object).astype(str).str.strip().ne('').any():
+        return None
+    if num.notna().any() and (num.dropna() % 1 == 0).all():
+        num = num.astype('Int64')
+    # code -1 (missing value) is not a label of num, so reindexing gives NA there
+    return pd.Series(num.reindex(codes).array, index=col.index)
+
+
+def final_frame(df, kategorie=None):
+    """The final (id, category_id) frame, keeping only rows that have a category id.
+
+    Works on the two columns alone (df is not copied) and filters with the
+    null mask of numeric ids. Ids come from a category id column or, without
+    one, from the Category names via kategorie. Returns (frame, skipped rows);
+    raises ValueError when df has no id column.
+    """
+    id_col = find_id_column(df.columns)
+    if id_col is None:
+        raise ValueError("Nie znaleziono kolumny z identyfikatorami (id) w danych wejściowych.")
+    catid_col = find_category_id_column(df.columns)
+    if catid_col is not None:
+        cat_ids = df[catid_col]
+    elif 'Category' in df.columns:
+        cat_ids = df['Category'].map(KATEGORIE_BAZA if kategorie is None else kategorie)
+    else:
+        cat_ids = pd.Series(np.nan, index=df.index)
+    ids = _as_ids(cat_ids)
+    if ids is None:
+        # category ids that are not numbers: fall back to a blank check on their text
+        ids = cat_ids
+        mask = (cat_ids.notna() & cat_ids.astype(str).str.strip().ne('')).to_numpy()
+    else:
+        mask = ids.notna().to_numpy()
+    final = pd.DataFrame({
+        'id': df[id_col][mask].reset_index(drop=True),
+        'category_id': ids[mask].reset_index(drop=True),
+    })
+    return final, len(df) - len(final)
+
+
+def final_path_for(sciezka_wyjsciowa):
+    """Where the final file goes next to an output file: out.xlsx -> out_final.xlsx."""
+    stem, ext = os.path.splitext(sciezka_wyjsciowa)
+    return f"{stem}_final{ext}"
+
+
+def unmatched_view(df, collapse=False, norm=None):
+    """Unmatched titles as display lines, selected with a boolean mask on Category.
+
+    With collapse, titles that normalize to the same text are merged into one
+    'count× title' line (first spelling seen), biggest clusters first. norm
+    may pass already normalized titles aligned with df to skip normalization.
+    """
+    mask = ~df['Category'].astype(object).fillna('').astype(bool).to_numpy()
+    titles = df['Title'].astype(object)[mask].map(str).to_numpy()
+    if not collapse:
+        return titles.tolist()
+    keys = norm[mask] if norm is not None else normalize_series(df['Title'][mask])
+    codes, _ = pd.factorize(keys.fillna(''))
+    counts = np.bincount(codes)
+    # factorize numbers keys by first appearance, so this is the first row of every cluster
+    first = np.unique(codes, return_index=True)[1]
+    order = np.argsort(-counts, kind='stable')
+    return [f"{counts[k]}× {titles[first[k]]}" for k in order]
+
+
+def write_output(df, path):
+    """Write a frame as csv, parquet, feather or xlsx depending on the extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        df.to_csv(path, index=False, sep=',')
+    elif ext == '.parquet':
+        _arrow_safe(df).to_parquet(path, index=False)
+    elif ext == '.feather':
+        _arrow_safe(df).to_feather(path)
+    else:
+        df.to_excel(path, index=False, engine=EXCEL_WRITER)
+
+
+def _arrow_safe(df):
+    """Copy of df that Arrow can store: string column names, default index, no mixed-type object columns.
+
+    Ids mixed with "" (Category Id of unmatched rows) become nullable numbers,
+    any other mixed column becomes text.
+    """
+    out = df.reset_index(drop=True)
+    out.columns = [str(c) for c in out.columns]
+    for c in out.columns[(out.dtypes == object).to_numpy()]:
+        col = out[c]
+        if not pd.api.types.infer_dtype(col, skipna=True).startswith('mixed'):
+            continue
+        ids = _as_ids(col)
+        out[c] = ids if ids is not None else col.where(col.isna(), col.astype(str))
+    return out
+
+
+class InputCache:
+    """Parsed input frames keyed by (path, mtime, size).
+
+    Frames stay in memory for the last few inputs and are also stored as a
+    sidecar in cache_dir, so opening the same feed in a later session skips
+    Excel/CSV parsing entirely. The sidecar is Feather when pyarrow is
+    installed and can hold the frame, and a pickle otherwise (e.g. Excel
+    id/EAN columns mixing numbers and text). A changed file (different mtime
+    or size) is simply a different key. cache_dir keeps at most max_files
+    sidecars and max_bytes in total; the least recently used go first.
+    """
+
+    SIDECAR_EXTENSIONS = ('.feather', '.pkl')
+
+    def __init__(self, cache_dir=None, max_entries=2, max_files=INPUT_CACHE_FILES, max_bytes=INPUT_CACHE_BYTES):
+        self.cache_dir = cache_dir or INPUT_CACHE_DIR
+        self.max_entries = max_entries
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self.last_source = None
+        self.last_key = None
+
+    def key(self, path):
+        """(absolute path, mtime_ns, size) of path as it is on disk now: the key its frame is cached under."""
+        st = os.stat(path)
+        return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+    def _sidecar(self, key):
+        """(sidecar path without extension, prefix shared by all versions of the file)."""
+        prefix = hashlib.sha1(key[0].encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{prefix}-{key[1]}-{key[2]}"), prefix
+
+    def _has_sidecar(self, key):
+        base, _ = self._sidecar(key)
+        return any(os.path.exists(base + ext) for ext in self.SIDECAR_EXTENSIONS)
+
+    def read(self, path, columns=None):
+        """Return the parsed frame (only `columns` if given); source and key are recorded in last_source and last_key."""
+        key = self.key(path)
+        self.last_key = key
+        df, complete = self._frames.get(key, (None, False))
+        if df is not None and (complete or (columns is not None and set(columns) <= set(df.columns))):
+            self._frames.move_to_end(key)
+            self.last_source = 'memory'
+        else:
+            df = self._read_sidecar(key, columns)
+            if df is not None:
+                self.last_source = 'sidecar'
+                self._remember(key, df, columns is None)
+            else:
+                # a partial read parses only the requested columns; the sidecar is kept for full frames
+                df = read_input(path, columns)
+                self.last_source = 'parsed'
+                if columns is None:
+                    self._write_sidecar(key, df)
+                self._remember(key, df, columns is None)
+        if columns is not None:
+            df = df[[c for c in columns if c in df.columns]]
+        # shallow copy: callers may add columns without touching the cached frame
+        return df.copy(deep=False)
+
+    def keep_only(self, path, columns):
+        """Drop every other column of the in-memory copy, e.g. once the full frame has been written out.
+
+        Only when a sidecar holds the full frame: without one the next full
+        read would parse the file again, so the frame stays whole in memory.
+        """
+        try:
+            key = self.key(path)
+        except OSError:
+            return
+        df, _ = self._frames.get(key, (None, False))
+        if df is not None and self._has_sidecar(key):
+            self._frames[key] = (df[[c for c in columns if c in df.columns]].copy(), False)
+
+    def _remember(self, key, df, complete):
+        # one entry per path: an older version of the same file is never read again
+        for old in [k for k in self._frames if k[0] == key[0]]:
+            del self._frames[old]
+        self._frames[key] = (df, complete)
+        while len(self._frames) > self.max_entries:
+            self._frames.popitem(last=False)
+
+    def _read_sidecar(self, key, columns):
+        base, _ = self._sidecar(key)
+        for ext in self.SIDECAR_EXTENSIONS:
+            path = base + ext
+            if not os.path.exists(path) or (ext == '.feather' and not HAS_PYARROW):
+                continue
+            try:
+                if ext == '.feather':
+                    df = pd.read_feather(path, columns=columns)
+                else:
+                    df = pd.read_pickle(path)
+                    if columns is not None:
+                        df = df[[c for c in columns if c in df.columns]]
+            except Exception:
+                return None
+            try:
+                # the modification time orders sidecars for _prune
+                os.utime(path)
+            except OSError:
+                pass
+            return df
+        return None
+
+    def _write_sidecar(self, key, df):
+        """Store df as Feather, or pickled when Arrow cannot hold it or is missing; True when stored."""
+        base, prefix = self._sidecar(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for old in glob.glob(os.path.join(self.cache_dir, f"{prefix}-*")):
+                os.remove(old)
+        except OSError:
+            return False
+        frame = df.reset_index(drop=True)
+        writers = [('.pkl', frame.to_pickle)]
+        if HAS_PYARROW:
+            writers.insert(0, ('.feather', frame.to_feather))
+        for ext, write in writers:
+            tmp = base + ext + '.tmp'
+            try:
+                write(tmp)
+                os.replace(tmp, base + ext)
+            except Exception:
+                # Arrow refuses mixed-type object columns and non-string column names: try the next format
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+                continue
+            self._prune()
+            return True
+        return False
+
+    def _prune(self):
+        """Delete the least recently used sidecars beyond max_files or max_bytes (the newest one always stays)."""
+        try:
+            entries = []
+            for entry in os.scandir(self.cache_dir):
+                if entry.name.endswith(self.SIDECAR_EXTENSIONS):
+                    st = entry.stat()
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+        except OSError:
+            return
+        entries.sort(reverse=True)
+        total = 0
+        for i, (_, size, path) in enumerate(entries):
+            total += size
+            if i >= self.max_files or (i and total > self.max_bytes):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+class TitleCache:
+    """Bounded LRU of normalized title -> winning rule index, valid for one rule list.
+
+    Entries are tied to the rules they were matched with: lookup() against a
+    different rule list empties the cache first. With a path the entries are
+    loaded at start and written back by save(), so they survive across runs.
+    """
+
+    MISS = -3
+
+    def __init__(self, path=None, max_entries=500_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._rules = None
+        self._token = False
+        self._rules_key = None
+        self.hits = 0
+        self.lookups = 0
+        if path:
+            try:
+                with open(path, 'rb') as f:
+                    data = pickle.load(f)
+                self._rules_key = data['rules_key']
+                self._entries.update(data['entries'])
+            except Exception:
+                # no cache yet or an unreadable one: start empty
+                self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _bind(self, rules, token):
+        if rules is self._rules and token == self._token:
+            return
+        key = hashlib.sha1(repr((rules, token) if token else rules).encode('utf-8')).hexdigest()
+        if key != self._rules_key:
+            self._entries.clear()
+            self._rules_key = key
+        self._rules, self._token = rules, token
+
+    def lookup(self, rules, norm_titles, token=False):
+        """Cached winner per normalized title, or MISS; rules (and token mode) must be what the winners refer to."""
+        self._bind(rules, token)
+        entries = self._entries
+        get = entries.get
+        found = np.array([get(t, self.MISS) for t in norm_titles], dtype=np.int32)
+        hit = np.flatnonzero(found != self.MISS)
+        for i in hit:
+            entries.move_to_end(norm_titles[i])
+        self.hits += len(hit)
+        self.lookups += len(found)
+        return found
+
+    def store(self, norm_titles, winners):
+        self._entries.update(zip(norm_titles, winners.tolist()))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        """Write the entries to path (atomically); a no-op for an in-memory cache."""
+        if not self.path or self._rules_key is None:
+            return
+        tmp = self.path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(tmp, 'wb') as f:
+                pickle.dump({'rules_key': self._rules_key, 'entries': list(self._entries.items())}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self.path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+
+# Przetwarzanie równoległe: każdy proces roboczy dostaje skompilowane reguły raz, przez initializer
+SHARD_SIZE = 50_000
+_worker_rule_set = None
+
+
+def _init_worker(rule_set):
+    global _worker_rule_set
+    _worker_rule_set = rule_set
+
+
+def _match_shard(titles, return_counts=False):
+    result = match_titles(pd.Series(titles, dtype=object), _worker_rule_set, return_counts=return_counts)
+    return result[1:] if return_counts else result[1]
+
+
+def make_pool(rule_set=None, workers=None):
+    """ProcessPoolExecutor whose workers receive a frozen snapshot of the compiled rules once, at start-up.
+
+    Returns (pool, snapshot); results from the pool must be read against the snapshot's rules.
+    """
+    snapshot = (rule_set or RULE_SET).snapshot()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(snapshot,))
+    return pool, snapshot
+
+
+def match_titles_parallel(titles, pool, shard_size=SHARD_SIZE, return_counts=False):
+    """Winning rule index per row computed shard by shard on a pool from make_pool().
+
+    Shards come back in submission order, so the result is identical to match_series.
+    Only distinct titles are shipped to the workers. With return_counts the
+    result is (winners, number of matching rules per row), as in match_titles.
+    """
+    codes, uniques = pd.factorize(titles.astype(object))
+    values = np.asarray(uniques, dtype=object)
+    shards = [values[i:i + shard_size] for i in range(0, len(values), shard_size)]
+    results = list(pool.map(functools.partial(_match_shard, return_counts=return_counts), shards))
+    empty = np.empty(0, dtype=np.int32)
+    if not return_counts:
+        winners = np.concatenate(results) if results else empty
+        return np.append(winners, NO_TITLE).astype(np.int32)[codes]
+    winners = np.concatenate([w for w, _ in results]) if results else empty
+    counts = np.concatenate([c for _, c in results]) if results else empty
+    return np.append(winners, NO_TITLE).astype(np.int32)[codes], np.append(counts, 0).astype(np.int32)[codes]
+
+
+def categorize_parallel(titles, rule_set=None, kategorie=None, workers=None, shard_size=SHARD_SIZE):
+    """categorize_series spread over worker processes; same output as the serial version."""
+    pool, snapshot = make_pool(rule_set, workers)
+    with pool:
+        winners = match_titles_parallel(titles, pool, shard_size)
+    return categories_from_winners(winners, snapshot.rules, kategorie, index=titles.index)
+
+
+def categorize_frame(df, rule_set=None, kategorie=None, cache=None, stats=None, provenance=False,
+                     match_counts=False, pool=None, shard_size=SHARD_SIZE):
+    """Set Category and Category Id of df from df['Title'] in place, plus provenance columns when asked.
+
+    provenance adds Rule Index and Rule Keyword, match_counts adds Rule
+    Matches (see provenance_columns); they come from the same matching pass
+    as the categories. With a pool from make_pool(), rule_set must be its
+    snapshot and matching is spread over the workers; otherwise cache and
+    stats go to match_titles.
+    """
+    if pool is not None:
+        result = match_titles_parallel(df['Title'], pool, shard_size, return_counts=match_counts)
+        winners, counts = result if match_counts else (result, None)
+    else:
+        # the rules read below must be the ones the winners index into
+        rule_set = (rule_set or RULE_SET).snapshot()
+        _, winners, *counts = match_titles(df['Title'], rule_set, cache=cache, stats=stats, return_counts=match_counts)
+        counts = counts[0] if counts else None
+    df['Category'], df['Category Id'] = categories_from_winners(winners, rule_set.rules, kategorie, index=df.index)
+    if provenance or match_counts:
+        for name, col in provenance_columns(winners, rule_set.rules, counts, index=df.index).items():
+            if provenance or name == 'Rule Matches':
+                df[name] = col
+    return df
+
+
+def process_file(sciezka_wejsciowa, sciezka_wyjsciowa, rule_set=None, kategorie=None,
+                 workers=None, shard_size=SHARD_SIZE, cache=None, columns=None, engine=None, final_path=None,
+                 provenance=False, match_counts=False):
+    """Categorize one feed end to end without any UI.
+
+    With workers > 1 matching is sharded across that many processes;
+    otherwise an optional TitleCache skips titles matched before. columns
+    limits the input columns parsed (Title is always read) and engine picks
+    the Excel reader, see read_input. With final_path the final (id,
+    category_id) file is written from the same frame (see final_frame); a
+    feed without an id column has no final file and no 'final_rows'.
+    provenance and match_counts add the columns of categorize_frame. Returns
+    (df, summary) where summary holds rows, matched, unmatched, seconds and,
+    for the serial path, unique (distinct normalized titles) and cache_hits.
+    Raises ValueError when the input has no 'Title' column.
+    """
+    start = time.perf_counter()
+    if columns is not None and 'Title' not in columns:
+        columns = ['Title', *columns]
+    df = read_input(sciezka_wejsciowa, columns, engine)
+    if 'Title' not in df.columns:
+        raise ValueError("Plik wejściowy nie zawiera kolumny 'Title'.")
+    stats = {}
+    pool = None
+    if workers and workers > 1:
+        pool, rule_set = make_pool(rule_set, workers)
+    with pool if pool is not None else contextlib.nullcontext():
+        categorize_frame(df, rule_set, kategorie, cache, stats, provenance, match_counts, pool, shard_size)
+    write_output(df, sciezka_wyjsciowa)
+    final_rows = None
+    if final_path and find_id_column(df.columns) is not None:
+        final, _ = final_frame(df, kategorie)
+        write_output(final, final_path)
+        final_rows = len(final)
+    matched = int(df['Category'].astype(bool).sum())
+    summary = {
+        'rows': len(df),
+        'matched': matched,
+        'unmatched': len(df) - matched,
+        'seconds': time.perf_counter() - start,
+    }
+    if final_rows is not None:
+        summary['final_rows'] = final_rows
+    if stats:
+        summary['unique'] = stats['unique']
+        summary['cache_hits'] = stats['cache_hits']
+    return df, summary
+
+
+# Domyślny rozmiar porcji przy strumieniowym przetwarzaniu CSV
+CHUNK_SIZE = 100_000
+
+
+def process_csv_chunked(sciezka_wejsciowa, sciezka_wyjsciowa, rule_set=None, kategorie=None,
+                        chunksize=CHUNK_SIZE, keep_unmatched=True, workers=None, shard_size=SHARD_SIZE,
+                        cache=None, columns=None, final_path=None, provenance=False, match_counts=False):
+    """Categorize a csv feed chunk by chunk, appending each finished chunk to a csv output.
+
+    Peak memory is bounded by the chunk size instead of the file size. Returns
+    (unmatched_titles, summary); unmatched titles are gathered per chunk (an
+    empty list when keep_unmatched is False) and summary has the same keys as
+    process_file plus 'chunks'. With workers > 1 one process pool is shared by
+    all chunks. Serially, titles repeated across chunks are matched once
+    through cache (a bounded in-memory TitleCache when none is given), and
+    'unique' / 'cache_hits' count distinct titles over the whole file.
+    columns limits the csv columns parsed, as in process_file. With
+    final_path (a .csv) the final (id, category_id) rows of every chunk are
+    appended to that file as well, unless the feed has no id column (then
+    there is no final file and no 'final_rows', as in process_file). provenance and match_counts add the
+    columns of categorize_frame.
+    """
+    start = time.perf_counter()
+    rows = matched = chunks = final_rows = 0
+    final_out = None
+    unmatched_titles = []
+    pool = snapshot = None
+    # the distinct normalized titles of every chunk, so a title repeated across chunks counts once
+    stats = {'seen': set()}
+    if workers and workers > 1:
+        pool, snapshot = make_pool(rule_set, workers)
+    elif cache is None:
+        cache = TitleCache()
+    try:
+        with open(sciezka_wyjsciowa, 'w', encoding='utf-8', newline='') as out, contextlib.ExitStack() as stack:
+            wanted = {'Title', *columns} if columns is not None else None
+            usecols = (lambda c: c in wanted) if wanted is not None else None
+            for chunk in pd.read_csv(sciezka_wejsciowa, chunksize=chunksize, usecols=usecols):
+                if 'Title' not in chunk.columns:
+                    raise ValueError("Plik wejściowy nie zawiera kolumny 'Title'.")
+                categorize_frame(chunk, snapshot if pool is not None else rule_set, kategorie, cache, stats,
+                                 provenance, match_counts, pool, shard_size)
+                chunk.to_csv(out, index=False, sep=',', header=(chunks == 0))
+                if chunks == 0 and final_path and find_id_column(chunk.columns) is not None:
+                    final_out = stack.enter_context(open(final_path, 'w', encoding='utf-8', newline=''))
+                if final_out is not None:
+                    final, _ = final_frame(chunk, kategorie)
+                    final.to_csv(final_out, index=False, sep=',', header=(chunks == 0))
+                    final_rows += len(final)
+                hit = chunk['Category'].astype(bool)
+                rows += len(chunk)
+                matched += int(hit.sum())
+                chunks += 1
+                if keep_unmatched:
+                    unmatched_titles.extend(chunk.loc[~hit, 'Title'].tolist())
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    summary = {
+        'rows': rows,
+        'matched': matched,
+        'unmatched': rows - matched,
+        'seconds': time.perf_counter() - start,
+        'chunks': chunks,
+    }
+    if final_out is not None:
+        summary['final_rows'] = final_rows
+    if 'unique' in stats:
+        _count_distinct(stats, len(stats['seen']))
+        summary['unique'] = stats['unique']
+        summary['cache_hits'] = stats['cache_hits']
+    return unmatched_titles, summary
@@ -1,77 +1,29 @@
 import os
-import re
-import json
-import unicodedata
+import contextlib
+import time
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, scrolledtext
-import pandas as pd
 
-
-# Pliki konfiguracyjne obok skryptu
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-RULES_FILE = os.path.join(BASE_DIR, 'rules.json')
-CATEGORIES_FILE = os.path.join(BASE_DIR, 'categories.json')
-
-
-def load_rules():
-    try:
-        if not os.path.exists(RULES_FILE):
-            return []
-        with open(RULES_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        cleaned = []
-        for item in data:
-            try:
-                key = str(item[0]).strip()
-                # normalize keyword to lower and stripped form for reliable matching
-                key_norm = normalize_text(key)
-                cat = item[1] if len(item) > 1 else ""
-                cleaned.append((key_norm, cat))
-            except Exception:
-                continue
-        return cleaned
-    except Exception:
-        return []
-
-
-def save_rules(rules):
-    try:
-        with open(RULES_FILE, 'w', encoding='utf-8') as f:
-            json.dump([list(x) for x in rules], f, ensure_ascii=False, indent=2)
-        return True
-    except Exception:
-        return False
-
-
-def load_categories():
-    try:
-        if not os.path.exists(CATEGORIES_FILE):
-            return {}
-        with open(CATEGORIES_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data if isinstance(data, dict) else {}
-    except Exception:
-        return {}
-
-
-def normalize_text(s: str) -> str:
-    """Normalize text for matching: lower, remove diacritics, replace non-alnum with spaces, collapse spaces."""
-    if not isinstance(s, str):
-        return ""
-    # lower
-    s = s.lower()
-    # normalize unicode (remove accents)
-    s = unicodedata.normalize('NFKD', s)
-    s = ''.join(ch for ch in s if not unicodedata.combining(ch))
-    # replace any non-alphanumeric character with space
-    s = re.sub(r'[^0-9a-z]+', ' ', s)
-    # collapse whitespace
-    s = re.sub(r'\s+', ' ', s).strip()
-    return s
-
-
-# Załaduj mapę kategorii
-KATEGORIE_BAZA = load_categories()
+from core import (
+    KATEGORIE_BAZA, RULE_SET, TITLE_CACHE_FILE, Cancelled, CategoryIndex, InputCache, TitleCache,
+    categories_from_winners, final_frame, final_path_for, find_id_column, match_titles, normalize_text, rematch_incremental,
+    add_rule, compact_rules, delete_rule, provenance_columns, unmatched_view, write_output,
+)
+from perf import RunReport, match_details
+from suggest import suggest_for_frame
+
+# Co ile ms wątek Tk sprawdza kolejkę zdarzeń z wątku roboczego
+POLL_MS = 100
+# Ile niedopasowanych tytułów renderować naraz w polu tekstowym
+UNMATCHED_PAGE = 500
+# Ile podpowiedzi słów kluczowych pokazać w logu
+SUGGESTIONS = 15
+# Najwyżej tyle kategorii w rozwijanej liście podpowiedzi
+CATEGORY_SUGGESTIONS = 50
+# Po tylu ms bez nowego klawisza lista kategorii jest filtrowana (szybkie pisanie = jedno filtrowanie)
+CATEGORY_DEBOUNCE_MS = 150
 
 
 class AplikacjaKategorii:
@@ -101,12 +53,28 @@ class AplikacjaKategorii:
         self.entry_output.grid(row=1, column=1, sticky='we', padx=5)
         btn_browse_out = tk.Button(self.file_frame, text="Wybierz...", command=lambda: self.browse_output())
         btn_browse_out.grid(row=1, column=2, padx=4)
+        # Plik finalny (id, category_id) zapisywany razem z wynikiem, bez osobnego eksportu
+        self.final_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.file_frame, text="Zapisz też plik finalny (id, category_id) jako *_final", variable=self.final_var).grid(row=2, column=1, sticky='w')
+        # Kolumny diagnostyczne: która reguła nadała kategorię
+        self.provenance_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.file_frame, text="Dopisz regułę, która nadała kategorię (Rule Index, Rule Keyword)", variable=self.provenance_var).grid(row=3, column=1, sticky='w')
 
         self.btn_start = tk.Button(self.file_frame, text="Rozpocznij proces", command=lambda: self.przetworz_plik(self.input_path_var.get() or None, self.output_path_var.get() or None), bg="#008CBA", fg="white", font=("Arial", 10, "bold"))
         self.btn_start.grid(row=0, column=3, rowspan=2, padx=8, sticky='ns')
         # allow the middle column to expand
         self.file_frame.columnconfigure(1, weight=1)
 
+        # Postęp zadania w tle + anulowanie
+        self.status_frame = tk.Frame(root)
+        self.status_frame.pack(fill='x', padx=10)
+        self.progress = ttk.Progressbar(self.status_frame, mode='determinate', maximum=1)
+        self.progress.pack(side='left', fill='x', expand=True)
+        self.progress_label = tk.Label(self.status_frame, text="", width=42, anchor='w')
+        self.progress_label.pack(side='left', padx=6)
+        self.btn_cancel = tk.Button(self.status_frame, text="Anuluj", command=self.anuluj, state='disabled')
+        self.btn_cancel.pack(side='right')
+
         # Log
         self.log_area = scrolledtext.ScrolledText(root, height=8, state='disabled', bg="#f0f0f0")
         self.log_area.pack(pady=10, padx=10, fill='both')
@@ -120,7 +88,9 @@ class AplikacjaKategorii:
         self.entry_keyword.grid(row=0, column=1, sticky='we', padx=5)
 
         tk.Label(self.rules_frame, text="Kategoria:").grid(row=1, column=0, sticky='w')
-        kategori_lista = sorted(KATEGORIE_BAZA.keys()) if KATEGORIE_BAZA else []
+        self.category_index = CategoryIndex(KATEGORIE_BAZA)
+        self._category_job = None
+        kategori_lista = self.category_index.search("", CATEGORY_SUGGESTIONS)
         # Make combobox editable so user can type to filter values
         self.combo_var = tk.StringVar()
         self.combo_category = ttk.Combobox(self.rules_frame, textvariable=self.combo_var, values=kategori_lista, state='normal')
@@ -140,6 +110,9 @@ class AplikacjaKategorii:
         # New combined: add rule, save, and re-run (overwrite)
         self.btn_add_and_rerun = tk.Button(self.rules_frame, text="Dodaj i dopasuj", command=self.dodaj_i_dopasuj)
         self.btn_add_and_rerun.grid(row=0, column=6, rowspan=2, padx=5)
+        # Tryb całych słów: "mysz" nie pasuje wtedy do "myszka"
+        self.token_var = tk.BooleanVar(value=RULE_SET.token)
+        tk.Checkbutton(self.rules_frame, text="Tylko całe słowa", variable=self.token_var, command=self.przelacz_cale_slowa).grid(row=0, column=7, rowspan=2, padx=5)
 
         # Lista reguł (z panel sterowania po prawej)
         self.rules_list_frame = tk.Frame(root)
@@ -162,7 +135,22 @@ class AplikacjaKategorii:
         self.unmatched_frame = tk.Frame(root)
         self.unmatched_frame.pack(padx=10, pady=5, fill='both', expand=True)
 
-        tk.Label(self.unmatched_frame, text="Niedopasowane tytuły (zaznacz fragment):").pack(anchor='w')
+        self.unmatched_header = tk.Frame(self.unmatched_frame)
+        self.unmatched_header.pack(fill='x')
+        tk.Label(self.unmatched_header, text="Niedopasowane tytuły (zaznacz fragment):").pack(side='left')
+        # Stronicowanie: w widżecie jest tylko bieżąca strona, nie cała lista
+        self.btn_unmatched_next = tk.Button(self.unmatched_header, text=">", width=2, command=lambda: self.pokaz_strone_niedopasowanych(self.unmatched_page + 1))
+        self.btn_unmatched_next.pack(side='right')
+        self.unmatched_page_label = tk.Label(self.unmatched_header, text="")
+        self.unmatched_page_label.pack(side='right', padx=4)
+        self.btn_unmatched_prev = tk.Button(self.unmatched_header, text="<", width=2, command=lambda: self.pokaz_strone_niedopasowanych(self.unmatched_page - 1))
+        self.btn_unmatched_prev.pack(side='right')
+        self.collapse_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.unmatched_header, text="Grupuj duplikaty", variable=self.collapse_var, command=self.refresh_unmatched_list).pack(side='right', padx=8)
+        self.btn_suggest = tk.Button(self.unmatched_header, text="Podpowiedz słowa", command=self.podpowiedz_slowa)
+        self.btn_suggest.pack(side='right', padx=4)
+        self.unmatched_lines = []
+        self.unmatched_page = 0
         self.unmatched_text = scrolledtext.ScrolledText(self.unmatched_frame, height=12, wrap='none')
         self.unmatched_text.pack(fill='both', expand=True)
         # Prevent typing but allow copy/select shortcuts and mouse selection.
@@ -189,6 +177,22 @@ class AplikacjaKategorii:
         self.last_df = None
         self.last_input_path = None
         self.last_output_path = None
+        # stan do przyrostowego dopasowania: znormalizowane tytuły i zwycięska reguła dla każdego wiersza
+        # klucz InputCache (ścieżka, mtime, rozmiar) wersji pliku, z której pochodzi last_df
+        self.last_df_key = None
+        self.last_norm = None
+        self.last_winners = None
+        self.last_rules = None
+        # sparsowane pliki wejściowe (pamięć + kopia Feather na dysku)
+        self.input_cache = InputCache()
+        # zapamiętane dopasowania tytułów z poprzednich sesji (czyszczone, gdy zmienią się reguły)
+        self.title_cache = TitleCache(TITLE_CACHE_FILE)
+
+        # zadania w tle: wątek roboczy komunikuje się z UI wyłącznie przez tę kolejkę
+        self.events = queue.Queue()
+        self.busy = False
+        self.cancel_event = threading.Event()
+        self._progress_start = None
 
         # Bottom: export final placed at bottom-right
         self.bottom_frame = tk.Frame(root)
@@ -197,13 +201,97 @@ class AplikacjaKategorii:
         self.btn_export_final.pack(side='right')
 
         self.odswiez_liste_regul()
+        self.root.after(POLL_MS, self._poll_events)
 
     def log(self, message):
+        if threading.current_thread() is not threading.main_thread():
+            # Tk widgets may only be touched from the main thread
+            self.events.put(('log', message, None))
+            return
         self.log_area.config(state='normal')
         self.log_area.insert(tk.END, message + "\n")
         self.log_area.see(tk.END)
         self.log_area.config(state='disabled')
-        self.root.update()
+
+    # --- Zadania w tle ---
+    def uruchom_w_tle(self, praca, po_zakonczeniu, prefiks_bledu="-> BŁĄD KRYTYCZNY"):
+        """Run praca(progress, cancel) on a worker thread; po_zakonczeniu(result) then runs on the Tk thread.
+
+        Errors are logged with prefiks_bledu and shown in a message box; a
+        cancelled job (Cancelled raised) only logs a note.
+        """
+        if self.busy:
+            self.log("-> Trwa przetwarzanie - poczekaj na koniec albo anuluj.")
+            return
+        self.cancel_event = threading.Event()
+        self._set_busy(True)
+
+        def target():
+            try:
+                wynik = praca(self._report_progress, self.cancel_event)
+                self.events.put(('done', po_zakonczeniu, wynik))
+            except Cancelled:
+                self.events.put(('cancelled', None, None))
+            except Exception as e:
+                self.events.put(('error', prefiks_bledu, e))
+
+        threading.Thread(target=target, daemon=True).start()
+
+    def anuluj(self):
+        if self.busy:
+            self.cancel_event.set()
+            self.log("-> Anulowanie... (zadziała po bieżącej porcji danych)")
+
+    def _report_progress(self, done, total):
+        # called from the worker thread
+        now = time.perf_counter()
+        if done == 0 or self._progress_start is None:
+            self._progress_start = now
+        elapsed = now - self._progress_start
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if rate > 0 else None
+        self.events.put(('progress', (done, total, rate, eta), None))
+
+    def _set_busy(self, busy):
+        self.busy = busy
+        state = 'disabled' if busy else 'normal'
+        for btn in (self.btn_start, self.btn_add_and_rerun, self.btn_delete_rule, self.btn_export_final, self.btn_suggest):
+            btn.config(state=state)
+        self.btn_cancel.config(state='normal' if busy else 'disabled')
+        self._progress_start = None
+        self.progress['value'] = 0
+        self.progress_label.config(text="Przetwarzanie..." if busy else "")
+
+    def _poll_events(self):
+        try:
+            while True:
+                kind, a, b = self.events.get_nowait()
+                if kind == 'log':
+                    self.log(a)
+                elif kind == 'progress':
+                    done, total, rate, eta = a
+                    self.progress['maximum'] = max(total, 1)
+                    self.progress['value'] = done
+                    eta_text = f", zostało ~{eta:.0f} s" if eta is not None else ""
+                    self.progress_label.config(text=f"{done}/{total} wierszy ({rate:,.0f} w/s{eta_text})")
+                elif kind == 'done':
+                    self._set_busy(False)
+                    try:
+                        a(b)
+                    except Exception as e:
+                        self.log(f"-> BŁĄD KRYTYCZNY: {e}")
+                        messagebox.showerror("Błąd", str(e))
+                elif kind == 'cancelled':
+                    self._set_busy(False)
+                    self.log("-> Anulowano przetwarzanie.")
+                elif kind == 'error':
+                    self._set_busy(False)
+                    self.log(f"{a}: {b}")
+                    messagebox.showerror("Błąd", str(b))
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(POLL_MS, self._poll_events)
 
     # --- Handlers to allow copying from the read-only unmatched_text widget ---
     def _on_unmatched_key(self, event):
@@ -287,13 +375,14 @@ class AplikacjaKategorii:
             ks = None
         if ks in ('Up', 'Down', 'Left', 'Right', 'Return', 'Escape', 'Tab'):
             return
-        typed = self.combo_var.get()
-        if not typed:
-            vals = sorted(KATEGORIE_BAZA.keys()) if KATEGORIE_BAZA else []
-        else:
-            typed_norm = normalize_text(typed)
-            vals = [k for k in KATEGORIE_BAZA.keys() if typed_norm in normalize_text(k)]
-            vals = sorted(vals)
+        # coalesce fast typing: only the last key in a burst triggers filtering
+        if self._category_job is not None:
+            self.root.after_cancel(self._category_job)
+        self._category_job = self.root.after(CATEGORY_DEBOUNCE_MS, self._filtruj_kategorie)
+
+    def _filtruj_kategorie(self):
+        self._category_job = None
+        vals = self.category_index.search(self.combo_var.get(), CATEGORY_SUGGESTIONS)
         # update dropdown values
         try:
             self.combo_category['values'] = vals
@@ -342,78 +431,159 @@ class AplikacjaKategorii:
             return None, None
         # normalize title the same way rules are normalized so matching is consistent
         tytul_lower = normalize_text(tytul)
-        rules = load_rules()
-        for slowo_klucz, nazwa_kategorii in rules:
-            if slowo_klucz in tytul_lower:
-                cat_id = KATEGORIE_BAZA.get(nazwa_kategorii, "")
-                return nazwa_kategorii, cat_id
+        nazwa_kategorii = RULE_SET.match(tytul_lower)
+        if nazwa_kategorii:
+            return nazwa_kategorii, KATEGORIE_BAZA.get(nazwa_kategorii, "")
         return "", ""
 
+    def przypisz_kategorie(self, df, progress=None, cancel=None, stats=None):
+        """Full match of df['Title'], remembering per-row winners for incremental re-matching.
+
+        stats, if given, receives the match_titles counters (see core.match_unique).
+        """
+        rule_set = RULE_SET.snapshot()
+        stats = {} if stats is None else stats
+        norm, winners = match_titles(df['Title'], rule_set, progress, cancel, cache=self.title_cache, stats=stats)
+        df['Category'], df['Category Id'] = categories_from_winners(winners, rule_set.rules, index=df.index)
+        self.last_rules, self.last_norm, self.last_winners = rule_set.rules, norm, winners
+        self.title_cache.save()
+        if stats.get('unique'):
+            self.log(f"-> Unikalnych tytułów: {stats['unique']} z {stats['rows']} "
+                     f"(deduplikacja {stats['rows'] / stats['unique']:.1f}x), "
+                     f"z cache: {stats['cache_hits']} ({stats['cache_hits'] / stats['unique']:.0%}).")
+
+    def dopasuj_przyrostowo(self, progress=None, cancel=None, stats=None):
+        """Re-match self.last_df after a rule change, recomputing only rows the change can affect.
+
+        Returns False when it had to fall back to a full match (stats is passed on to it).
+        """
+        winners = None
+        # one snapshot: the new winners must index exactly the rules stored with them
+        rule_set = RULE_SET.snapshot()
+        if self.last_winners is not None:
+            winners = rematch_incremental(self.last_norm, self.last_winners, self.last_rules, rule_set)
+        if winners is None:
+            self.przypisz_kategorie(self.last_df, progress, cancel, stats)
+            return False
+        self.last_rules = rule_set.rules
+        self.last_winners = winners
+        self.last_df['Category'], self.last_df['Category Id'] = categories_from_winners(winners, self.last_rules, index=self.last_df.index)
+        return True
+
+    def przelacz_cale_slowa(self):
+        """Switch RULE_SET between substring and whole-token matching and re-match the last file."""
+        if self.busy:
+            # the running job uses a snapshot of the old mode; keep the checkbox in sync with it
+            self.token_var.set(RULE_SET.token)
+            self.log("-> Trwa przetwarzanie - poczekaj na koniec albo anuluj.")
+            return
+        RULE_SET.set_token(self.token_var.get())
+        # winners from the other mode cannot be updated incrementally
+        self.last_winners = None
+        self.log("-> Tryb dopasowania: " + ("całe słowa." if RULE_SET.token else "fragmenty tekstu."))
+        if getattr(self, 'last_input_path', None) and getattr(self, 'last_output_path', None):
+            self.ponownie_dopasuj()
+
+    def odchudz(self, df):
+        """Keep only the columns re-matching and export need once the full frame has been written out."""
+        cols = ['Title', find_id_column(df.columns), 'Category', 'Category Id']
+        return df[[c for c in dict.fromkeys(cols) if c is not None and c in df.columns]].copy()
+
     def przetworz_plik(self, sciezka_wejsciowa=None, sciezka_wyjsciowa=None):
         """Process input file and write output. If paths are provided, they are used; otherwise file dialogs are shown.
+        Reading, matching and writing run in the background; dialogs stay on the Tk thread.
         """
         if not sciezka_wejsciowa:
-            sciezka_wejsciowa = filedialog.askopenfilename(title="Wybierz plik do przeliczenia", filetypes=[("Excel/CSV", "*.xlsx *.xls *.csv")])
+            sciezka_wejsciowa = filedialog.askopenfilename(title="Wybierz plik do przeliczenia", filetypes=[("Excel/CSV/Parquet/Feather", "*.xlsx *.xls *.csv *.parquet *.feather")])
         if not sciezka_wejsciowa:
             return
+        if self.busy:
+            self.log("-> Trwa przetwarzanie - poczekaj na koniec albo anuluj.")
+            return
         # show chosen file
         self.input_path_var.set(sciezka_wejsciowa)
         self.log(f"-> Pobieram: {os.path.basename(sciezka_wejsciowa)}")
-        try:
-            if sciezka_wejsciowa.endswith('.csv'):
-                df = pd.read_csv(sciezka_wejsciowa)
-            else:
-                try:
-                    df = pd.read_excel(sciezka_wejsciowa)
-                except Exception:
-                    df = pd.read_csv(sciezka_wejsciowa)
+        report = RunReport('przetworz_plik')
+        report.meta['input'] = sciezka_wejsciowa
+        klucz = None
+
+        def praca(progress, cancel):
+            nonlocal klucz
+            with report.stage('read') as etap:
+                df = self.input_cache.read(sciezka_wejsciowa)
+                etap['source'] = self.input_cache.last_source
+                etap['rows'] = len(df)
+            klucz = self.input_cache.last_key
+            if self.input_cache.last_source != 'parsed':
+                self.log("-> Plik wczytany z pamięci podręcznej (bez ponownego parsowania).")
             if 'Title' not in df.columns:
+                return None
+            if cancel.is_set():
+                raise Cancelled()
+            self.log("-> Mielę dane... Czekaj.")
+            report.rows = len(df)
+            stats = {}
+            with report.stage('categorize', len(df), profile=True) as etap:
+                self.przypisz_kategorie(df, progress, cancel, stats)
+                etap.update(match_details(stats))
+            report.meta.update(rules=len(self.last_rules), token=RULE_SET.token)
+            return df
+
+        def dopasowano(df):
+            if df is None:
                 messagebox.showerror("Błąd", "Plik wejściowy nie zawiera kolumny 'Title'.")
                 return
-            self.log("-> Mielę dane... Czekaj.")
-            nowe_kategorie = []
-            nowe_ids = []
-            for tytul in df['Title']:
-                cat, cat_id = self.znajdz_kategorie(tytul)
-                nowe_kategorie.append(cat)
-                nowe_ids.append(cat_id)
-            df['Category'] = nowe_kategorie
-            df['Category Id'] = nowe_ids
-            zmienione = len([x for x in nowe_kategorie if x])
+            zmienione = int(df['Category'].astype(bool).sum())
             self.log(f"-> Zidentyfikowano {zmienione} produktów.")
             self.last_df = df
+            self.last_df_key = klucz
             self.odswiez_liste_regul()
             try:
-                self.refresh_unmatched_list()
+                with report.stage('unmatched'):
+                    self.refresh_unmatched_list()
             except Exception:
                 pass
 
             # if output path not provided, ask where to save
-            if not sciezka_wyjsciowa:
-                sciezka_wyjsciowa = filedialog.asksaveasfilename(
+            sciezka = sciezka_wyjsciowa
+            if not sciezka:
+                sciezka = filedialog.asksaveasfilename(
                     title="Gdzie zapisać gotowca?",
                     defaultextension=".xlsx",
-                    filetypes=[("Plik Excel", "*.xlsx"), ("Plik CSV", "*.csv")]
+                    filetypes=[("Plik Excel", "*.xlsx"), ("Plik CSV", "*.csv"), ("Plik Parquet", "*.parquet"), ("Plik Feather", "*.feather")]
                 )
-            if not sciezka_wyjsciowa:
+            if not sciezka:
                 self.log("-> Anulowano zapis. A szkoda.")
+                for line in report.finish():
+                    self.log(line)
                 return
             # set output path in UI
-            self.output_path_var.set(sciezka_wyjsciowa)
-            if sciezka_wyjsciowa.endswith('.csv'):
-                df.to_csv(sciezka_wyjsciowa, index=False, sep=',')
-            else:
-                df.to_excel(sciezka_wyjsciowa, index=False)
-            self.last_input_path = sciezka_wejsciowa
-            self.last_output_path = sciezka_wyjsciowa
-            self.log(f"-> SUKCES! Zapisano w:\n{sciezka_wyjsciowa}")
-            messagebox.showinfo("Gotowe", "Robota skończona, plik zapisany tam gdzie chciałeś.")
-        except Exception as e:
-            self.log(f"-> BŁĄD KRYTYCZNY: {e}")
-            messagebox.showerror("Błąd", str(e))
+            self.output_path_var.set(sciezka)
+            report.meta['output'] = sciezka
+
+            def zapisz(progress, cancel):
+                with report.stage('write', len(df)):
+                    write_output(self.kolumny_regul(df), sciezka)
+                return self.zapisz_finalny(df, sciezka, report)
+
+            def zapisano(final_log):
+                self.last_input_path = sciezka_wejsciowa
+                self.last_output_path = sciezka
+                self.last_df = self.odchudz(df)
+                self.input_cache.keep_only(sciezka_wejsciowa, self.last_df.columns)
+                self.log(f"-> SUKCES! Zapisano w:\n{sciezka}")
+                if final_log:
+                    self.log(final_log)
+                for line in report.finish():
+                    self.log(line)
+                messagebox.showinfo("Gotowe", "Robota skończona, plik zapisany tam gdzie chciałeś.")
+
+            self.uruchom_w_tle(zapisz, zapisano)
+
+        self.uruchom_w_tle(praca, dopasowano)
 
     def browse_input(self):
-        path = filedialog.askopenfilename(title="Wybierz plik do przeliczenia", filetypes=[("Excel/CSV", "*.xlsx *.xls *.csv")])
+        path = filedialog.askopenfilename(title="Wybierz plik do przeliczenia", filetypes=[("Excel/CSV/Parquet/Feather", "*.xlsx *.xls *.csv *.parquet *.feather")])
         if path:
             try:
                 self.input_path_var.set(path)
@@ -421,7 +591,7 @@ class AplikacjaKategorii:
                 pass
 
     def browse_output(self):
-        path = filedialog.asksaveasfilename(title="Gdzie zapisać gotowca?", defaultextension=".xlsx", filetypes=[("Plik Excel", "*.xlsx"), ("Plik CSV", "*.csv")])
+        path = filedialog.asksaveasfilename(title="Gdzie zapisać gotowca?", defaultextension=".xlsx", filetypes=[("Plik Excel", "*.xlsx"), ("Plik CSV", "*.csv"), ("Plik Parquet", "*.parquet"), ("Plik Feather", "*.feather")])
         if path:
             try:
                 self.output_path_var.set(path)
@@ -431,7 +601,7 @@ class AplikacjaKategorii:
     def odswiez_liste_regul(self):
         try:
             self.rules_listbox.delete(0, tk.END)
-            rules = load_rules()
+            rules = RULE_SET.rules
             for slowo, kat in rules:
                 self.rules_listbox.insert(tk.END, f"{slowo} -> {kat}")
         except Exception:
@@ -439,29 +609,61 @@ class AplikacjaKategorii:
 
     def refresh_unmatched_list(self):
         try:
-            self.unmatched_text.config(state='normal')
-            self.unmatched_text.delete('1.0', tk.END)
             if self.last_df is None:
-                self.unmatched_text.config(state='disabled')
-                return
-            for idx, row in self.last_df.iterrows():
-                title = str(row.get('Title', ''))
-                cat = row.get('Category', '')
-                if not cat:
-                    self.unmatched_text.insert(tk.END, title + "\n")
-            self.unmatched_text.config(state='disabled')
+                self.unmatched_lines = []
+            else:
+                norm = self.last_norm if self.last_norm is not None and len(self.last_norm) == len(self.last_df) else None
+                self.unmatched_lines = unmatched_view(self.last_df, collapse=self.collapse_var.get(), norm=norm)
+            self.pokaz_strone_niedopasowanych(self.unmatched_page)
         except Exception:
             pass
 
+    def pokaz_strone_niedopasowanych(self, page):
+        """Render one page of self.unmatched_lines with a single Text insert."""
+        pages = max(1, -(-len(self.unmatched_lines) // UNMATCHED_PAGE))
+        self.unmatched_page = min(max(page, 0), pages - 1)
+        start = self.unmatched_page * UNMATCHED_PAGE
+        chunk = self.unmatched_lines[start:start + UNMATCHED_PAGE]
+        self.unmatched_text.config(state='normal')
+        self.unmatched_text.delete('1.0', tk.END)
+        if chunk:
+            self.unmatched_text.insert(tk.END, "\n".join(chunk) + "\n")
+        self.unmatched_text.config(state='disabled')
+        self.unmatched_page_label.config(text=f"strona {self.unmatched_page + 1}/{pages} ({len(self.unmatched_lines)} poz.)")
+        self.btn_unmatched_prev.config(state='normal' if self.unmatched_page > 0 else 'disabled')
+        self.btn_unmatched_next.config(state='normal' if self.unmatched_page < pages - 1 else 'disabled')
+
+    def podpowiedz_slowa(self):
+        """Log the n-grams of unmatched titles that would cover the most rows as new rules."""
+        if self.last_df is None:
+            messagebox.showwarning("Brak danych", "Najpierw przetwórz plik.")
+            return
+        df = self.last_df
+        norm = self.last_norm if self.last_norm is not None and len(self.last_norm) == len(df) else None
+
+        def praca(progress, cancel):
+            return suggest_for_frame(df, RULE_SET, norm=norm, top=SUGGESTIONS)
+
+        def gotowe(podpowiedzi):
+            if not podpowiedzi:
+                self.log("-> Brak podpowiedzi słów kluczowych.")
+                return
+            self.log("-> Podpowiedzi słów kluczowych (nowo pokryte / wszystkie wiersze):")
+            for keyword, new_rows, total in podpowiedzi:
+                self.log(f"   {new_rows} / {total}  {keyword}")
+            # the best one goes to the keyword box, ready for a category and 'Dodaj i dopasuj'
+            self.entry_keyword.delete(0, tk.END)
+            self.entry_keyword.insert(0, podpowiedzi[0][0])
+
+        self.uruchom_w_tle(praca, gotowe, "-> Błąd podczas wyszukiwania podpowiedzi")
+
     def dodaj_regule(self):
         key = self.entry_keyword.get().strip().lower()
         cat = self.combo_category.get().strip()
         if not key or not cat:
             messagebox.showwarning("Uwaga", "Wypełnij oba pola: słowo klucz i kategoria.")
             return
-        rules = load_rules()
-        rules.insert(0, (key, cat))
-        saved = save_rules(rules)
+        saved = add_rule(key, cat)
         if saved:
             self.log(f"-> Dodano regułę: '{key}' -> '{cat}'")
         else:
@@ -474,8 +676,8 @@ class AplikacjaKategorii:
         self.odswiez_liste_regul()
 
     def zapisz_reguly(self):
-        rules = load_rules()
-        ok = save_rules(rules)
+        # dopisane zmiany są już na dysku; tu dziennik zmian jest scalany z rules.json
+        ok = compact_rules()
         if ok:
             self.log("-> Reguły zapisane do rules.json")
             messagebox.showinfo("Zapisano", "Reguły zostały zapisane do pliku rules.json")
@@ -494,9 +696,7 @@ class AplikacjaKategorii:
             return
 
         # Add new rule at top
-        rules = load_rules()
-        rules.insert(0, (key, cat))
-        saved = save_rules(rules)
+        saved = add_rule(key, cat)
         if saved:
             self.log(f"-> Dodano regułę: '{key}' -> '{cat}' (i zapisano)")
         else:
@@ -526,6 +726,9 @@ class AplikacjaKategorii:
                 self.unmatched_text.config(state='disabled')
             except Exception:
                 pass
+        if self.busy:
+            self.log("-> Trwa przetwarzanie - poczekaj na koniec albo anuluj.")
+            return
         if not fragment:
             messagebox.showwarning("Uwaga", "Zaznacz fragment tytułu, który chcesz dodać jako klucz.")
             return
@@ -533,201 +736,196 @@ class AplikacjaKategorii:
         if not cat:
             messagebox.showwarning("Uwaga", "Wybierz kategorię z listy.")
             return
-        rules = load_rules()
-        rules.insert(0, (fragment, cat))
-        saved = save_rules(rules)
+        saved = add_rule(fragment, cat)
         if saved:
             self.log(f"-> Dodano regułę z zaznaczenia: '{fragment}' -> '{cat}'")
             self.odswiez_liste_regul()
             if self.last_df is not None:
-                nowe_kategorie = []
-                nowe_ids = []
-                for tytul in self.last_df['Title']:
-                    cat2, cat_id = self.znajdz_kategorie(tytul)
-                    nowe_kategorie.append(cat2)
-                    nowe_ids.append(cat_id)
-                self.last_df['Category'] = nowe_kategorie
-                self.last_df['Category Id'] = nowe_ids
-                self.refresh_unmatched_list()
+                self.dopasuj_w_tle()
         else:
             messagebox.showerror("Błąd", "Nie udało się zapisać reguły.")
 
     def usun_regule(self):
+        if self.busy:
+            self.log("-> Trwa przetwarzanie - poczekaj na koniec albo anuluj.")
+            return
         try:
             sel = self.rules_listbox.curselection()
             if not sel:
                 messagebox.showwarning("Uwaga", "Wybierz regułę do usunięcia.")
                 return
             idx = int(sel[0])
-            rules = load_rules()
+            rules = list(RULE_SET.rules)
             if idx < 0 or idx >= len(rules):
                 messagebox.showwarning("Uwaga", "Nieprawidłowy wybór.")
                 return
-            removed = rules.pop(idx)
-            saved = save_rules(rules)
+            removed = rules[idx]
+            saved = delete_rule(removed[0], removed[1])
             if saved:
                 self.log(f"-> Usunięto regułę: '{removed[0]}' -> '{removed[1]}'")
-                if self.last_df is not None:
-                    nowe_kategorie = []
-                    nowe_ids = []
-                    for tytul in self.last_df['Title']:
-                        cat2, cat_id = self.znajdz_kategorie(tytul)
-                        nowe_kategorie.append(cat2)
-                        nowe_ids.append(cat_id)
-                    self.last_df['Category'] = nowe_kategorie
-                    self.last_df['Category Id'] = nowe_ids
-                    self.refresh_unmatched_list()
                 self.odswiez_liste_regul()
+                if self.last_df is not None:
+                    self.dopasuj_w_tle()
             else:
                 messagebox.showerror("Błąd", "Nie udało się zapisać pliku reguł po usunięciu.")
         except Exception as e:
             messagebox.showerror("Błąd", str(e))
 
+    def dopasuj_w_tle(self):
+        """dopasuj_przyrostowo() on a worker thread after a rule edit, then refresh the unmatched list.
+
+        A deleted rule that won many rows, or a fallback to a full match, can
+        take seconds; the window stays responsive meanwhile.
+        """
+        def praca(progress, cancel):
+            return self.dopasuj_przyrostowo(progress, cancel)
+
+        def gotowe(_):
+            self.refresh_unmatched_list()
+
+        self.uruchom_w_tle(praca, gotowe, "-> Błąd podczas ponownego dopasowania")
+
     def ponownie_dopasuj(self):
         if not getattr(self, 'last_input_path', None) or not getattr(self, 'last_output_path', None):
             messagebox.showwarning("Brak pliku", "Brak informacji o ostatnio przetworzonym pliku. Najpierw wykonaj przetwarzanie i zapisz wynik.")
             return
+        prior_matched = 0
         try:
-            # Ensure we use the up-to-date rules from disk
-            _ = load_rules()
-
-            sciezka_wejsciowa = self.last_input_path
-            if sciezka_wejsciowa.endswith('.csv'):
-                df = pd.read_csv(sciezka_wejsciowa)
+            if self.last_df is not None and 'Category' in self.last_df.columns:
+                prior_matched = int(self.last_df['Category'].astype(bool).sum())
+        except Exception:
+            prior_matched = 0
+        sciezka_wejsciowa = self.last_input_path
+        sciezka_wyjsciowa = self.last_output_path
+        report = RunReport('ponownie_dopasuj')
+        report.meta.update(input=sciezka_wejsciowa, output=sciezka_wyjsciowa)
+        klucz = None
+
+        def praca(progress, cancel):
+            nonlocal klucz
+            stats = {}
+            if self.last_df is not None and self.last_df_key == self.input_cache.key(sciezka_wejsciowa):
+                # the same version of the input is already in memory: only rows affected by the rule change are re-matched
+                df = self.last_df
+                klucz = self.last_df_key
+                report.rows = len(df)
+                with report.stage('categorize', len(df), profile=True) as etap:
+                    etap['incremental'] = self.dopasuj_przyrostowo(progress, cancel, stats)
+                    etap.update(match_details(stats))
             else:
-                try:
-                    df = pd.read_excel(sciezka_wejsciowa)
-                except Exception:
-                    df = pd.read_csv(sciezka_wejsciowa)
-            if 'Title' not in df.columns:
+                with report.stage('read') as etap:
+                    df = self.input_cache.read(sciezka_wejsciowa)
+                    etap['source'] = self.input_cache.last_source
+                    etap['rows'] = len(df)
+                klucz = self.input_cache.last_key
+                if 'Title' not in df.columns:
+                    return None
+                report.rows = len(df)
+                with report.stage('categorize', len(df), profile=True) as etap:
+                    self.przypisz_kategorie(df, progress, cancel, stats)
+                    etap.update(match_details(stats))
+            report.meta.update(rules=len(self.last_rules), token=RULE_SET.token)
+            with report.stage('write', len(df)):
+                # the output needs every input column: take them from the cache, not from memory we keep
+                pelny = self.input_cache.read(sciezka_wejsciowa)
+                if self.input_cache.last_key != klucz:
+                    # categories are copied by position: they must come from this very version of the file
+                    raise ValueError("Plik źródłowy zmienił się w trakcie dopasowania - uruchom je ponownie.")
+                pelny['Category'] = df['Category'].to_numpy()
+                pelny['Category Id'] = df['Category Id'].to_numpy()
+                write_output(self.kolumny_regul(pelny), sciezka_wyjsciowa)
+            final_log = self.zapisz_finalny(df, sciezka_wyjsciowa, report)
+            if final_log:
+                self.log(final_log)
+            df = self.odchudz(df)
+            self.input_cache.keep_only(sciezka_wejsciowa, df.columns)
+            return df
+
+        def gotowe(df):
+            if df is None:
                 messagebox.showerror("Błąd", "Plik źródłowy nie zawiera kolumny 'Title'.")
                 return
-            prior_matched = 0
-            try:
-                if self.last_df is not None and 'Category' in self.last_df.columns:
-                    prior_matched = len([x for x in self.last_df['Category'] if x])
-            except Exception:
-                prior_matched = 0
-            nowe_kategorie = []
-            nowe_ids = []
-            for tytul in df['Title']:
-                cat, cat_id = self.znajdz_kategorie(tytul)
-                nowe_kategorie.append(cat)
-                nowe_ids.append(cat_id)
-            df['Category'] = nowe_kategorie
-            df['Category Id'] = nowe_ids
-            new_matched = len([x for x in df['Category'] if x])
+            new_matched = int(df['Category'].astype(bool).sum())
             diff = new_matched - prior_matched
-            sciezka_wyjsciowa = self.last_output_path
-            if sciezka_wyjsciowa.endswith('.csv'):
-                df.to_csv(sciezka_wyjsciowa, index=False, sep=',')
-            else:
-                df.to_excel(sciezka_wyjsciowa, index=False)
             self.last_df = df
+            self.last_df_key = klucz
             self.odswiez_liste_regul()
-            self.refresh_unmatched_list()
+            with report.stage('unmatched'):
+                self.refresh_unmatched_list()
             # Log the change: więcej/ mniej and final count
             more_text = f"+{diff}" if diff >= 0 else f"{diff}"
             status_text = "więcej" if diff > 0 else ("mniej" if diff < 0 else "bez zmian")
             self.log(f"-> PONOWNE DOPASOWANIE: zapisano nadpisany plik:\n{sciezka_wyjsciowa}\n-> Dopasowano {new_matched} ofert ({status_text}, zmiana: {more_text} względem poprzednio dopasowanych {prior_matched}).")
+            for line in report.finish():
+                self.log(line)
             #messagebox.showinfo("Gotowe", f"Dopasowano {new_matched} ofert (zmiana: {more_text} względem poprzednio dopasowanych {prior_matched}).")
-        except Exception as e:
-            self.log(f"-> Błąd podczas ponownego dopasowania: {e}")
-            messagebox.showerror("Błąd", str(e))
+
+        self.uruchom_w_tle(praca, gotowe, "-> Błąd podczas ponownego dopasowania")
 
     def export_final(self):
         """Export final file with only columns: id, category_id.
         Uses self.last_df if available, otherwise tries to re-read the last input file.
         """
-        df = None
+        report = RunReport('export_final')
         try:
             if self.last_df is not None:
-                df = self.last_df.copy()
+                df = self.last_df
             elif getattr(self, 'last_input_path', None):
-                path = self.last_input_path
-                if path.endswith('.csv'):
-                    df = pd.read_csv(path)
-                else:
-                    try:
-                        df = pd.read_excel(path)
-                    except Exception:
-                        df = pd.read_csv(path)
+                with report.stage('read') as etap:
+                    df = self.input_cache.read(self.last_input_path)
+                    etap['rows'] = len(df)
             else:
                 messagebox.showwarning("Brak danych", "Brak przetworzonych danych. Najpierw przetwórz plik.")
                 return
 
-            if df is None:
-                messagebox.showerror("Błąd", "Nie udało się załadować danych do eksportu.")
-                return
-
-            # Detect id column
-            id_candidates = ['id', 'ID', 'Id', 'item_id', 'ItemId', 'itemId']
-            id_col = None
-            for c in id_candidates:
-                if c in df.columns:
-                    id_col = c
-                    break
-            # If still not found, try lowercase mapping
-            if id_col is None:
-                for c in df.columns:
-                    if str(c).strip().lower() == 'id':
-                        id_col = c
-                        break
-
-            # Detect category id column
-            catid_candidates = ['Category Id', 'CategoryId', 'category_id', 'category id', 'Category_ID', 'categoryId']
-            catid_col = None
-            for c in catid_candidates:
-                if c in df.columns:
-                    catid_col = c
-                    break
-            if catid_col is None:
-                for c in df.columns:
-                    if str(c).strip().lower().replace(' ', '_') == 'category_id' or str(c).strip().lower().replace(' ', '') == 'categoryid':
-                        catid_col = c
-                        break
-
-            # If category id missing but Category (name) present, map names to ids using KATEGORIE_BAZA
-            if catid_col is None and 'Category' in df.columns:
-                # create a category id column
-                df['__category_id_tmp__'] = df['Category'].map(lambda x: KATEGORIE_BAZA.get(x, '') if isinstance(x, str) else '')
-                catid_col = '__category_id_tmp__'
-
-            if id_col is None:
+            if find_id_column(df.columns) is None:
                 messagebox.showerror("Brak kolumny ID", "Nie znaleziono kolumny z identyfikatorami (id) w danych wejściowych.")
                 return
-
-            # Build output frame with normalized column names
-            out_df = pd.DataFrame()
-            out_df['id'] = df[id_col]
-            out_df['category_id'] = df[catid_col] if catid_col in df.columns else ''
-
-            # Remove rows without a category_id (empty or null)
-            total_before = len(out_df)
-            mask = out_df['category_id'].notnull() & (out_df['category_id'].astype(str).str.strip() != '')
-            out_filtered = out_df[mask]
-            skipped = total_before - len(out_filtered)
+            # only the id and category id columns are touched; rows without a category id are dropped
+            report.rows = len(df)
+            with report.stage('final', len(df)):
+                out_filtered, skipped = final_frame(df)
             if len(out_filtered) == 0:
                 messagebox.showwarning("Brak danych do eksportu", "Brak wierszy z przypisanym category_id — nic nie zapisano.")
                 self.log("-> Eksport przerwany: brak wierszy z category_id.")
                 return
 
             # Ask where to save
-            save_path = filedialog.asksaveasfilename(title="Gdzie zapisać finalny plik?", defaultextension='.xlsx', filetypes=[('Plik Excel', '*.xlsx'), ('Plik CSV', '*.csv')])
+            save_path = filedialog.asksaveasfilename(title="Gdzie zapisać finalny plik?", defaultextension='.xlsx', filetypes=[('Plik Excel', '*.xlsx'), ('Plik CSV', '*.csv'), ('Plik Parquet', '*.parquet'), ('Plik Feather', '*.feather')])
             if not save_path:
                 self.log("-> Anulowano eksport finalny.")
                 return
-            if save_path.endswith('.csv'):
-                out_filtered.to_csv(save_path, index=False)
-            else:
-                out_filtered.to_excel(save_path, index=False)
+            report.meta['output'] = save_path
+            with report.stage('write', len(out_filtered)):
+                write_output(out_filtered, save_path)
 
             self.log(f"-> Eksport finalny zapisany: {save_path} (wyeksportowano: {len(out_filtered)}, pominieto: {skipped})")
+            for line in report.finish():
+                self.log(line)
             messagebox.showinfo("Gotowe", f"Eksport zapisany. Wyeksportowano: {len(out_filtered)} (pominieto: {skipped}).")
         except Exception as e:
             self.log(f"-> Błąd podczas eksportu finalnego: {e}")
             messagebox.showerror("Błąd", str(e))
 
+    def kolumny_regul(self, df):
+        """df with the winning rule's index and keyword per row when the option is on (from last_winners, no re-matching)."""
+        if not self.provenance_var.get() or self.last_winners is None or len(self.last_winners) != len(df):
+            return df
+        return df.assign(**provenance_columns(self.last_winners, self.last_rules, index=df.index))
+
+    def zapisz_finalny(self, df, sciezka_wyjsciowa, report=None):
+        """Write the *_final file next to the output when the option is on; returns a log line or None.
+
+        With a RunReport the work is timed as its 'final' stage.
+        """
+        if not self.final_var.get() or find_id_column(df.columns) is None:
+            return None
+        sciezka = final_path_for(sciezka_wyjsciowa)
+        with report.stage('final', len(df)) if report is not None else contextlib.nullcontext():
+            final, skipped = final_frame(df)
+            write_output(final, sciezka)
+        return f"-> Plik finalny: {sciezka} (wyeksportowano: {len(final)}, pominieto: {skipped})"
+
 
 if __name__ == "__main__":
     root = tk.Tk()
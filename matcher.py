@@ -0,0 +1,147 @@
+"""Multi-pattern matchers used to find the winning rule in one pass over a title."""
+
+# Podbić przy każdej zmianie pól matcherów - wchodzi do klucza skompilowanego cache reguł
+MATCHER_VERSION = 2
+
+
+class AhoCorasick:
+    """Automaton over all rule keywords.
+
+    first_match() returns the index of the lowest-numbered keyword occurring in
+    the text, which is exactly the winner of the first-rule-in-list-order scan
+    ``for i, kw in enumerate(keywords): if kw in text: return i``.
+    """
+
+    def __init__(self, keywords):
+        self.size = len(keywords)
+        # goto[state] maps a character to the next state; state 0 is the root
+        self._goto = [{}]
+        self._fail = [0]
+        # lowest keyword index ending in this state or any state on its fail chain
+        self._best = [self.size]
+        # keyword indices ending exactly in a state, and the nearest such state on the fail chain (0: none)
+        self._out = {}
+        self._link = [0]
+
+        for idx, kw in enumerate(keywords):
+            state = 0
+            for ch in kw:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(self.size)
+                    self._link.append(0)
+                state = nxt
+            if idx < self._best[state]:
+                self._best[state] = idx
+            self._out.setdefault(state, []).append(idx)
+
+        # breadth-first pass computing fail links and propagating best indices
+        queue = list(self._goto[0].values())
+        for state in queue:
+            self._best[state] = min(self._best[state], self._best[0])
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self._goto[state].items():
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                if self._best[self._fail[nxt]] < self._best[nxt]:
+                    self._best[nxt] = self._best[self._fail[nxt]]
+                f = self._fail[nxt]
+                self._link[nxt] = f if f and f in self._out else self._link[f]
+                queue.append(nxt)
+
+    def first_match(self, text):
+        """Index of the first keyword (in list order) contained in text, or -1."""
+        if not self.size:
+            return -1
+        goto = self._goto
+        fail = self._fail
+        best_at = self._best
+        best = best_at[0]
+        if best == 0:
+            return 0
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if best_at[state] < best:
+                best = best_at[state]
+                if best == 0:
+                    break
+        return best if best < self.size else -1
+
+    def match_count(self, text):
+        """(first_match(text), number of keywords contained in text), from one pass over text."""
+        if not self.size:
+            return -1, 0
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        link = self._link
+        # empty keywords end in the root and occur in every text
+        found = set(out.get(0, ()))
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            s = state if state in out else link[state]
+            while s:
+                found.update(out[s])
+                s = link[s]
+        return (min(found) if found else -1), len(found)
+
+
+class TokenMatcher:
+    """Whole-token counterpart of AhoCorasick with the same first_match() contract.
+
+    A keyword matches only as a run of whole tokens of the title ("mysz"
+    matches "mysz usb" but not "myszka"). Rules are indexed by their first
+    token, so a title only looks at rules that start with one of its own
+    tokens; for normalized text this equals ``' ' + kw + ' ' in ' ' + text + ' '``.
+    """
+
+    def __init__(self, keywords):
+        self.size = len(keywords)
+        # first token -> [(keyword index, all tokens)], in ascending index order
+        self._index = {}
+        for idx, kw in enumerate(keywords):
+            tokens = tuple(kw.split())
+            if tokens:
+                self._index.setdefault(tokens[0], []).append((idx, tokens))
+
+    def first_match(self, text):
+        """Index of the first keyword (in list order) occurring as whole tokens in text, or -1."""
+        tokens = text.split()
+        get = self._index.get
+        best = self.size
+        for i, tok in enumerate(tokens):
+            for idx, seq in get(tok, ()):
+                if idx >= best:
+                    break
+                if len(seq) == 1 or tuple(tokens[i:i + len(seq)]) == seq:
+                    best = idx
+                    break
+            if best == 0:
+                break
+        return best if best < self.size else -1
+
+    def match_count(self, text):
+        """(first_match(text), number of keywords occurring as whole tokens in text), from one pass over text."""
+        tokens = text.split()
+        get = self._index.get
+        found = set()
+        for i, tok in enumerate(tokens):
+            for idx, seq in get(tok, ()):
+                if len(seq) == 1 or tuple(tokens[i:i + len(seq)]) == seq:
+                    found.add(idx)
+        return (min(found) if found else -1), len(found)
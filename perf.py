@@ -0,0 +1,259 @@
+"""Per-run performance reports: stage timings, rows per second and peak memory.
+
+A RunReport times the named stages of one run (reading, matching, the
+unmatched list, writing, ...). While a stage runs, a background thread
+samples the resident memory of the process to find the stage's peak. When
+the run ends, finish() returns a short summary for the log and writes the
+whole report as JSON to REPORTS_DIR, one file per run, so slow runs and
+regressions can be compared over time; the directory keeps the newest
+REPORTS_MAX_FILES files. With SORTOWNIA_PROFILE=1 in the
+environment, stages opened with profile=True are also run under cProfile
+and dumped next to the report (read the dumps with ``python -m pstats``).
+"""
+import os
+import sys
+import json
+import time
+import cProfile
+import platform
+import threading
+import contextlib
+
+from core import REPORTS_DIR, REPORTS_MAX_FILES
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+# Zrzut cProfile etapu dopasowania tylko na życzenie: SORTOWNIA_PROFILE=1
+PROFILE = os.environ.get('SORTOWNIA_PROFILE', '') not in ('', '0')
+# Co ile sekund próbkować zużycie pamięci w trakcie etapu
+SAMPLE_EVERY = 0.05
+
+# Nazwy etapów w logu; w JSON zostają klucze
+LABELS = {
+    'read': 'wczytanie',
+    'categorize': 'dopasowanie',
+    'unmatched': 'lista niedopasowanych',
+    'write': 'zapis wyniku',
+    'final': 'plik finalny',
+}
+
+_MB = 1024 * 1024
+_process = psutil.Process() if HAS_PSUTIL else None
+
+
+def current_rss():
+    """Resident memory of this process in bytes, or None where it cannot be read."""
+    if _process is not None:
+        return _process.memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def peak_rss():
+    """Highest resident memory of this process since it started, in bytes, or None."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+    if _process is not None:
+        # peak_wset on Windows
+        return getattr(_process.memory_info(), 'peak_wset', None)
+    return None
+
+
+def match_details(stats):
+    """Stage details from the stats dict filled by core.match_unique."""
+    if not stats:
+        return {}
+    return {
+        'unique': stats.get('unique'),
+        'cache_hits': stats.get('cache_hits'),
+        'normalize_s': round(stats.get('normalize_s', 0.0), 4),
+        'match_s': round(stats.get('match_s', 0.0), 4),
+    }
+
+
+def _mb(value):
+    return None if value is None else round(value / _MB, 1)
+
+
+class _MemorySampler:
+    """Background thread keeping the highest current_rss() seen until stop()."""
+
+    def __init__(self, every=SAMPLE_EVERY):
+        self.every = every
+        self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = None
+        if self.peak is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.every):
+            rss = current_rss()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+
+    def stop(self):
+        """Stop sampling; returns the peak in bytes (None when memory cannot be read)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            rss = current_rss()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+        return self.peak
+
+
+class RunReport:
+    """Timings of one run (e.g. one przetworz_plik), built stage by stage.
+
+    meta takes free-form details of the run (input/output paths, number of
+    rules, ...), which end up in the JSON as they are. The run's peak memory
+    is the highest of its stages' sampled peaks.
+    """
+
+    def __init__(self, name, rows=None, directory=REPORTS_DIR, max_files=REPORTS_MAX_FILES):
+        self.name = name
+        self.rows = rows
+        self.directory = directory
+        self.max_files = max_files
+        self.meta = {}
+        self.stages = []
+        self.started = time.time()
+        self._start = time.perf_counter()
+        self._id = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started)) + f"-{int(self.started * 1000) % 1000:03d}"
+
+    @contextlib.contextmanager
+    def stage(self, name, rows=None, profile=False):
+        """Time the with block as stage name over rows rows.
+
+        Yields the stage's dict so the block can add its own details to it
+        (including 'rows', when they are only known inside the block).
+        Stages that raise are not recorded. With profile=True and PROFILE on,
+        the block runs under cProfile (current thread only) and the dump path
+        is stored under 'profile'.
+        """
+        info = {'name': name}
+        if rows is not None:
+            info['rows'] = int(rows)
+        profiler = cProfile.Profile() if profile and PROFILE else None
+        sampler = _MemorySampler()
+        rss_start = current_rss()
+        t0 = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield info
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            seconds = time.perf_counter() - t0
+            peak = sampler.stop()
+        info['seconds'] = round(seconds, 4)
+        if info.get('rows') and seconds > 0:
+            info['rows_per_s'] = round(info['rows'] / seconds)
+        info['rss_start_mb'] = _mb(rss_start)
+        info['rss_peak_mb'] = _mb(peak)
+        info['rss_end_mb'] = _mb(current_rss())
+        if profiler is not None:
+            info['profile'] = self._dump_profile(profiler, name)
+        self.stages.append(info)
+
+    def _dump_profile(self, profiler, stage):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{self._id}_{self.name}_{stage}.prof")
+            profiler.dump_stats(path)
+            return path
+        except OSError:
+            return None
+
+    def to_dict(self):
+        stage_s = sum(s['seconds'] for s in self.stages)
+        peaks = [s['rss_peak_mb'] for s in self.stages if s.get('rss_peak_mb') is not None]
+        report = {
+            'run': self.name,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            # wall time also counts waiting for the user, e.g. in the save dialog
+            'wall_s': round(time.perf_counter() - self._start, 4),
+            'stages_s': round(stage_s, 4),
+            'rows': self.rows,
+            'rows_per_s': round(self.rows / stage_s) if self.rows and stage_s > 0 else None,
+            'peak_rss_mb': max(peaks) if peaks else None,
+            # since the process started: in the long-lived GUI possibly the peak of an earlier run
+            'process_peak_rss_mb': _mb(peak_rss()),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'stages': self.stages,
+        }
+        report.update(self.meta)
+        return report
+
+    def save(self):
+        """Write the report as JSON into the reports directory; returns its path."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{self._id}_{self.name}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        self._prune()
+        return path
+
+    def _prune(self):
+        """Delete the oldest reports and profile dumps beyond max_files."""
+        try:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(('.json', '.prof')):
+                    entries.append((entry.stat().st_mtime_ns, entry.path))
+        except OSError:
+            return
+        entries.sort(reverse=True)
+        for _, path in entries[self.max_files:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def summary(self):
+        """Log lines: the totals, then one per stage with time, rows/s and peak memory."""
+        report = self.to_dict()
+        rows = f", {report['rows']:,} wierszy" if report['rows'] else ""
+        speed = f", {report['rows_per_s']:,} w/s" if report['rows_per_s'] else ""
+        peak = f", szczyt pamięci {report['peak_rss_mb']} MB" if report['peak_rss_mb'] is not None else ""
+        lines = [f"-> Czasy ({self.name}{rows}): {report['stages_s']:.2f} s{speed}{peak}"]
+        for s in self.stages:
+            line = f"   {LABELS.get(s['name'], s['name']):<22} {s['seconds']:8.2f} s"
+            if s.get('rows_per_s'):
+                line += f"  {s['rows_per_s']:>12,} w/s"
+            if s.get('rss_peak_mb') is not None:
+                line += f"  szczyt {s['rss_peak_mb']} MB"
+            lines.append(line)
+            if 'normalize_s' in s:
+                lines.append(f"   {'':<22} w tym normalizacja {s['normalize_s']:.2f} s, dopasowanie {s['match_s']:.2f} s")
+            if s.get('profile'):
+                lines.append(f"   {'':<22} profil: {s['profile']}")
+        return lines
+
+    def finish(self):
+        """Save the report and return the summary lines for the log (saving errors become a line too)."""
+        lines = self.summary()
+        try:
+            lines.append(f"-> Raport: {self.save()}")
+        except OSError as e:
+            lines.append(f"-> Nie udało się zapisać raportu: {e}")
+        return lines
@@ -0,0 +1,236 @@
+"""Rule storage: rules.json plus an append-only change log, safe for several editors at once.
+
+rules.json keeps the usual ``[[keyword, category], ...]`` list. Adding or
+deleting a rule appends one JSON line to ``rules.json.log`` instead of
+rewriting the whole file, so two people editing at the same time both keep
+their changes. Every read and write holds an exclusive lock on
+``rules.json.lock``. Once the log grows past compact_every entries it is
+folded back into rules.json, which is replaced atomically (temporary file +
+os.replace), so a crash never leaves a half-written rule file.
+"""
+import os
+import json
+import stat
+import tempfile
+import contextlib
+
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# Po tylu wpisach w dzienniku zmian rules.json jest przepisywany w całości
+COMPACT_EVERY = 500
+
+
+def _umask_mode():
+    """Permission bits open() gives a new file under the current umask."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _shared_mode(like):
+    """Permission bits of like, or the umask default plus group write when like does not exist."""
+    try:
+        return stat.S_IMODE(os.stat(like).st_mode)
+    except OSError:
+        return _umask_mode() | 0o060
+
+
+def ensure_shared(path, like):
+    """Create path empty, if missing, with the permissions of like.
+
+    The lock file and the change log must be writable by everyone who may
+    write the rules file itself, not only by whoever happened to create them.
+    """
+    mode = _shared_mode(like)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+    except FileExistsError:
+        return
+    os.close(fd)
+    try:
+        # os.open applied the umask
+        os.chmod(path, mode)
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def file_lock(path, like=None):
+    """Exclusive lock on path across processes, held for the with block.
+
+    The file is created if missing, with the permissions of like (see ensure_shared).
+    """
+    ensure_shared(path, like or path)
+    with open(path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            # LK_LOCK retries for about 10 s before raising OSError
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write_json(path, data):
+    """Write data as JSON to path via a temporary file in the same directory and os.replace.
+
+    The new file keeps the permissions of the one it replaces (a new path gets
+    the umask default), not the owner-only mode of the temporary file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        mode = _umask_mode()
+    fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class RuleStore:
+    """rules.json (the compacted base) plus rules.json.log (changes since), read and written under a lock.
+
+    Log entries are ``{"op": "add" | "delete", "keyword": ..., "category": ...}``.
+    An add puts the rule first (the GUI convention: newest rule wins); a
+    delete removes the first rule with that keyword and category, so it is
+    addressed by content and never removes a rule someone else inserted
+    meanwhile. normalize is applied to every keyword read back.
+    """
+
+    def __init__(self, path, normalize=None, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.log_path = path + '.log'
+        self.lock_path = path + '.lock'
+        self.normalize = normalize or (lambda s: s)
+        self.compact_every = compact_every
+
+    def _read_unlocked(self):
+        base = b''
+        log = b''
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                base = f.read()
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                log = f.read()
+        return base, log
+
+    def read_bytes(self):
+        """(rules.json content, log content) read consistently, e.g. to hash them."""
+        if not os.path.exists(self.path) and not os.path.exists(self.log_path):
+            return b'', b''
+        try:
+            with file_lock(self.lock_path, self.path):
+                return self._read_unlocked()
+        except OSError:
+            # no lock to be had (read-only mount, a lock file we may not open): read without it.
+            # rules.json is only ever replaced whole and a torn last log line is skipped by parse;
+            # a failing read raises again here instead of passing for an empty rule file
+            return self._read_unlocked()
+
+    def parse(self, base, log):
+        """Rules as (normalized keyword, category) pairs: the base list with the log replayed over it."""
+        rules = []
+        try:
+            data = json.loads(base) if base.strip() else []
+        except ValueError:
+            data = []
+        for item in data if isinstance(data, list) else []:
+            try:
+                key = str(item[0]).strip()
+                cat = item[1] if len(item) > 1 else ""
+                rules.append((self.normalize(key), cat))
+            except Exception:
+                continue
+        for line in log.splitlines():
+            try:
+                entry = json.loads(line)
+                rule = (self.normalize(str(entry['keyword']).strip()), entry.get('category', ""))
+                op = entry['op']
+            except Exception:
+                # a line cut short by a crash mid-append
+                continue
+            if op == 'add':
+                rules.insert(0, rule)
+            elif op == 'delete':
+                try:
+                    rules.remove(rule)
+                except ValueError:
+                    pass
+        return rules
+
+    def read(self):
+        return self.parse(*self.read_bytes())
+
+    def _append(self, op, keyword, category):
+        line = json.dumps({'op': op, 'keyword': keyword, 'category': category}, ensure_ascii=False) + '\n'
+        with file_lock(self.lock_path, self.path):
+            ensure_shared(self.log_path, self.path)
+            with open(self.log_path, 'a+b') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell():
+                    # start on a fresh line if a previous append was cut short
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        line = '\n' + line
+                f.write(line.encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            base, log = self._read_unlocked()
+            if log.count(b'\n') >= self.compact_every:
+                self._write_unlocked(self.parse(base, log))
+
+    def add(self, keyword, category):
+        """Record a new rule in first position."""
+        self._append('add', keyword, category)
+
+    def delete(self, keyword, category):
+        """Record the removal of the first rule with this keyword and category."""
+        self._append('delete', keyword, category)
+
+    def _write_unlocked(self, rules):
+        atomic_write_json(self.path, [list(x) for x in rules])
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+
+    def replace_all(self, rules):
+        """Write rules as the whole new base and drop the log."""
+        with file_lock(self.lock_path, self.path):
+            self._write_unlocked(rules)
+
+    def compact(self):
+        """Fold the log into rules.json; returns the number of rules."""
+        with file_lock(self.lock_path, self.path):
+            rules = self.parse(*self._read_unlocked())
+            self._write_unlocked(rules)
+        return len(rules)
+
+    def export(self, dest):
+        """Write the current rules to dest in the rules.json [keyword, category] format."""
+        rules = self.read()
+        atomic_write_json(dest, [list(x) for x in rules])
+        return len(rules)
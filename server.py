@@ -0,0 +1,314 @@
+"""Local HTTP categorization service.
+
+Usage: python -m server [--host 127.0.0.1] [--port 8765] [--rules rules.json] [--categories categories.json]
+                        [--tokens] [--max-batch N] [--max-wait-ms MS]
+
+POST /categorize  {"title": "..."}         -> {"category": ..., "category_id": ..., "rule": i, "keyword": ...}
+                  {"titles": ["...", ...]} -> {"results": [{...}, ...]}
+GET  /health      -> rule and category counts as of the last batch, batches and titles served
+
+The compiled rules and the category map stay in memory. Concurrent requests
+are queued and matched together: the first request of a batch waits at most
+max_wait_ms for others, up to max_batch titles, and the whole batch goes
+through one match_titles call on a worker thread, so the event loop keeps
+accepting connections meanwhile. Rules reload by themselves when rules.json
+(or its change log) changes, and the category map when categories.json does.
+"""
+import os
+import sys
+import json
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import core
+from core import TitleCache, categories_from_winners, load_categories, match_titles
+
+# Domyślny adres usługi - tylko lokalnie
+HOST = '127.0.0.1'
+PORT = 8765
+# Mikro-partie: najwięcej tytułów w jednej partii i najdłuższe czekanie na kolejne żądania
+MAX_BATCH = 2000
+MAX_WAIT_MS = 2.0
+# Największe przyjmowane ciało żądania
+MAX_BODY = 16 * 1024 * 1024
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class Categorizer:
+    """Rules and categories held in memory; categorize() is what one micro-batch runs."""
+
+    def __init__(self, rules_path=None, categories_path=None, token=False):
+        self.rule_set = core.RuleSet(rules_path, token=token)
+        self.categories_path = categories_path or core.CATEGORIES_FILE
+        self._categories_stamp = None
+        self._kategorie = {}
+        # titles repeat a lot in a feed; the cache empties itself when the rules change
+        self.cache = TitleCache()
+        # what the last batch used; the RuleSet itself is only touched from the batch thread
+        self.snapshot = None
+        self.kategorie = {}
+
+    def refresh(self):
+        """Take a fresh snapshot of the rules (reloading them if they changed) and re-check the categories."""
+        self.snapshot = self.rule_set.snapshot()
+        self.kategorie = self.categories()
+        return self.snapshot, self.kategorie
+
+    def categories(self):
+        """The category map, re-read when categories.json changes on disk."""
+        try:
+            st = os.stat(self.categories_path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp != self._categories_stamp:
+            self._kategorie = load_categories(self.categories_path)
+            self._categories_stamp = stamp
+        return self._kategorie
+
+    def categorize(self, titles):
+        """One result dict per title, all matched in a single pass against one snapshot of the rules."""
+        # the rules may change on disk at any time; winners must index the list they were matched with
+        rule_set, kategorie = self.refresh()
+        rules = rule_set.rules
+        _, winners = match_titles(pd.Series(titles, dtype=object), rule_set, cache=self.cache)
+        cats, ids = categories_from_winners(winners, rules, kategorie)
+        results = []
+        for w, cat, cat_id in zip(winners.tolist(), cats.tolist(), ids.tolist()):
+            results.append({
+                'category': cat,
+                'category_id': cat_id,
+                'rule': w if w >= 0 else None,
+                'keyword': rules[w][0] if w >= 0 else None,
+            })
+        return results
+
+
+class MicroBatcher:
+    """Queue of (titles, future) from concurrent requests, matched together in batches."""
+
+    def __init__(self, categorize, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.categorize = categorize
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        # one thread: batches run one after another while the next one fills up
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self.batches = 0
+        self.titles = 0
+
+    async def submit(self, titles):
+        """Results for titles, once the batch they ended up in has been matched."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((titles, future))
+        return await future
+
+    async def call(self, fn, *args):
+        """Run fn(*args) on the batch thread, between batches."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        items = [await self.queue.get()]
+        size = len(items[0][0])
+        deadline = loop.time() + self.max_wait
+        while size < self.max_batch:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            items.append(item)
+            size += len(item[0])
+        return items
+
+    async def run(self):
+        """Batch loop; runs until cancelled."""
+        self.queue = asyncio.Queue()
+        try:
+            while True:
+                items = await self._collect()
+                titles = [t for batch, _ in items for t in batch]
+                try:
+                    results = await self.call(self.categorize, titles)
+                except Exception as e:
+                    for _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                self.batches += 1
+                self.titles += len(titles)
+                start = 0
+                for batch, future in items:
+                    # a client that disconnected has its future cancelled already
+                    if not future.done():
+                        future.set_result(results[start:start + len(batch)])
+                    start += len(batch)
+        finally:
+            self._executor.shutdown(wait=False)
+
+
+def _titles_from(payload):
+    """(titles, single) from a request body, or raise ValueError."""
+    if not isinstance(payload, dict):
+        raise ValueError("oczekiwano obiektu JSON z polem 'title' albo 'titles'")
+    if 'titles' in payload:
+        titles = payload['titles']
+        if not isinstance(titles, list):
+            raise ValueError("'titles' musi być listą")
+        single = False
+    elif 'title' in payload:
+        titles = [payload['title']]
+        single = True
+    else:
+        raise ValueError("brak pola 'title' albo 'titles'")
+    return [t if t is None or isinstance(t, str) else str(t) for t in titles], single
+
+
+class CategorizationServer:
+    """Minimal HTTP/1.1 (keep-alive) front end of a Categorizer on asyncio streams."""
+
+    def __init__(self, categorizer, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+        self.categorizer = categorizer
+        self.batcher = MicroBatcher(categorizer.categorize, max_batch, max_wait_ms)
+        self.requests = 0
+
+    async def _route(self, method, path, body):
+        if path == '/health':
+            if method != 'GET':
+                return 405, {'error': "użyj GET"}
+            # from what the last batch used: reading the RuleSet here could reload it while a batch does
+            categorizer = self.categorizer
+            return 200, {
+                'status': 'ok',
+                'rules': len(categorizer.snapshot.rules),
+                'rule_loads': categorizer.snapshot.loads,
+                'categories': len(categorizer.kategorie),
+                'token': categorizer.snapshot.token,
+                'requests': self.requests,
+                'batches': self.batcher.batches,
+                'titles': self.batcher.titles,
+            }
+        if path == '/categorize':
+            if method != 'POST':
+                return 405, {'error': "użyj POST"}
+            try:
+                titles, single = _titles_from(json.loads(body or b'null'))
+            except ValueError as e:
+                # json.JSONDecodeError is a ValueError too
+                return 400, {'error': str(e)}
+            if not titles:
+                return 200, {'results': []}
+            try:
+                results = await self.batcher.submit(titles)
+            except Exception as e:
+                return 500, {'error': str(e)}
+            return 200, results[0] if single else {'results': results}
+        return 404, {'error': f"nieznana ścieżka {path}"}
+
+    @staticmethod
+    def _send(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+
+    async def handle(self, reader, writer):
+        """Serve requests on one connection until the client closes it or asks to."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode('latin-1').split()
+                except ValueError:
+                    self._send(writer, 400, {'error': "niepoprawna linia żądania"}, False)
+                    break
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length') or 0)
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY:
+                    self._send(writer, 413 if length > MAX_BODY else 400, {'error': "niepoprawna długość treści"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                self.requests += 1
+                status, payload = await self._route(method, target.split('?', 1)[0], body)
+                self._send(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=HOST, port=PORT, ready=None):
+        """Run until cancelled. ready, if given, is called with the bound (host, port)."""
+        if self.categorizer.snapshot is None:
+            # /health reports the last snapshot; the first one is taken where batches run
+            await self.batcher.call(self.categorizer.refresh)
+        batcher = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle, host, port)
+        try:
+            if ready is not None:
+                ready(server.sockets[0].getsockname()[:2])
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m server', description="Usługa HTTP przypisująca kategorie tytułom.")
+    parser.add_argument('--host', default=HOST, help=f"adres nasłuchu (domyślnie {HOST})")
+    parser.add_argument('--port', type=int, default=PORT, help=f"port (domyślnie {PORT})")
+    parser.add_argument('--rules', default=core.RULES_FILE, help="plik reguł (domyślnie rules.json obok programu)")
+    parser.add_argument('--categories', default=core.CATEGORIES_FILE, help="plik kategorii (domyślnie categories.json)")
+    parser.add_argument('--tokens', action='store_true', help="dopasowuj słowa klucz tylko jako całe słowa")
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH,
+                        help=f"najwięcej tytułów w jednej partii (domyślnie {MAX_BATCH})")
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS,
+                        help=f"ile najdłużej czekać na kolejne żądania do partii (domyślnie {MAX_WAIT_MS} ms)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    categorizer = Categorizer(args.rules, args.categories, token=args.tokens)
+    # compile before the first request rather than during it
+    snapshot, kategorie = categorizer.refresh()
+    print(f"-> Reguł: {len(snapshot.rules)}, kategorii: {len(kategorie)}")
+    server = CategorizationServer(categorizer, args.max_batch, args.max_wait_ms)
+    try:
+        asyncio.run(server.serve(args.host, args.port,
+                                 ready=lambda addr: print(f"-> Nasłuchuję na http://{addr[0]}:{addr[1]}", flush=True)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Keyword suggestions mined from unmatched titles.
+
+Counts word n-grams (1..max_n tokens) over normalized unmatched titles and
+ranks them by how many unmatched rows each one would newly cover if added
+as a rule. Counting works on 64-bit hashes of n-grams with numpy/pandas, one
+chunk of titles at a time, and keeps only the heaviest `capacity` hashes
+between chunks, so memory stays bounded regardless of the feed size.
+"""
+import numpy as np
+import pandas as pd
+
+from core import _join_rows, _rows_containing, normalize_series
+
+# Mnożnik łączący hashe kolejnych tokenów w hash n-gramu (arytmetyka mod 2**64)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _token_hashes(titles):
+    """Tokens of every title as (row number, token, 64-bit token hash) arrays."""
+    tokens = pd.Series(titles, dtype=object).str.split().explode().dropna()
+    values = tokens.to_numpy(dtype=object)
+    return tokens.index.to_numpy(dtype=np.int64), values, pd.util.hash_array(values)
+
+
+def _ngram_hashes(rows, h1, max_n):
+    """Yield (n, start positions, n-gram hashes) for n = 1..max_n, never crossing a row boundary."""
+    h = h1
+    for n in range(1, max_n + 1):
+        m = len(h1) - n + 1
+        if m <= 0:
+            return
+        if n > 1:
+            h = h[:m] * _MIX + h1[n - 1:]
+        start = np.flatnonzero(rows[:m] == rows[n - 1:])
+        yield n, start, h[start]
+
+
+def _chunk_counts(titles, weights, max_n):
+    """Weighted number of rows containing each n-gram hash (a row counts once per n-gram)."""
+    rows, _, h1 = _token_hashes(titles)
+    pairs_r, pairs_g = [], []
+    for _, start, h in _ngram_hashes(rows, h1, max_n):
+        pairs_r.append(rows[start])
+        pairs_g.append(h)
+    if not pairs_r:
+        return pd.Series(dtype=np.float64)
+    pairs = pd.DataFrame({'r': np.concatenate(pairs_r), 'g': np.concatenate(pairs_g)}).drop_duplicates()
+    return pd.Series(weights[pairs['r'].to_numpy()]).groupby(pairs['g'].to_numpy()).sum()
+
+
+def _ngram_texts(titles, wanted, max_n):
+    """Text of every wanted n-gram hash, taken from its first occurrence."""
+    rows, values, h1 = _token_hashes(titles)
+    texts = {}
+    for n, start, h in _ngram_hashes(rows, h1, max_n):
+        hit = np.flatnonzero(np.isin(h, wanted))
+        for i in hit:
+            key = h[i]
+            if key not in texts:
+                p = start[i]
+                texts[key] = ' '.join(values[p:p + n])
+    return texts
+
+
+def suggest_keywords(norm_titles, rule_set=None, top=20, max_n=4, min_chars=3,
+                     chunk_rows=200_000, capacity=50_000, candidates=50):
+    """Rank n-grams of unmatched titles by the number of rows each would newly cover.
+
+    norm_titles are normalized unmatched titles (a Series or list). N-grams
+    that an existing rule in rule_set already matches, or shorter than
+    min_chars, are skipped. The `candidates` heaviest n-grams by row count are
+    re-checked with real substring matching (what a rule would do) and then
+    picked greedily, so each suggestion counts only rows the ones before it
+    did not cover.
+
+    Returns a list of (keyword, newly covered rows, rows containing it).
+    """
+    titles = pd.Series(norm_titles, dtype=object).dropna()
+    titles = titles[titles != '']
+    if not len(titles):
+        return []
+    # duplicates are frequent among unmatched titles: count each distinct title once, weighted
+    codes, uniques = pd.factorize(titles)
+    weights = np.bincount(codes).astype(np.float64)
+    uniques = np.asarray(uniques, dtype=object)
+
+    counts = pd.Series(dtype=np.float64)
+    for start in range(0, len(uniques), chunk_rows):
+        part = _chunk_counts(uniques[start:start + chunk_rows], weights[start:start + chunk_rows], max_n)
+        counts = counts.add(part, fill_value=0)
+        if len(counts) > 2 * capacity:
+            counts = counts.nlargest(capacity)
+
+    # turn the heaviest hashes back into text, dropping ones existing rules already match
+    matcher = rule_set.matcher if rule_set is not None else None
+    ranked = counts.nlargest(min(len(counts), 4 * candidates))
+    texts = {}
+    wanted = ranked.index.to_numpy(dtype=np.uint64)
+    for start in range(0, len(uniques), chunk_rows):
+        for key, text in _ngram_texts(uniques[start:start + chunk_rows], wanted, max_n).items():
+            texts.setdefault(key, text)
+        if len(texts) == len(wanted):
+            break
+    keywords = []
+    for key in wanted:
+        text = texts.get(key)
+        if not text or len(text) < min_chars:
+            continue
+        if matcher is not None and matcher.first_match(text) >= 0:
+            continue
+        keywords.append(text)
+        if len(keywords) == candidates:
+            break
+
+    # exact coverage (whole tokens in token mode) over the distinct titles, then greedy marginal ranking
+    pad = ' ' if rule_set is not None and rule_set.token else ''
+    text, starts = _join_rows(uniques, pad)
+    hits = {kw: _rows_containing(text, starts, pad + kw + pad) for kw in keywords}
+    covered = np.zeros(len(uniques), dtype=bool)
+    result = []
+    while hits and len(result) < top:
+        gains = {kw: weights[rows[~covered[rows]]].sum() for kw, rows in hits.items()}
+        best = max(gains, key=gains.get)
+        if gains[best] <= 0:
+            break
+        rows = hits.pop(best)
+        result.append((best, int(gains[best]), int(weights[rows].sum())))
+        covered[rows] = True
+    return result
+
+
+def suggest_for_frame(df, rule_set=None, norm=None, top=20):
+    """suggest_keywords() over the rows of a categorized frame that got no Category.
+
+    norm may pass already normalized titles aligned with df to skip normalization.
+    """
+    mask = ~df['Category'].astype(object).fillna('').astype(bool).to_numpy()
+    titles = norm[mask] if norm is not None else normalize_series(df['Title'][mask])
+    return suggest_keywords(titles, rule_set, top=top)
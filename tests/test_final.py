@@ -0,0 +1,42 @@
+"""final_frame: the (id, category_id) export built from the two columns."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import final_frame
+
+
+def test_keeps_rows_with_a_category_id():
+    df = pd.DataFrame({'id': [1, 2, 3, 4], 'Title': list('abcd'), 'Category': ['A', '', 'B', ''],
+                       'Category Id': [10, '', 20.0, np.nan]})
+    final, skipped = final_frame(df)
+    assert list(final.columns) == ['id', 'category_id']
+    assert final['id'].tolist() == [1, 3]
+    assert final['category_id'].tolist() == [10, 20]
+    assert skipped == 2
+
+
+def test_category_ids_from_names_without_id_column():
+    df = pd.DataFrame({'ID': ['a', 'b', 'c'], 'Category': ['Myszy', '', 'Nieznana']})
+    final, skipped = final_frame(df, {'Myszy': 5})
+    assert final.to_dict('list') == {'id': ['a'], 'category_id': [5]}
+    assert skipped == 2
+
+
+def test_text_category_ids_fall_back_to_blank_check():
+    df = pd.DataFrame({'item_id': [1, 2, 3], 'category_id': ['x1', ' ', None]})
+    final, skipped = final_frame(df)
+    assert final.to_dict('list') == {'id': [1], 'category_id': ['x1']}
+    assert skipped == 2
+
+
+def test_does_not_modify_input():
+    df = pd.DataFrame({'id': [1, 2], 'Category Id': [7, '']})
+    before = df.copy()
+    final_frame(df)
+    pd.testing.assert_frame_equal(df, before)
+
+
+def test_no_id_column_raises():
+    with pytest.raises(ValueError):
+        final_frame(pd.DataFrame({'Title': ['a'], 'Category Id': [1]}))
@@ -0,0 +1,55 @@
+"""rematch_incremental against a full re-match after single-rule edits."""
+import json
+import random
+
+import pandas as pd
+import pytest
+
+from core import RuleSet, add_rule, delete_rule, match_titles, rematch_incremental, save_rules
+
+VOCAB = ['mysz', 'myszka', 'usb', 'kabel', 'laptop', 'etui']
+
+
+@pytest.fixture
+def feed(tmp_path):
+    rng = random.Random(0)
+    rules = [[' '.join(rng.sample(VOCAB, rng.randint(1, 2))), f"K{i % 5}"] for i in range(40)]
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps(rules), encoding='utf-8')
+    titles = pd.Series([' '.join(rng.choices(VOCAB + ['x'], k=rng.randint(0, 4))) for _ in range(400)] + [None],
+                       dtype=object)
+    return str(path), titles
+
+
+@pytest.mark.parametrize('token', [False, True])
+@pytest.mark.parametrize('edit', ['add', 'delete'])
+def test_rematch_equals_full_match(feed, token, edit):
+    path, titles = feed
+    rule_set = RuleSet(path, token=token)
+    before = rule_set.snapshot()
+    norm, winners = match_titles(titles, before)
+    if edit == 'add':
+        assert add_rule('usb kabel', 'Kable', path)
+    else:
+        keyword, category = before.rules[3]
+        assert delete_rule(keyword, category, path)
+    after = rule_set.snapshot()
+    updated = rematch_incremental(norm, winners, before.rules, after)
+    assert updated is not None
+    assert updated.tolist() == match_titles(titles, after)[1].tolist()
+
+
+def test_rematch_unchanged_rules_keeps_winners(feed):
+    path, titles = feed
+    snapshot = RuleSet(path).snapshot()
+    norm, winners = match_titles(titles, snapshot)
+    assert rematch_incremental(norm, winners, snapshot.rules, snapshot) is winners
+
+
+def test_rematch_other_edits_need_full_match(feed):
+    path, titles = feed
+    rule_set = RuleSet(path)
+    before = rule_set.snapshot()
+    norm, winners = match_titles(titles, before)
+    save_rules(list(reversed(before.rules)), path)
+    assert rematch_incremental(norm, winners, before.rules, rule_set.snapshot()) is None
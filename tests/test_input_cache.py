@@ -0,0 +1,53 @@
+"""InputCache: sidecars for frames Arrow cannot hold, keep_only, and the bounded cache directory."""
+import os
+
+import pandas as pd
+import pytest
+
+import core
+from core import InputCache
+
+
+@pytest.fixture
+def mixed_feed(tmp_path, monkeypatch):
+    src = tmp_path / 'feed.csv'
+    src.write_text("x\n1\n", encoding='utf-8')
+    # an Excel EAN column mixing numbers and text, which Feather refuses
+    frame = pd.DataFrame({'ean': [5901234123457, 'ABC-1'], 'Title': ['mysz', 'kabel'], 'cena': [1.5, 2.0]})
+    parsed = []
+    monkeypatch.setattr(core, 'read_input', lambda path, columns=None, engine=None: parsed.append(path) or frame.copy())
+    return str(src), frame, parsed
+
+
+def test_mixed_columns_get_a_lossless_sidecar(tmp_path, mixed_feed):
+    src, frame, parsed = mixed_feed
+    InputCache(str(tmp_path / 'cache')).read(src)
+    fresh = InputCache(str(tmp_path / 'cache'))
+    pd.testing.assert_frame_equal(fresh.read(src), frame)
+    assert fresh.last_source == 'sidecar' and len(parsed) == 1
+
+
+def test_keep_only_never_forces_a_reparse(tmp_path, mixed_feed):
+    src, frame, parsed = mixed_feed
+    cache = InputCache(str(tmp_path / 'cache'))
+    cache.read(src)
+    cache.keep_only(src, ['Title'])
+    assert list(cache.read(src).columns) == list(frame.columns)
+    # no sidecar can be written: the full frame stays in memory instead
+    blocked = tmp_path / 'blocked'
+    blocked.write_text("", encoding='utf-8')
+    cache = InputCache(str(blocked / 'cache'))
+    cache.read(src)
+    cache.keep_only(src, ['Title'])
+    assert list(cache.read(src).columns) == list(frame.columns)
+    assert cache.last_source == 'memory'
+    assert len(parsed) == 2
+
+
+def test_cache_directory_is_bounded(tmp_path, mixed_feed):
+    cache = InputCache(str(tmp_path / 'cache'), max_files=3)
+    for i in range(6):
+        src = tmp_path / f'feed{i}.csv'
+        src.write_text("x\n", encoding='utf-8')
+        cache.read(str(src))
+    assert len(os.listdir(cache.cache_dir)) == 3
@@ -0,0 +1,65 @@
+"""The GUI's jobs driven without a display: tkinter widgets and dialogs are mocked."""
+import os
+import json
+import time
+import functools
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('tkinter')
+
+import core  # noqa: E402
+import main  # noqa: E402
+import perf  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    rules = tmp_path / 'rules.json'
+    rules.write_text(json.dumps([['mysz', 'Peryferia'], ['laptop', 'Komputery']]), encoding='utf-8')
+    monkeypatch.setattr(core.RULE_SET, 'path', str(rules))
+    for name in ('tk', 'ttk', 'scrolledtext', 'messagebox', 'filedialog'):
+        monkeypatch.setattr(main, name, mock.MagicMock())
+    monkeypatch.setattr(main, 'TITLE_CACHE_FILE', str(tmp_path / 'titles.pkl'))
+    monkeypatch.setattr(main, 'InputCache', functools.partial(core.InputCache, str(tmp_path / 'cache')))
+    monkeypatch.setattr(main, 'RunReport', functools.partial(perf.RunReport, directory=str(tmp_path / 'reports')))
+    app = main.AplikacjaKategorii(mock.MagicMock())
+    app.final_var.get.return_value = False
+    return app
+
+
+def pump(app, timeout=10):
+    """Run the Tk side of background jobs until none is left."""
+    end = time.time() + timeout
+    while time.time() < end:
+        app._poll_events()
+        if not app.busy and app.events.empty():
+            return
+        time.sleep(0.02)
+    raise RuntimeError("zadanie się nie zakończyło")
+
+
+def write_feed(path, titles):
+    pd.DataFrame({'Title': titles, 'cena': range(len(titles))}).to_csv(path, index=False)
+
+
+@pytest.mark.parametrize('titles', [['x', 'mysz c', 'laptop d'], ['laptop e', 'x', 'x', 'mysz f']])
+def test_rematch_reads_the_input_again_when_it_changed_on_disk(tmp_path, app, titles):
+    src, out = str(tmp_path / 'in.csv'), str(tmp_path / 'out.csv')
+    write_feed(src, ['mysz a', 'laptop b', 'x'])
+    app.przetworz_plik(src, out)
+    pump(app)
+    assert pd.read_csv(out, keep_default_na=False)['Category'].tolist() == ['Peryferia', 'Komputery', '']
+    # the supplier replaces the file between the two clicks
+    write_feed(src, titles)
+    st = os.stat(src)
+    os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    app.ponownie_dopasuj()
+    pump(app)
+    main.messagebox.showerror.assert_not_called()
+    result = pd.read_csv(out, keep_default_na=False)
+    assert result['Title'].tolist() == titles
+    expected = ['Peryferia' if 'mysz' in t else 'Komputery' if 'laptop' in t else '' for t in titles]
+    assert result['Category'].tolist() == expected
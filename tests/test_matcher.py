@@ -0,0 +1,111 @@
+"""AhoCorasick and TokenMatcher against the plain first-rule-wins scan."""
+import json
+import random
+
+import pandas as pd
+import pytest
+
+from core import BULK_RULES, NO_TITLE, RuleSet, TitleCache, match_titles, normalize_text, process_csv_chunked
+from matcher import AhoCorasick, TokenMatcher
+
+
+def linear_first_match(keywords, text):
+    for idx, kw in enumerate(keywords):
+        if kw in text:
+            return idx
+    return -1
+
+
+def linear_token_match(keywords, text):
+    for idx, kw in enumerate(keywords):
+        if kw and f" {kw} " in f" {text} ":
+            return idx
+    return -1
+
+
+def random_word(rng, alphabet, lo, hi):
+    return ''.join(rng.choices(alphabet, k=rng.randint(lo, hi)))
+
+
+def test_aho_corasick_matches_linear_scan():
+    rng = random.Random(0)
+    # small alphabet so keywords overlap, nest and repeat a lot
+    for _ in range(200):
+        keywords = [random_word(rng, 'abc ', 0, 5) for _ in range(rng.randint(0, 30))]
+        ac = AhoCorasick(keywords)
+        for _ in range(20):
+            text = random_word(rng, 'abc ', 0, 20)
+            expected = linear_first_match(keywords, text)
+            assert ac.first_match(text) == expected, (keywords, text)
+            count = sum(kw in text for kw in keywords)
+            assert ac.match_count(text) == (expected, count), (keywords, text)
+
+
+def test_token_matcher_matches_linear_scan():
+    rng = random.Random(1)
+    vocab = ['a', 'b', 'ab', 'ba', 'c']
+    for _ in range(200):
+        keywords = [' '.join(rng.choices(vocab, k=rng.randint(0, 3))) for _ in range(rng.randint(0, 30))]
+        tm = TokenMatcher(keywords)
+        for _ in range(20):
+            text = ' '.join(rng.choices(vocab, k=rng.randint(0, 8)))
+            expected = linear_token_match(keywords, text)
+            assert tm.first_match(text) == expected, (keywords, text)
+            count = sum(bool(kw) and f" {kw} " in f" {text} " for kw in keywords)
+            assert tm.match_count(text) == (expected, count), (keywords, text)
+
+
+@pytest.mark.parametrize('token', [False, True])
+def test_match_titles_matches_linear_scan(tmp_path, token):
+    rng = random.Random(2)
+    vocab = ['mysz', 'myszka', 'usb', 'kabel', 'laptop', 'etui', 'lampa']
+    # more rules than BULK_RULES, so both the bulk scan and the automaton decide some rows
+    rules = [[' '.join(rng.sample(vocab, rng.randint(1, 2))), f"K{i % 7}"] for i in range(BULK_RULES + 50)]
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps(rules), encoding='utf-8')
+    rule_set = RuleSet(str(path), token=token).snapshot()
+    titles = pd.Series([' '.join(rng.choices(vocab + ['Żółć', 'x'], k=rng.randint(0, 5))) for _ in range(500)]
+                       + [None, 12], dtype=object)
+    _, winners = match_titles(titles, rule_set)
+    keywords = [k for k, _ in rule_set.rules]
+    scan = linear_token_match if token else linear_first_match
+    expected = [scan(keywords, normalize_text(t)) if isinstance(t, str) else NO_TITLE for t in titles]
+    assert winners.tolist() == expected
+
+
+def test_match_titles_stats_count_the_whole_column_in_slices(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps([['mysz', 'Myszy'], ['kabel', 'Kable']]), encoding='utf-8')
+    rule_set = RuleSet(str(path))
+    titles = pd.Series(['Mysz', 'mysz ', 'kabel', 'etui'] * 50, dtype=object)
+    whole, sliced = {}, {}
+    match_titles(titles, rule_set, stats=whole)
+    match_titles(titles, rule_set, progress=lambda done, total: None, step=7, cache=TitleCache(), stats=sliced)
+    assert sliced['rows'] == whole['rows'] == 200
+    assert sliced['unique'] == whole['unique'] == 3
+    # repeats in later slices were served by the cache, but each title was matched once in this call
+    assert sliced['cache_hits'] == 0
+    # titles the cache knew before the call are the hits
+    warm = {}
+    cache = TitleCache()
+    match_titles(titles.iloc[:4], rule_set, cache=cache)
+    match_titles(titles, rule_set, progress=lambda done, total: None, step=7, cache=cache, stats=warm)
+    assert warm['unique'] == 3 and warm['cache_hits'] == 3
+
+
+def test_process_csv_chunked_stats_count_the_whole_file(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps([['mysz', 'Myszy'], ['kabel', 'Kable']]), encoding='utf-8')
+    rule_set = RuleSet(str(path))
+    src = tmp_path / 'feed.csv'
+    pd.DataFrame({'Title': [f"mysz {i % 343}" for i in range(3000)]}).to_csv(src, index=False)
+    _, serial = process_csv_chunked(str(src), str(tmp_path / 'a.csv'), rule_set, {}, chunksize=10_000)
+    _, chunked = process_csv_chunked(str(src), str(tmp_path / 'b.csv'), rule_set, {}, chunksize=700)
+    assert chunked['chunks'] == 5
+    assert chunked['unique'] == serial['unique'] == 343
+    assert chunked['cache_hits'] == serial['cache_hits'] == 0
+    # a cache shared with an earlier file: every title of this one was known before
+    cache = TitleCache()
+    process_csv_chunked(str(src), str(tmp_path / 'c.csv'), rule_set, {}, chunksize=700, cache=cache)
+    _, again = process_csv_chunked(str(src), str(tmp_path / 'd.csv'), rule_set, {}, chunksize=700, cache=cache)
+    assert again['unique'] == 343 and again['cache_hits'] == 343
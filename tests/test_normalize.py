@@ -0,0 +1,52 @@
+"""normalize_text and normalize_series against the reference NFKD implementation."""
+import random
+
+import numpy as np
+import pandas as pd
+
+from core import _normalize_text_slow, normalize_series, normalize_text
+
+# Latin (table range), combining marks, other scripts, ligatures, whitespace and astral characters
+ALPHABET = ([chr(cp) for cp in range(0x250)]
+            + [chr(cp) for cp in range(0x300, 0x370)]
+            + list("ΣσςİıĲǅǈǋﬁﬀ½²³™№ℌⅫ①ｶﾞ日本語한국어ßẞ​ \t\n")
+            + ['\U0001d400', '\U0001d7d8', '\U0001f600', '\U00010400'])
+
+
+def random_strings(seed, n=3000):
+    rng = random.Random(seed)
+    return [''.join(rng.choices(ALPHABET, k=rng.randint(0, 24))) for _ in range(n)]
+
+
+def test_normalize_text_matches_reference():
+    for s in random_strings(0):
+        assert normalize_text(s) == _normalize_text_slow(s), repr(s)
+
+
+def test_normalize_text_single_characters_in_context():
+    rng = random.Random(1)
+    # every character of the table range, plus a random sample of the rest (surrogates excluded)
+    sample = list(range(0x250)) + rng.sample([cp for cp in range(0x250, 0x110000) if not 0xd800 <= cp < 0xe000], 5000)
+    for cp in sample:
+        ch = chr(cp)
+        for s in (ch, f"A{ch}b", f"{ch}́{ch}"):
+            assert normalize_text(s) == _normalize_text_slow(s), (hex(cp), s)
+
+
+def test_normalize_text_non_strings():
+    for value in (None, 1, 2.5, np.nan, b"bytes", ["a"]):
+        assert normalize_text(value) == ""
+
+
+def test_normalize_series_matches_reference():
+    titles = random_strings(2) + ["Żółć Gęś", "  MYSZ\tusb-C  ", "écran"]
+    out = normalize_series(pd.Series(titles, dtype=object))
+    assert out.tolist() == [_normalize_text_slow(s) for s in titles]
+
+
+def test_normalize_series_non_strings_are_missing():
+    out = normalize_series(pd.Series(["Mysz", None, 12, np.nan, "Éa"], dtype=object))
+    assert out[0] == "mysz" and out[4] == "ea"
+    assert out[[1, 2, 3]].isna().all()
+    numeric = normalize_series(pd.Series([1, 2, 3]))
+    assert numeric.isna().all()
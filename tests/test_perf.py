@@ -0,0 +1,38 @@
+"""RunReport: the run's own peak memory and the bounded reports directory."""
+import os
+import json
+from unittest import mock
+
+import perf
+from perf import RunReport
+
+
+def test_peak_memory_is_the_runs_own(tmp_path):
+    report = RunReport('run', directory=str(tmp_path))
+    with report.stage('read'):
+        pass
+    with report.stage('categorize'):
+        pass
+    # an earlier, bigger run of the same process must not show up as this run's peak
+    with mock.patch.object(perf, 'peak_rss', return_value=100 * 1024 ** 3):
+        data = report.to_dict()
+        lines = report.summary()
+    stage_peaks = [s['rss_peak_mb'] for s in report.stages]
+    if None in stage_peaks:
+        assert data['peak_rss_mb'] is None
+    else:
+        assert data['peak_rss_mb'] == max(stage_peaks)
+        assert f"szczyt pamięci {data['peak_rss_mb']} MB" in lines[0]
+    assert data['process_peak_rss_mb'] == 100 * 1024
+
+
+def test_reports_directory_keeps_the_newest_files(tmp_path):
+    paths = []
+    for i in range(5):
+        report = RunReport(f'run{i}', directory=str(tmp_path), max_files=3)
+        path = report.save()
+        os.utime(path, ns=(i * 10 ** 9, i * 10 ** 9))
+        paths.append(path)
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in paths[-3:])
+    with open(paths[-1], encoding='utf-8') as f:
+        assert json.load(f)['run'] == 'run4'
@@ -0,0 +1,106 @@
+"""RuleStore: change log replay, torn lines, compaction and file permissions."""
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+from rulestore import RuleStore, atomic_write_json
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps([["mysz", "Myszy"], ["kabel", "Kable"], ["mysz", "Myszy"]]), encoding='utf-8')
+    return RuleStore(str(path))
+
+
+def test_log_replay(store):
+    store.add("laptop", "Laptopy")
+    store.add("etui", "Etui")
+    # removes the first of the two identical rules only
+    store.delete("mysz", "Myszy")
+    store.delete("brak", "Nic")
+    assert store.read() == [("etui", "Etui"), ("laptop", "Laptopy"), ("kabel", "Kable"), ("mysz", "Myszy")]
+
+
+def test_torn_log_line_is_skipped(store):
+    store.add("laptop", "Laptopy")
+    with open(store.log_path, 'ab') as f:
+        f.write(b'{"op": "add", "keyw')
+    expected = store.read()
+    assert expected[0] == ("laptop", "Laptopy") and len(expected) == 4
+    # the next append starts on a fresh line
+    store.add("etui", "Etui")
+    assert store.read() == [("etui", "Etui")] + expected
+
+
+def test_compact_folds_log_into_base(store):
+    store.add("laptop", "Laptopy")
+    store.delete("kabel", "Kable")
+    expected = store.read()
+    assert store.compact() == len(expected)
+    assert not os.path.exists(store.log_path)
+    assert store.read() == expected
+    with open(store.path, encoding='utf-8') as f:
+        assert [tuple(r) for r in json.load(f)] == expected
+
+
+def test_auto_compaction(tmp_path):
+    store = RuleStore(str(tmp_path / 'rules.json'), compact_every=5)
+    for i in range(12):
+        store.add(f"slowo {i}", "K")
+    assert store.read() == [(f"slowo {i}", "K") for i in reversed(range(12))]
+    with open(store.log_path, 'rb') as f:
+        assert f.read().count(b'\n') < 5
+
+
+def test_normalize_applies_to_base_and_log(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps([["  MYSZ ", "Myszy"]]), encoding='utf-8')
+    store = RuleStore(str(path), normalize=str.lower)
+    store.add("Kabel", "Kable")
+    assert store.read() == [("kabel", "Kable"), ("mysz", "Myszy")]
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="POSIX permission bits")
+def test_permissions_are_kept(store):
+    os.chmod(store.path, 0o664)
+    store.add("laptop", "Laptopy")
+    for path in (store.path, store.log_path, store.lock_path):
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o664, path
+    store.compact()
+    assert stat.S_IMODE(os.stat(store.path).st_mode) == 0o664
+    atomic_write_json(store.path, [])
+    assert stat.S_IMODE(os.stat(store.path).st_mode) == 0o664
+
+
+def test_read_without_lock(store, monkeypatch):
+    import errno
+    import rulestore
+
+    def no_lock(*args, **kwargs):
+        raise OSError(errno.EROFS, "Read-only file system")
+
+    expected = store.read()
+    monkeypatch.setattr(rulestore, 'file_lock', no_lock)
+    assert store.read() == expected
+
+
+def test_unreadable_rules_are_not_empty(store, monkeypatch):
+    import core
+    rule_set = core.RuleSet(store.path)
+    loaded = rule_set.rules
+    assert loaded
+
+    def unreadable(self):
+        raise PermissionError("denied")
+
+    monkeypatch.setattr(RuleStore, '_read_unlocked', unreadable)
+    with pytest.raises(OSError):
+        core.RuleSet(store.path).rules
+    # a later failing reload keeps the rules loaded before
+    with open(store.path, 'a', encoding='utf-8') as f:
+        f.write(' ')
+    assert rule_set.rules == loaded
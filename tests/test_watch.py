@@ -0,0 +1,31 @@
+"""Watcher: --once over an inbox holding an empty file."""
+import json
+import threading
+
+import pandas as pd
+
+import core
+from watch import Watcher
+
+
+def test_once_finishes_with_an_empty_file_in_the_inbox(tmp_path):
+    inbox, outbox = tmp_path / 'in', tmp_path / 'out'
+    inbox.mkdir()
+    outbox.mkdir()
+    rules = tmp_path / 'rules.json'
+    rules.write_text(json.dumps([['mysz', 'Peryferia']]), encoding='utf-8')
+    categories = tmp_path / 'categories.json'
+    categories.write_text(json.dumps({'Peryferia': 10}), encoding='utf-8')
+    pd.DataFrame({'Title': ['mysz a', 'x']}).to_csv(inbox / 'a.csv', index=False)
+    (inbox / 'empty.csv').write_bytes(b'')
+    watcher = Watcher(str(inbox), str(outbox), core.RuleSet(str(rules)), str(categories), settle=0)
+    runner = threading.Thread(target=watcher.run, args=(0.01, True), daemon=True)
+    runner.start()
+    runner.join(10)
+    if runner.is_alive():
+        watcher.stop.set()
+        raise AssertionError("--once nie zakończyło się przy pustym pliku w skrzynce")
+    state = json.loads((outbox / 'watch_state.json').read_text(encoding='utf-8'))
+    assert state[str(inbox / 'a.csv')]['error'] is None
+    assert 'pusty' in state[str(inbox / 'empty.csv')]['error']
+    assert not watcher.pending
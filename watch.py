@@ -0,0 +1,240 @@
+"""Watch an inbox directory and categorize every feed file that lands there.
+
+Usage: python -m watch INBOX --outbox DIR [--rules rules.json] [--categories categories.json]
+                       [--interval 2] [--settle 2] [--format csv|xlsx|parquet|feather]
+                       [--state watch_state.json] [--tokens] [--once]
+
+The inbox is polled every --interval seconds (plain directory listing, so it
+works the same on network shares, where inotify sees nothing). A new or
+changed file is taken once its size and modification time have not changed
+for --settle seconds, i.e. once the supplier has finished writing it. It then
+goes through the same steps as "Rozpocznij proces" in the GUI: the output with
+Category and Category Id, plus the final (id, category_id) file when the feed
+has an id column, both in the outbox. Outbox files appear complete: they are
+written under a hidden name and renamed. Finished files (and failed ones) are
+recorded with their size and mtime in a state file, so a restart skips them
+until they change. Each file's log line gives its latency from the first scan
+that saw it to its output, split into waiting for the write to finish and
+processing. Rules and categories changed on disk apply to the next file.
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+
+import core
+from batch import expand_inputs, output_paths
+from core import final_frame, final_path_for, find_id_column, write_output
+from rulestore import atomic_write_json
+
+# Co ile sekund przeglądać skrzynkę i ile sekund plik musi się nie zmieniać, by uznać go za zapisany
+INTERVAL = 2.0
+SETTLE = 2.0
+STATE_FILE = 'watch_state.json'
+
+
+def _now_iso(t):
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(t))
+
+
+def log(message):
+    print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}", flush=True)
+
+
+def _write_complete(frame, path):
+    """write_output under a hidden temporary name in the same directory, then rename to path."""
+    directory, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    # keep the extension, write_output picks the format by it
+    tmp = os.path.join(directory, f".{stem}.part{ext}")
+    try:
+        write_output(frame, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class Watcher:
+    """Poll state of one inbox: files waiting for their writes to finish, and the state file of finished ones."""
+
+    def __init__(self, inbox, outbox, rule_set=None, categories_path=None, state_path=None,
+                 settle=SETTLE, fmt=None):
+        self.inbox = inbox
+        self.outbox = outbox
+        self.rule_set = rule_set or core.RULE_SET
+        self.categories_path = categories_path
+        self.state_path = state_path or os.path.join(outbox, STATE_FILE)
+        self.settle = settle
+        self.fmt = fmt
+        # path -> {'stamp', 'seen', 'stable'} for files not processed in their current version
+        self.pending = {}
+        self.cache = core.TitleCache()
+        self.state = self._load_state()
+        self.stop = threading.Event()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def scan(self):
+        """Update pending from one listing of the inbox; returns the paths whose writes are complete."""
+        now = time.time()
+        ready = []
+        present = set()
+        for path in expand_inputs([self.inbox]):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            present.add(path)
+            stamp = [st.st_mtime_ns, st.st_size]
+            done = self.state.get(path)
+            if done is not None and done.get('stamp') == stamp:
+                continue
+            entry = self.pending.get(path)
+            if entry is None:
+                self.pending[path] = {'stamp': stamp, 'seen': now, 'stable': now}
+            elif entry['stamp'] != stamp:
+                # still being written
+                entry['stamp'] = stamp
+                entry['stable'] = now
+            elif now - entry['stable'] >= self.settle:
+                # an empty file is taken too (and recorded as failed), else --once would wait for it forever
+                ready.append(path)
+        for path in set(self.pending) - present:
+            del self.pending[path]
+        return ready
+
+    def output_for(self, path):
+        """Outbox path for path, never one that another inbox file's output or final file already uses.
+
+        Files arrive one at a time, so names are reserved against the outputs
+        recorded in the state file: with --format csv, a.csv and a.xlsx become
+        a.csv and a_2.csv. A file processed again keeps its own name.
+        """
+        taken = set()
+        for source, record in self.state.items():
+            if source != path and record.get('output'):
+                taken.update((record['output'], final_path_for(record['output'])))
+        return output_paths([path], self.outbox, self.fmt, taken)[0]
+
+    def process(self, path):
+        """Categorize one settled file into the outbox and record it in the state file."""
+        entry = self.pending.pop(path)
+        started = time.time()
+        output = self.output_for(path)
+        record = {'stamp': entry['stamp'], 'seen': _now_iso(entry['seen']), 'output': output, 'final': None,
+                  'error': None}
+        name = os.path.basename(path)
+        try:
+            if not entry['stamp'][1]:
+                raise ValueError("Plik jest pusty.")
+            kategorie = core.load_categories(self.categories_path)
+            df = core.read_input(path)
+            if 'Title' not in df.columns:
+                raise ValueError("Plik wejściowy nie zawiera kolumny 'Title'.")
+            core.categorize_frame(df, self.rule_set, kategorie, self.cache)
+            _write_complete(df, output)
+            record['rows'] = len(df)
+            record['matched'] = int(df['Category'].astype(bool).sum())
+            if find_id_column(df.columns) is not None:
+                final, _ = final_frame(df, kategorie)
+                record['final'] = final_path_for(output)
+                _write_complete(final, record['final'])
+        except Exception as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+        finished = time.time()
+        record['done'] = _now_iso(finished)
+        record['wait_s'] = round(started - entry['seen'], 3)
+        record['process_s'] = round(finished - started, 3)
+        record['latency_s'] = round(finished - entry['seen'], 3)
+        self.state[path] = record
+        try:
+            atomic_write_json(self.state_path, self.state)
+        except OSError as e:
+            log(f"-> Nie udało się zapisać stanu {self.state_path}: {e}")
+        timing = (f"opóźnienie {record['latency_s']:.2f} s (czekanie na koniec zapisu {record['wait_s']:.2f} s, "
+                  f"przetwarzanie {record['process_s']:.2f} s)")
+        if record['error']:
+            log(f"-> BŁĄD {name}: {record['error']}; {timing}")
+        else:
+            final = f", finalny: {os.path.basename(record['final'])}" if record['final'] else ""
+            log(f"-> {name}: dopasowano {record['matched']} z {record['rows']} -> "
+                f"{os.path.basename(output)}{final}; {timing}")
+        return record
+
+    def run_once(self):
+        """One poll: scan, then process every file that is ready; returns how many were processed."""
+        ready = self.scan()
+        for path in ready:
+            if self.stop.is_set():
+                break
+            self.process(path)
+        return len(ready)
+
+    def run(self, interval=INTERVAL, once=False):
+        """Poll until stop is set (or, with once, until nothing is left waiting)."""
+        while not self.stop.is_set():
+            self.run_once()
+            if once and not self.pending:
+                break
+            self.stop.wait(interval)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m watch',
+                                     description="Przypisuj kategorie plikom pojawiającym się w katalogu.")
+    parser.add_argument('inbox', help="obserwowany katalog z plikami ofert")
+    parser.add_argument('--outbox', required=True, help="katalog na pliki wynikowe i finalne")
+    parser.add_argument('--rules', default=core.RULES_FILE, help="plik reguł (domyślnie rules.json obok programu)")
+    parser.add_argument('--categories', default=core.CATEGORIES_FILE, help="plik kategorii (domyślnie categories.json)")
+    parser.add_argument('--interval', type=float, default=INTERVAL,
+                        help=f"co ile sekund sprawdzać katalog (domyślnie {INTERVAL})")
+    parser.add_argument('--settle', type=float, default=SETTLE,
+                        help=f"ile sekund plik musi się nie zmieniać, by uznać go za zapisany (domyślnie {SETTLE})")
+    parser.add_argument('--format', choices=['csv', 'xlsx', 'parquet', 'feather'], default=None,
+                        help="format plików wynikowych (domyślnie jak plik wejściowy)")
+    parser.add_argument('--state', default=None, metavar='PATH',
+                        help=f"plik stanu z przetworzonymi plikami (domyślnie OUTBOX/{STATE_FILE})")
+    parser.add_argument('--tokens', action='store_true', help="dopasowuj słowa klucz tylko jako całe słowa")
+    parser.add_argument('--once', action='store_true',
+                        help="przetwórz to, co jest w katalogu, i zakończ zamiast czekać na nowe pliki")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.isdir(args.inbox):
+        print(f"-> BŁĄD: {args.inbox} nie jest katalogiem", file=sys.stderr)
+        return 2
+    if os.path.realpath(args.inbox) == os.path.realpath(args.outbox):
+        print("-> BŁĄD: katalog wynikowy musi być inny niż obserwowany", file=sys.stderr)
+        return 2
+    os.makedirs(args.outbox, exist_ok=True)
+    rule_set = core.RuleSet(args.rules, token=args.tokens)
+    watcher = Watcher(args.inbox, args.outbox, rule_set, args.categories, args.state, args.settle, args.format)
+    # finish the current file, then exit
+    signal.signal(signal.SIGTERM, lambda *_: watcher.stop.set())
+    log(f"-> Obserwuję {os.path.abspath(args.inbox)} co {args.interval:g} s, wyniki: {os.path.abspath(args.outbox)} "
+        f"(reguł: {len(rule_set.rules)}, przetworzonych wcześniej: {len(watcher.state)})")
+    try:
+        watcher.run(args.interval, args.once)
+    except KeyboardInterrupt:
+        pass
+    log("-> Koniec obserwacji")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())